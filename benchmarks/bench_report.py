@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+"""
+bench_report
+----------------------------------
+
+End to end benchmark of `exreporter.reporter.Reporter.report` against a local
+fake Github API (see `fake_github`). For every scenario it prints the p50 and
+p99 latency of ``report()``, the number of HTTP requests made per report and
+the memory retained per report.
+
+Scenarios:
+
+- single: one exception reported on an empty repository
+- storm: a burst of identical exceptions
+- distinct: many exceptions, each with its own culprit
+- deep: identical exceptions raised at the bottom of a deep traceback
+
+Usage:
+
+    python benchmarks/bench_report.py [--number 200] [--latency 0.002]
+        [--error-rate 0] [--rate-limit 5000] [--depth 250] [scenario ...]
+"""
+
+from __future__ import print_function
+
+import gc
+import os
+import sys
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from exreporter.compat import monotonic  # noqa
+from exreporter.reporter import Reporter  # noqa
+from exreporter.stores.github import GithubCredentials, GithubStore  # noqa
+from fake_github import FakeGithub  # noqa
+
+
+def recurse(depth, exception):
+    if depth:
+        return recurse(depth - 1, exception)
+    raise exception('benchmark')
+
+
+def distinct_exceptions(number):
+    return [type('Error{}'.format(index), (Exception,), {})
+            for index in range(number)]
+
+
+SCENARIOS = {
+    'single': lambda args: [ValueError],
+    'storm': lambda args: [ValueError] * args.number,
+    'distinct': lambda args: distinct_exceptions(args.number),
+    'deep': lambda args: [ValueError] * args.number,
+}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(reporter, exceptions, depth):
+    latencies, failures = [], 0
+    for exception in exceptions:
+        try:
+            recurse(depth, exception)
+        except Exception:
+            start = monotonic()
+            try:
+                reporter.report()
+            except Exception:
+                failures += 1
+            latencies.append(monotonic() - start)
+    return latencies, failures
+
+
+def measure(name, github, args):
+    depth = args.depth if name == 'deep' else 0
+    exceptions = SCENARIOS[name](args)
+
+    def reporter():
+        github.reset()
+        store = GithubStore(
+            credentials=GithubCredentials(
+                user='u', repo='r', auth_token='t'),
+            api_url=github.url)
+        return Reporter(store=store, time_delta=args.time_delta)
+
+    latencies, failures = run(reporter(), exceptions, depth)
+    requests = github.requests
+
+    reporter = reporter()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    run(reporter, exceptions, depth)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    return {
+        'reports': len(exceptions),
+        'failures': failures,
+        'p50': percentile(latencies, 0.50) * 1e3,
+        'p99': percentile(latencies, 0.99) * 1e3,
+        'requests': float(requests) / len(exceptions),
+        'memory': float(retained) / len(exceptions),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('scenarios', nargs='*', metavar='scenario',
+                        help='one of {}, default: all'.format(
+                            ', '.join(sorted(SCENARIOS))))
+    parser.add_argument('--number', type=int, default=200)
+    parser.add_argument('--depth', type=int, default=250)
+    parser.add_argument('--latency', type=float, default=0.002)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--rate-limit', type=int, default=5000)
+    parser.add_argument('--time-delta', type=int, default=10)
+    args = parser.parse_args()
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error('unknown scenario {}'.format(name))
+    args.scenarios = args.scenarios or sorted(SCENARIOS)
+
+    print('number={} depth={} latency={}s error-rate={} rate-limit={}'.format(
+        args.number, args.depth, args.latency, args.error_rate,
+        args.rate_limit))
+    print('{:<10}{:>8}{:>9}{:>10}{:>10}{:>11}{:>13}'.format(
+        'scenario', 'reports', 'failed', 'p50 ms', 'p99 ms', 'req/report',
+        'bytes/report'))
+
+    with FakeGithub(latency=args.latency, error_rate=args.error_rate,
+                    rate_limit=args.rate_limit) as github:
+        for name in args.scenarios:
+            result = measure(name, github, args)
+            print('{:<10}{reports:>8}{failures:>9}{p50:>10.3f}{p99:>10.3f}'
+                  '{requests:>11.2f}{memory:>13.0f}'.format(name, **result))
+
+
+if __name__ == '__main__':
+    main()
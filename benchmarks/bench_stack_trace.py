@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+"""
+bench_stack_trace
+----------------------------------
+
+Micro-benchmark of `exreporter.stack_trace.StackTrace` capture cost for deep
+tracebacks.
+
+Usage:
+
+    python benchmarks/bench_stack_trace.py [--depth 250] [--number 2000]
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from exreporter.stack_trace import StackTrace  # noqa
+
+
+def recurse(depth):
+    if depth:
+        return recurse(depth - 1)
+    raise ValueError('benchmark')
+
+
+def measure(depth, number, func):
+    def run():
+        try:
+            recurse(depth)
+        except ValueError:
+            func()
+
+    def baseline():
+        try:
+            recurse(depth)
+        except ValueError:
+            pass
+
+    total = timeit.timeit(run, number=number)
+    raised = timeit.timeit(baseline, number=number)
+    return (total - raised) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--depth', type=int, default=250)
+    parser.add_argument('--number', type=int, default=2000)
+    args = parser.parse_args()
+
+    def stack_trace_text_twice():
+        trace_info = StackTrace()
+        trace_info.stack_trace_text
+        trace_info.stack_trace_text
+
+    print('depth={} number={}'.format(args.depth, args.number))
+    print('capture:               {:8.2f} us'.format(
+        measure(args.depth, args.number, StackTrace)))
+    print('capture + format x2:   {:8.2f} us'.format(
+        measure(args.depth, args.number // 10 or 1, stack_trace_text_twice)))
+
+
+if __name__ == '__main__':
+    main()
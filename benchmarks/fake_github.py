@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+
+"""
+fake_github
+----------------------------------
+
+Local stand-in for the parts of the Github API used by
+`exreporter.stores.github`: issue search, issue creation, comments and issue
+updates. Issues live in memory. Latency, error rate and the rate limit are
+configurable so the reporting hot path can be measured without network
+access.
+
+Usage:
+
+    >>> with FakeGithub(latency=0.005, error_rate=0.01) as github:
+    ...     gs = GithubStore(credentials=gc, api_url=github.url)
+"""
+
+import re
+import hashlib
+import json
+import time
+import random
+import threading
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import unquote, urlsplit
+except ImportError:  # pragma: no cover
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urllib import unquote
+    from urlparse import urlsplit
+
+
+ISSUES = re.compile(r'^/repos/[^/]+/[^/]+/issues$')
+ISSUE = re.compile(r'^/repos/[^/]+/[^/]+/issues/(\d+)$')
+COMMENTS = re.compile(r'^/repos/[^/]+/[^/]+/issues/(\d+)/comments$')
+QUERY = re.compile(r"q='(.*?)'\+state:")
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class FakeGithub(object):
+    """In-memory Github API served over HTTP on localhost.
+    """
+
+    def __init__(self, latency=0, error_rate=0, rate_limit=5000,
+                 rate_limit_window=3600, seed=0):
+        '''Initializes the fake server, it is started by :meth:`start`.
+
+        :params latency: (optional) seconds each response is delayed by
+        :params error_rate: (optional) fraction of requests answered with ``502``
+        :params rate_limit: (optional) requests allowed per window, further ones
+            are answered with ``403``
+        :params rate_limit_window: (optional) length of a rate limit window in seconds
+        :params seed: (optional) seed of the error generator
+        '''
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.random = random.Random(seed)
+
+        self.issues = {}
+        self.requests = 0
+        self.errors = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self._window_start = time.time()
+        self._window_requests = 0
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                fake._handle(self)
+
+            do_POST = do_PATCH = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _Server(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=self._server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def reset(self):
+        """Forgets all issues and counters.
+        """
+        with self._lock:
+            self.issues.clear()
+            self.requests = self.errors = self.not_modified = 0
+            self._window_start = time.time()
+            self._window_requests = 0
+
+    def _handle(self, handler):
+        length = int(handler.headers.get('Content-Length') or 0)
+        data = json.loads(handler.rfile.read(length) or '{}')
+
+        with self._lock:
+            self.requests += 1
+            now = time.time()
+            if now - self._window_start >= self.rate_limit_window:
+                self._window_start, self._window_requests = now, 0
+            self._window_requests += 1
+            remaining = self.rate_limit - self._window_requests
+            headers = {
+                'X-RateLimit-Limit': self.rate_limit,
+                'X-RateLimit-Remaining': max(remaining, 0),
+                'X-RateLimit-Reset':
+                    int(self._window_start + self.rate_limit_window),
+            }
+
+            if remaining < 0:
+                status, body = 403, {'message': 'API rate limit exceeded'}
+            elif self.random.random() < self.error_rate:
+                self.errors += 1
+                status, body = 502, {'message': 'Server Error'}
+            else:
+                status, body = self._route(handler.command, handler.path, data)
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        content = json.dumps(body).encode('utf-8')
+        if handler.command == 'GET' and status == 200:
+            headers['ETag'] = '"{}"'.format(hashlib.sha1(content).hexdigest())
+            if handler.headers.get('If-None-Match') == headers['ETag']:
+                # Github does not count 304 responses against the rate limit
+                with self._lock:
+                    self.not_modified += 1
+                    self._window_requests -= 1
+                    headers['X-RateLimit-Remaining'] = max(
+                        self.rate_limit - self._window_requests, 0)
+                status, content = 304, b''
+
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, str(value))
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(content)))
+        handler.end_headers()
+        handler.wfile.write(content)
+
+    def _route(self, method, path, data):
+        parts = urlsplit(path)
+
+        if method == 'GET' and parts.path == '/search/issues':
+            return 200, self._search(unquote(parts.query))
+        if method == 'POST' and ISSUES.match(parts.path):
+            return 201, self._create(parts.path, data)
+
+        match = COMMENTS.match(parts.path)
+        if method == 'POST' and match and int(match.group(1)) in self.issues:
+            return 201, self._comment(int(match.group(1)), data)
+
+        match = ISSUE.match(parts.path)
+        if method == 'PATCH' and match and int(match.group(1)) in self.issues:
+            issue = self.issues[int(match.group(1))]
+            issue.update(data)
+            return 200, self._public(issue)
+
+        return 404, {'message': 'Not Found'}
+
+    def _search(self, query):
+        match = QUERY.search(query)
+        q = match.group(1) if match else ''
+        items = [
+            self._public(issue) for issue in sorted(
+                self.issues.values(), key=lambda issue: issue['updated_at'],
+                reverse=True)
+            if q in issue['title'] or q in issue['body']]
+        return {'total_count': len(items), 'items': items}
+
+    def _create(self, path, data):
+        number = len(self.issues) + 1
+        url = 'http://{}:{}{}/{}'.format(
+            self._server.server_address[0], self._server.server_address[1],
+            path, number)
+        self.issues[number] = {
+            'number': number,
+            'url': url,
+            'comments_url': '{}/comments'.format(url),
+            'title': data.get('title', ''),
+            'body': data.get('body', ''),
+            'labels': data.get('labels', []),
+            'state': 'open',
+            'comments': 0,
+            'updated_at': _now(),
+        }
+        return self._public(self.issues[number])
+
+    def _comment(self, number, data):
+        issue = self.issues[number]
+        issue['comments'] += 1
+        issue['updated_at'] = _now()
+        return {'body': data.get('body', ''), 'issue_url': issue['url']}
+
+    def _public(self, issue):
+        return dict(
+            (key, value) for key, value in issue.items() if key != 'body')
+
+
+def _now():
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
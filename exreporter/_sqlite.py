@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter._sqlite
+~~~~~~~~~~~~~~~~~~
+
+This module implements the SQLite connection shared by the on-disk state of
+exreporter: the spool, the dedup table, the response cache and the SQLite
+store.
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import os
+import sqlite3
+
+
+class Database(object):
+    """Connection to a SQLite database, opened on first use.
+
+    The database runs in WAL mode, so readers do not block the writer, and
+    the connection is in autocommit mode, transactions being opened
+    explicitly. The connection is shared by the threads of a process,
+    which serialize its use, and opened again in a forked child.
+    """
+
+    def __init__(self, path, schema, synchronous='NORMAL'):
+        '''Initializes the database, the schema is created on first use.
+
+        :params path: path of the SQLite database file
+        :params schema: SQL script creating the tables if they do not exist
+        :params synchronous: (optional) SQLite ``synchronous`` pragma, default value is ``'NORMAL'``
+        '''
+        self.path = path
+        self.schema = schema
+        self.synchronous = synchronous
+        self._connection = None
+        self._pid = None
+
+    def connect(self):
+        """Returns the connection of the current process.
+
+        :rtype: :class:`sqlite3.Connection`
+        """
+        if self._pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path, isolation_level=None, check_same_thread=False,
+                timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'PRAGMA synchronous={}'.format(self.synchronous))
+            connection.executescript(self.schema)
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def close(self):
+        """Closes the connection, it is opened again on next use.
+        """
+        if self._connection is not None:
+            self._connection.close()
+        self._connection = self._pid = None
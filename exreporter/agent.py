@@ -0,0 +1,382 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.agent
+~~~~~~~~~~~~~~~~
+
+This module implements a host-level reporting agent. Application processes
+report through an :class:`AgentStore`, which writes each rendered report as
+a length-prefixed JSON message to the Unix domain socket of the agent and
+does not wait for a reply. The agent batches the reports of all processes
+and hands them to a single store, so the host shares one pooled session,
+one issue index and one view of the rate limit.
+
+Basic Usage:
+
+  $ exreporter-agent --socket /run/exreporter/agent.sock \\
+  ...     --user user --repo repo --auth-token token
+
+  >>> from exreporter.agent import AgentStore
+  >>> reporter = ExReporter(store=AgentStore('/run/exreporter/agent.sock'))
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import os
+import json
+import stat
+import time
+import errno
+import socket
+import struct
+import logging
+import argparse
+import threading
+
+try:
+    import socketserver
+except ImportError:  # pragma: no cover
+    import SocketServer as socketserver
+
+from .compat import queue, monotonic
+from .stores.base import BaseStore, StoreError
+
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct('>I')
+
+MAX_MESSAGE_SIZE = 1 << 20
+
+# not in a world-writable directory, where another user could take the path
+SOCKET_PATH = '/run/exreporter/agent.sock'
+
+
+class AgentError(StoreError):
+    """Raised when a report could not be written to the agent's socket.
+    """
+
+
+def encode(report):
+    """Returns ``report`` as a message: its compact JSON prefixed with its
+    length as a 4 byte big-endian integer.
+
+    :rtype: `bytes`
+    """
+    payload = json.dumps(report, separators=(',', ':')).encode('utf-8')
+    return HEADER.pack(len(payload)) + payload
+
+
+def decode(stream, max_size=MAX_MESSAGE_SIZE):
+    """Reads one message from the file object ``stream``.
+
+    :returns: the report, or ``None`` at the end of the stream
+    :rtype: `dict`
+    """
+    header = stream.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    size, = HEADER.unpack(header)
+    if size > max_size:
+        raise ValueError('Message of {} bytes is too large'.format(size))
+
+    payload = stream.read(size)
+    if len(payload) < size:
+        return None
+    return json.loads(payload.decode('utf-8'))
+
+
+class AgentStore(BaseStore):
+    """Store sending reports to an agent over its Unix domain socket.
+
+    The connection is opened on the first report, kept open and reopened
+    after a fork or a failed write. Reports are not acknowledged, the store
+    returns ``None``.
+    """
+
+    def __init__(self, path, timeout=1.0):
+        '''Initializes the store.
+
+        :params path: path of the agent's socket
+        :params timeout: (optional) seconds to wait for the socket to accept a
+            report, default value is ``1.0``
+        '''
+        self.path = path
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._socket = None
+        self._pid = None
+
+    def create_or_update_issue(self, **issue):
+        '''Sends a rendered issue to the agent.
+        '''
+        self._send(encode(issue))
+
+    def create_or_update_many(self, reports):
+        '''Sends a batch of rendered issues to the agent in one write.
+        '''
+        self._send(b''.join(encode(report) for report in reports))
+        return [None] * len(reports)
+
+    def close(self):
+        with self._lock:
+            if self._socket is not None:
+                self._socket.close()
+            self._socket = self._pid = None
+
+    def _send(self, data):
+        with self._lock:
+            try:
+                self._connect().sendall(data)
+            except (IOError, OSError) as error:
+                if self._socket is not None:
+                    self._socket.close()
+                self._socket = self._pid = None
+                raise AgentError(
+                    'Exreporter agent at {} is unavailable: {}'.format(
+                        self.path, error))
+
+    def _connect(self):
+        if self._pid != os.getpid():
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except Exception:
+                sock.close()
+                raise
+            self._socket = sock
+            self._pid = os.getpid()
+        return self._socket
+
+
+class Agent(object):
+    """Server receiving reports on a Unix domain socket and delivering them
+    to ``store`` in batches.
+
+    Each connection is read by its own thread; a single delivery thread
+    waits ``interval`` seconds after the first pending report, then hands
+    up to ``batch_size`` reports to :meth:`create_or_update_many` of the
+    store, which groups the reports of a culprit.
+    """
+
+    def __init__(self, store, path, batch_size=100, interval=1.0,
+                 max_size=10000, mode=0o660):
+        '''Initializes the agent, it is started by :meth:`start`.
+
+        :params store: store delivering the reports, eg:
+            :class:`exreporter.stores.github.GithubStore`
+        :params path: path of the socket, a socket left by a stopped agent is
+            replaced, any other file is not
+        :params batch_size: (optional) maximum number of reports per batch, default value is ``100``
+        :params interval: (optional) seconds reports are collected before a batch
+            is delivered, default value is ``1.0``
+        :params max_size: (optional) maximum number of pending reports, further
+            ones are dropped and counted in ``dropped``
+        :params mode: (optional) permissions of the socket file, default ``0o660``
+        '''
+        self.store = store
+        self.path = path
+        self.batch_size = batch_size
+        self.interval = interval
+        self.mode = mode
+        self.received = 0
+        self.dropped = 0
+
+        self._queue = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._connections = set()
+        self._server = None
+
+    def start(self):
+        """Binds the socket and starts the reader and delivery threads.
+        """
+        agent = self
+
+        class Handler(socketserver.StreamRequestHandler):
+
+            def handle(self):
+                with agent._lock:
+                    agent._connections.add(self.request)
+                try:
+                    agent._read(self.rfile)
+                finally:
+                    with agent._lock:
+                        agent._connections.discard(self.request)
+
+        self._remove_stale_socket()
+        self._server = _Server(self.path, Handler)
+        os.chmod(self.path, self.mode)
+
+        for target, name in ((self._serve, 'exreporter-agent'),
+                             (self._run, 'exreporter-agent-delivery')):
+            thread = threading.Thread(target=target, name=name)
+            thread.daemon = True
+            thread.start()
+        return self
+
+    def stop(self):
+        """Stops accepting reports, closes the connections of the clients and
+        removes the socket file.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except (IOError, OSError):
+                pass
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def _remove_stale_socket(self):
+        try:
+            mode = os.lstat(self.path).st_mode
+        except OSError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise OSError(errno.EEXIST, 'Not a socket', self.path)
+
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except (IOError, OSError):
+            os.unlink(self.path)
+        else:
+            raise OSError(
+                errno.EADDRINUSE, 'An agent is already listening', self.path)
+        finally:
+            probe.close()
+
+    def flush(self, timeout=None):
+        """Waits until every received report has been delivered.
+
+        :returns: ``True`` if the queue was drained, ``False`` on timeout
+        :rtype: `bool`
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def deliver(self):
+        """Delivers one batch of pending reports on the calling thread.
+
+        :returns: number of reports in the batch
+        :rtype: `int`
+        """
+        return self._deliver([])
+
+    def _deliver(self, batch):
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if not batch:
+            return 0
+
+        try:
+            results = self.store.create_or_update_many(batch)
+            for report, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    logger.warning(
+                        'Exreporter agent failed to deliver a report of %s: '
+                        '%r', report.get('culprit'), result)
+        except Exception:
+            logger.exception('Exreporter agent failed to deliver a batch')
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+        return len(batch)
+
+    def _read(self, stream):
+        while True:
+            try:
+                report = decode(stream)
+            except ValueError:
+                logger.warning(
+                    'Exreporter agent dropped a connection sending an '
+                    'invalid message', exc_info=True)
+                return
+            if report is None:
+                return
+            try:
+                self._queue.put_nowait(report)
+            except queue.Full:
+                with self._lock:
+                    self.dropped += 1
+            else:
+                with self._lock:
+                    self.received += 1
+
+    def _serve(self):
+        self._server.serve_forever(poll_interval=0.1)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            time.sleep(self.interval)
+            while self._deliver(batch) == self.batch_size:
+                batch = []
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def main(argv=None):
+    """Runs an agent delivering reports to Github, configured from the
+    command line and the ``EXREPORTER_GITHUB_*`` environment variables.
+    """
+    from .stores.github import GithubCredentials, GithubStore
+
+    parser = argparse.ArgumentParser(
+        prog='exreporter-agent',
+        description='Deliver the reports of the processes of this host.')
+    parser.add_argument('--socket', default=SOCKET_PATH)
+    parser.add_argument(
+        '--user', default=os.environ.get('EXREPORTER_GITHUB_USER'))
+    parser.add_argument(
+        '--repo', default=os.environ.get('EXREPORTER_GITHUB_REPO'))
+    parser.add_argument(
+        '--auth-token',
+        default=os.environ.get('EXREPORTER_GITHUB_AUTH_TOKEN'))
+    parser.add_argument('--api-url')
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--interval', type=float, default=1.0)
+    parser.add_argument('--pool-size', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    for name in ('user', 'repo', 'auth_token'):
+        if not getattr(args, name):
+            parser.error('--{} is required'.format(name.replace('_', '-')))
+
+    logging.basicConfig(level=logging.INFO)
+    directory = os.path.dirname(args.socket)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory, 0o750)
+    store = GithubStore(
+        credentials=GithubCredentials(
+            user=args.user, repo=args.repo, auth_token=args.auth_token),
+        api_url=args.api_url, pool_size=args.pool_size, max_wait=10)
+    agent = Agent(
+        store, path=args.socket, batch_size=args.batch_size,
+        interval=args.interval).start()
+    logger.info('Exreporter agent listening on %s', args.socket)
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        agent.stop()
+        agent.flush(timeout=30)
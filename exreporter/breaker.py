@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.breaker
+~~~~~~~~~~~~~~~~~~
+
+This module implements a circuit breaker around store calls. After a number
+of consecutive failures the circuit opens and reports are diverted to a
+fallback store without calling the failing one; after a cooldown a few
+trial calls decide whether the circuit closes again.
+
+Basic Usage:
+
+  >>> from exreporter.breaker import BreakerStore, CircuitBreaker
+  >>> from exreporter.stores.fallback import LoggingStore
+  >>> store = BreakerStore(
+  ...     gs, breaker=CircuitBreaker(failure_threshold=5, cooldown=30),
+  ...     fallback=LoggingStore())
+  >>> reporter = ExReporter(store=store)
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import logging
+import threading
+
+from .compat import monotonic
+from .stores.base import BaseStore, StoreError
+
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitOpenError(StoreError):
+    """Raised instead of calling the store while the circuit is open.
+    """
+
+
+class CircuitBreaker(object):
+    """Closed, open and half-open circuit breaker.
+
+    The circuit opens after ``failure_threshold`` consecutive failures and
+    rejects calls for ``cooldown`` seconds. It then turns half-open and lets
+    ``half_open_calls`` trial calls through: a success closes it, a failure
+    opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, cooldown=30, half_open_calls=1,
+                 listeners=None):
+        '''Initializes the breaker, closed.
+
+        :params failure_threshold: (optional) consecutive failures opening the circuit,
+            default value is ``5``
+        :params cooldown: (optional) seconds the circuit stays open, default value is ``30``
+        :params half_open_calls: (optional) trial calls let through while half-open,
+            default value is ``1``
+        :params listeners: (optional) list of callables called as
+            ``listener(breaker, old_state, new_state)`` on every transition
+        '''
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.half_open_calls = half_open_calls
+        self.listeners = list(listeners or [])
+
+        self.failures = 0
+        self.rejected = 0
+        self.transitions = 0
+        self._state = CLOSED
+        self._opened_at = None
+        self._trials = 0
+        self._lock = threading.RLock()
+
+    @property
+    def state(self):
+        """Returns ``'closed'``, ``'open'`` or ``'half-open'``.
+        """
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def stats(self):
+        """Returns the state and counters of the breaker, for monitoring.
+
+        :rtype: `dict`
+        """
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'rejected': self.rejected,
+            'transitions': self.transitions,
+        }
+
+    def allow(self):
+        """Returns whether a call may be made now, counting rejected ones.
+
+        :rtype: `bool`
+        """
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and\
+                    self._trials < self.half_open_calls:
+                self._trials += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def success(self):
+        """Records a successful call.
+        """
+        with self._lock:
+            self.failures = 0
+            if self._state != CLOSED:
+                self._transition(CLOSED)
+
+    def failure(self):
+        """Records a failed call.
+        """
+        with self._lock:
+            self.failures += 1
+            if self._state == HALF_OPEN or (
+                    self._state == CLOSED and
+                    self.failures >= self.failure_threshold):
+                self._opened_at = monotonic()
+                self._transition(OPEN)
+
+    def call(self, func, *args, **kwargs):
+        """Calls ``func(*args, **kwargs)`` through the breaker.
+
+        :raises: :class:`CircuitOpenError` when the circuit is open
+        """
+        if not self.allow():
+            raise CircuitOpenError('Circuit is open')
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.failure()
+            raise
+        self.success()
+        return result
+
+    def _maybe_half_open(self):
+        if self._state == OPEN and\
+                monotonic() - self._opened_at >= self.cooldown:
+            self._trials = 0
+            self._transition(HALF_OPEN)
+
+    def _transition(self, state):
+        old_state, self._state = self._state, state
+        self.transitions += 1
+        logger.warning(
+            'Exreporter circuit changed from %s to %s', old_state, state)
+        for listener in self.listeners:
+            try:
+                listener(self, old_state, state)
+            except Exception:
+                logger.exception('Exreporter circuit listener failed')
+
+
+class BreakerStore(BaseStore):
+    """Store calling another store through a :class:`CircuitBreaker`.
+
+    While the circuit is open, and when a call fails, the issue is handed to
+    ``fallback`` instead; without a fallback the error is raised, eg: for a
+    spool to retry the report later.
+    """
+
+    def __init__(self, store, breaker=None, fallback=None):
+        '''Initializes the store.
+
+        :params store: store to protect, eg: :class:`exreporter.stores.github.GithubStore`
+        :params breaker: (optional) object of :class:`CircuitBreaker`, a default one is created
+        :params fallback: (optional) store receiving diverted issues, eg:
+            :class:`exreporter.stores.fallback.LoggingStore`
+        '''
+        self.store = store
+        self.breaker = breaker or CircuitBreaker()
+        self.fallback = fallback
+
+    def create_or_update_issue(self, **issue):
+        '''Creates or comments on an issue in the store, or the fallback.
+        '''
+        try:
+            return self.breaker.call(self.store.create_or_update_issue, **issue)
+        except CircuitOpenError:
+            if self.fallback is None:
+                raise
+        except Exception:
+            if self.fallback is None:
+                raise
+            logger.warning(
+                'Exreporter store failed, using the fallback', exc_info=True)
+        return self.fallback.create_or_update_issue(**issue)
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.cache
+~~~~~~~~~~~~~~~~
+
+This module implements a small thread safe LRU cache with optional expiry,
+used by stores and the reporter to keep bounded in-memory state.
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import threading
+from collections import OrderedDict
+
+from .compat import monotonic
+
+
+class LRUCache(object):
+    """Bounded mapping which evicts the least recently used key.
+
+    Basic Usage:
+
+      >>> from exreporter.cache import LRUCache
+      >>> cache = LRUCache(max_size=2, ttl=60)
+      >>> cache.set('a', 1)
+      >>> cache.get('a')
+      1
+    """
+
+    def __init__(self, max_size=1024, ttl=None):
+        '''Initializes the cache.
+
+        :params max_size: (optional) maximum number of keys kept, default value is ``1024``
+        :params ttl: (optional) number of seconds after which a key expires, ``None`` never expires
+        '''
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def get(self, key, default=None):
+        """Returns the value for ``key`` and marks it as recently used.
+        """
+        with self._lock:
+            try:
+                expires_at, value = self._data.pop(key)
+            except KeyError:
+                return default
+            if expires_at is not None and expires_at <= monotonic():
+                return default
+            self._data[key] = (expires_at, value)
+            return value
+
+    def set(self, key, value):
+        """Stores ``value`` under ``key``, evicting the oldest keys if full.
+        """
+        expires_at = None if self.ttl is None else monotonic() + self.ttl
+
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (expires_at, value)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Removes ``key`` and returns its value.
+        """
+        with self._lock:
+            try:
+                return self._data.pop(key)[1]
+            except KeyError:
+                return default
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.coalesce
+~~~~~~~~~~~~~~~~~~~
+
+This module implements occurrence coalescing: occurrences of a culprit are
+buffered for a window and reported to the store as one summary instead of
+one comment per exception.
+
+Basic Usage:
+
+  >>> from exreporter.coalesce import Coalescer
+  >>> reporter = ExReporter(store=gs, coalescer=Coalescer(window=60))
+  >>> reporter.report()  # buffered, reported when the window closes
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+from .formats import Formats, format_time
+
+
+logger = logging.getLogger(__name__)
+
+
+class Occurrences(object):
+    """Occurrences of a single culprit buffered within one window.
+    """
+
+    def __init__(self, issue, message, now):
+        self.issue = issue
+        self.count = 1
+        self.first_seen = self.last_seen = now
+        self.messages = [message]
+
+    def add(self, message, now, max_messages):
+        self.count += 1
+        self.last_seen = now
+        if message not in self.messages and\
+                len(self.messages) < max_messages:
+            self.messages.append(message)
+
+    def summary(self):
+        """Returns the representative issue with a summary prepended to its body.
+
+        :rtype: `dict`
+        """
+        messages = '\n'.join(
+            '- `{}`'.format(message) for message in self.messages)
+        summary = Formats.coalesced.format(
+            count=self.count,
+            first_seen=format_time(self.first_seen),
+            last_seen=format_time(self.last_seen),
+            messages=messages)
+
+        issue = dict(self.issue)
+        issue['body'] = '{}{}'.format(summary, issue['body'])
+        return issue
+
+
+class Coalescer(object):
+    """Buffers occurrences per culprit and emits one summary per window.
+
+    A window opens with the first occurrence of a culprit and closes
+    ``window`` seconds later; the summary contains the occurrence count,
+    first and last seen times, distinct exception messages and the rendered
+    issue of the first occurrence as the representative stack trace.
+    """
+
+    def __init__(self, window=60, max_messages=10, max_message_length=200,
+                 max_culprits=1024, tick=1.0):
+        '''Initializes the coalescer.
+
+        :params window: (optional) seconds occurrences are buffered for, default value is ``60``
+        :params max_messages: (optional) number of distinct exception messages kept per window
+        :params max_message_length: (optional) characters kept of each exception message
+        :params max_culprits: (optional) number of culprits buffered at once, the
+            oldest window is closed early when exceeded
+        :params tick: (optional) seconds between checks for closed windows
+        '''
+        self.window = window
+        self.max_messages = max_messages
+        self.max_message_length = max_message_length
+        self.max_culprits = max_culprits
+        self.tick = min(tick, window)
+        self.emit = None
+
+        self._buffers = OrderedDict()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def __len__(self):
+        return len(self._buffers)
+
+    def start(self, emit):
+        """Sets the callable receiving summaries, ``emit(**issue)``.
+
+        The background thread closing windows is started on the first
+        occurrence, and restarted after a fork.
+        """
+        self.emit = emit
+
+    def add(self, culprit, message, render):
+        """Buffers an occurrence of ``culprit``.
+
+        :params culprit: string used to identify the cause of the issue
+        :params message: the exception value of the occurrence
+        :params render: callable returning the rendered issue, only called
+            for the first occurrence of a window
+        """
+        self._ensure_ticker()
+        message = '{}'.format(message)[:self.max_message_length]
+        now = time.time()
+        expired = []
+
+        with self._lock:
+            occurrences = self._buffers.get(culprit)
+            if occurrences is not None:
+                occurrences.add(message, now, self.max_messages)
+                return
+
+        issue = render()
+
+        with self._lock:
+            occurrences = self._buffers.get(culprit)
+            if occurrences is not None:
+                occurrences.add(message, now, self.max_messages)
+                return
+            self._buffers[culprit] = Occurrences(issue, message, now)
+            while len(self._buffers) > self.max_culprits:
+                expired.append(self._buffers.popitem(last=False)[1])
+
+        self._emit(expired)
+
+    def flush(self, force=True):
+        """Emits summaries of buffered windows.
+
+        :params force: (optional) emit every window, not only the closed ones
+        :returns: number of summaries emitted
+        :rtype: `int`
+        """
+        deadline = time.time() - self.window
+        expired = []
+
+        with self._lock:
+            for culprit in list(self._buffers):
+                if force or self._buffers[culprit].first_seen <= deadline:
+                    expired.append(self._buffers.pop(culprit))
+
+        self._emit(expired)
+        return len(expired)
+
+    def _emit(self, expired):
+        for occurrences in expired:
+            try:
+                self.emit(**occurrences.summary())
+            except Exception:
+                logger.exception('Exreporter failed to emit a summary')
+
+    def _ensure_ticker(self):
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._buffers.clear()
+            thread = threading.Thread(
+                target=self._run, name='exreporter-coalesce')
+            thread.daemon = True
+            thread.start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            time.sleep(self.tick)
+            self.flush(force=False)
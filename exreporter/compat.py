@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.compat
+~~~~~~~~~~~~~~~~~
+
+Python 2/3 compatibility helpers used across exreporter.
+
+"""
+
+import abc
+import time
+
+try:
+    import queue
+except ImportError:  # pragma: no cover
+    import Queue as queue  # noqa
+
+try:
+    monotonic = time.monotonic
+except AttributeError:  # pragma: no cover
+    monotonic = time.time
+
+# base class with the ``ABCMeta`` metaclass, ``abc.ABC`` on Python 3.4+
+ABC = abc.ABCMeta('ABC', (object, ), {'__slots__': ()})
+
+__all__ = ['queue', 'monotonic', 'ABC']
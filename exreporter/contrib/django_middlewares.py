@@ -11,30 +11,73 @@ Requires following Django settings to be present:
 - EXREPORTER_GITHUB_AUTH_TOKEN
 - EXREPORTER_GITHUB_LABELS
 
+Following Django settings are optional:
+- EXREPORTER_GITHUB_POOL_SIZE, default ``10``
+- EXREPORTER_GITHUB_KEEP_ALIVE, default ``True``
+- EXREPORTER_GITHUB_TIMEOUT, default ``10``
+- EXREPORTER_MAX_COMMENTS, default ``50``
+- EXREPORTER_TIME_DELTA, default ``10``
+- EXREPORTER_INCLUDE_LOCALS, default ``True``
+- EXREPORTER_DEDUP_PATH, default ``None``, path of a
+  :class:`exreporter.dedup.DedupTable` shared by the workers of the host
+
 :copyright: (c) 2014 by Vedarth Kulkarni.
 :license: MIT, see LICENSE for more details.
 
 """
 
+import threading
+
 from django.conf import settings
 from exreporter.credentials import GithubCredentials
+from exreporter.dedup import DedupTable
 from exreporter.stores import GithubStore
 from exreporter import ExReporter
 
 
 class ExreporterGithubMiddleware(object):
     """Exreporter middleware for Django framework.
+
+    The reporter, its store and the pooled HTTP session to Github are built
+    once per process, on the first reported exception.
     """
 
-    def process_exception(self, request, exception):
-        """Report exceptions from requests via Exreporter.
+    def __init__(self):
+        self._reporter = None
+        self._lock = threading.Lock()
+
+    @property
+    def reporter(self):
+        """Returns the reporter built from Django settings.
+        """
+        if self._reporter is None:
+            with self._lock:
+                if self._reporter is None:
+                    self._reporter = self.build_reporter()
+        return self._reporter
+
+    def build_reporter(self):
+        """Builds a reporter with a Github store from Django settings.
         """
         gc = GithubCredentials(
             user=settings.EXREPORTER_GITHUB_USER,
             repo=settings.EXREPORTER_GITHUB_REPO,
             auth_token=settings.EXREPORTER_GITHUB_AUTH_TOKEN)
-        gs = GithubStore(credentials=gc)
-        reporter = ExReporter(
-            store=gs, labels=settings.EXREPORTER_GITHUB_LABELS)
+        dedup_path = getattr(settings, 'EXREPORTER_DEDUP_PATH', None)
+        gs = GithubStore(
+            credentials=gc,
+            pool_size=getattr(settings, 'EXREPORTER_GITHUB_POOL_SIZE', 10),
+            keep_alive=getattr(settings, 'EXREPORTER_GITHUB_KEEP_ALIVE', True),
+            timeout=getattr(settings, 'EXREPORTER_GITHUB_TIMEOUT', 10),
+            dedup=DedupTable(path=dedup_path) if dedup_path else None)
+        return ExReporter(
+            store=gs, labels=settings.EXREPORTER_GITHUB_LABELS,
+            max_comments=getattr(settings, 'EXREPORTER_MAX_COMMENTS', 50),
+            time_delta=getattr(settings, 'EXREPORTER_TIME_DELTA', 10),
+            include_locals=getattr(
+                settings, 'EXREPORTER_INCLUDE_LOCALS', True))
 
-        reporter.report()
+    def process_exception(self, request, exception):
+        """Report exceptions from requests via Exreporter.
+        """
+        self.reporter.report(request=request)
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+from .stores.bitbucket import BitbucketCredentials
 from .stores.github import GithubCredentials
+from .stores.gitlab import GitlabCredentials
 
-__all__ = (GithubCredentials, )
+__all__ = (BitbucketCredentials, GithubCredentials, GitlabCredentials)
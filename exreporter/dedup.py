@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.dedup
+~~~~~~~~~~~~~~~~
+
+This module implements a host-local table, shared by the processes of a
+deployment, of the issue each culprit was reported on and of which process
+is creating the issue of a new culprit. It lets several workers hit by the
+same new bug create a single issue.
+
+Basic Usage:
+
+  >>> from exreporter.dedup import DedupTable
+  >>> gs = GithubStore(
+  ...     credentials=gc, dedup=DedupTable(path='/var/tmp/exreporter.dedup'))
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import os
+import json
+import time
+import threading
+
+from ._sqlite import Database
+from .compat import monotonic
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS issues (
+    culprit TEXT PRIMARY KEY,
+    issue TEXT,
+    indexed_at REAL NOT NULL DEFAULT 0,
+    claimed_until REAL NOT NULL DEFAULT 0,
+    owner TEXT
+) WITHOUT ROWID
+'''
+
+
+class DedupTable(object):
+    """Culprit to issue table stored in a SQLite database in WAL mode.
+
+    Lookups are a primary key read on a connection kept open per process.
+    A process about to create the issue of a culprit first claims it; the
+    other processes wait up to ``max_wait`` seconds for the issue to be
+    indexed and attach to it. A claim expires after ``claim_timeout``
+    seconds, so a crashed creator does not block the culprit forever.
+    """
+
+    def __init__(self, path, ttl=300, claim_timeout=30, poll=0.05,
+                 max_wait=0.25):
+        '''Initializes the table, the database is created on first use.
+
+        :params path: path of the SQLite database file, shared by the processes
+        :params ttl: (optional) seconds after which an indexed issue is looked up
+            on Github again, default value is ``300``
+        :params claim_timeout: (optional) seconds after which a claim expires,
+            default value is ``30``
+        :params poll: (optional) seconds between checks while another process
+            holds the claim of a culprit
+        :params max_wait: (optional) seconds :meth:`wait` waits for another process
+            to index the issue of a culprit, default value is ``0.25``
+        '''
+        self.path = path
+        self.ttl = ttl
+        self.claim_timeout = claim_timeout
+        self.poll = poll
+        self.max_wait = max_wait
+
+        self._lock = threading.Lock()
+        self._database = Database(path, SCHEMA)
+
+    @property
+    def owner(self):
+        return '{}:{}'.format(os.getpid(), id(self))
+
+    def get(self, culprit):
+        """Returns the indexed issue attributes for ``culprit`` or ``None``.
+
+        :rtype: `dict`
+        """
+        with self._lock:
+            row = self._database.connect().execute(
+                'SELECT issue, indexed_at FROM issues WHERE culprit = ?',
+                (culprit,)).fetchone()
+        if row is not None and row[0] is not None and\
+                row[1] + self.ttl > time.time():
+            return json.loads(row[0])
+
+    def put(self, culprit, issue):
+        """Indexes ``issue`` under ``culprit`` and releases its claim.
+
+        :params issue: `dict` of issue attributes
+        """
+        with self._lock:
+            self._database.connect().execute(
+                'INSERT INTO issues (culprit, issue, indexed_at) '
+                'VALUES (?, ?, ?) ON CONFLICT (culprit) DO UPDATE SET '
+                'issue = excluded.issue, indexed_at = excluded.indexed_at, '
+                'claimed_until = 0, owner = NULL',
+                (culprit, json.dumps(issue), time.time()))
+
+    def invalidate(self, culprit):
+        """Forgets the issue indexed under ``culprit``.
+        """
+        with self._lock:
+            self._database.connect().execute(
+                'UPDATE issues SET issue = NULL WHERE culprit = ?',
+                (culprit,))
+
+    def claim(self, culprit):
+        """Claims the creation of the issue of ``culprit``.
+
+        :returns: tuple of whether the claim was granted and the indexed issue
+            attributes, if another process already indexed one
+        :rtype: `tuple`
+        """
+        now = time.time()
+        owner = self.owner
+
+        with self._lock:
+            connection = self._database.connect()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                result = self._claim(connection, culprit, now, owner)
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+        return result
+
+    def wait(self, culprit):
+        """Claims ``culprit``, waiting up to ``max_wait`` seconds while another
+        process holds its claim.
+
+        :returns: see :meth:`claim`, ``(False, None)`` when the other process
+            did not index the issue in time
+        :rtype: `tuple`
+        """
+        deadline = monotonic() + self.max_wait
+        claimed, issue = self.claim(culprit)
+        while not claimed and issue is None and monotonic() < deadline:
+            time.sleep(self.poll)
+            claimed, issue = self.claim(culprit)
+        return claimed, issue
+
+    def release(self, culprit):
+        """Gives up the claim of ``culprit`` held by this process.
+        """
+        with self._lock:
+            self._database.connect().execute(
+                'UPDATE issues SET claimed_until = 0, owner = NULL '
+                'WHERE culprit = ? AND owner = ?', (culprit, self.owner))
+
+    def _claim(self, connection, culprit, now, owner):
+        row = connection.execute(
+            'SELECT issue, indexed_at, claimed_until, owner '
+            'FROM issues WHERE culprit = ?', (culprit,)).fetchone()
+        if row is not None and row[0] is not None and\
+                row[1] + self.ttl > now:
+            return False, json.loads(row[0])
+        if row is not None and row[2] > now and row[3] != owner:
+            return False, None
+        connection.execute(
+            'INSERT INTO issues (culprit, claimed_until, owner) '
+            'VALUES (?, ?, ?) ON CONFLICT (culprit) DO UPDATE SET '
+            'claimed_until = excluded.claimed_until, '
+            'owner = excluded.owner',
+            (culprit, now + self.claim_timeout, owner))
+        return True, None
+
+    def close(self):
+        with self._lock:
+            self._database.close()
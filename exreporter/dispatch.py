@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.dispatch
+~~~~~~~~~~~~~~~~~~~
+
+This module implements a bounded, in-process background dispatcher used to
+move store I/O off the thread that reported the exception.
+
+Basic Usage:
+
+  >>> from exreporter.dispatch import BackgroundDispatcher
+  >>> dispatcher = BackgroundDispatcher(max_size=500, workers=2)
+  >>> reporter = ExReporter(store=gs, dispatcher=dispatcher)
+  >>> reporter.report()  # returns as soon as the report is queued
+  >>> dispatcher.flush(timeout=5)
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import os
+import logging
+import threading
+
+from .compat import queue, monotonic
+
+
+logger = logging.getLogger(__name__)
+
+DROP_OLDEST = 'drop-oldest'
+DROP_NEWEST = 'drop-newest'
+BLOCK = 'block'
+
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+
+class BackgroundDispatcher(object):
+    """Bounded queue drained by daemon worker threads.
+
+    Workers are started lazily on the first :meth:`submit` and restarted
+    after a fork, so a dispatcher can be created at import time in
+    pre-forking servers.
+    """
+
+    def __init__(self, max_size=1000, workers=1, overflow=DROP_OLDEST,
+                 block_timeout=None):
+        '''Initializes the dispatcher.
+
+        :params max_size: (optional) maximum number of pending jobs, default value is ``1000``
+        :params workers: (optional) number of worker threads, default value is ``1``
+        :params overflow: (optional) what to do when the queue is full, one of
+            ``'drop-oldest'``, ``'drop-newest'`` or ``'block'``
+        :params block_timeout: (optional) seconds to wait for a free slot with the
+            ``'block'`` policy before dropping the job, ``None`` waits forever
+        '''
+        assert overflow in OVERFLOW_POLICIES,\
+            'Unknown overflow policy {}'.format(overflow)
+        assert workers > 0, 'At least one worker is required'
+
+        self.max_size = max_size
+        self.workers = workers
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.dropped = 0
+
+        self._queue = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._threads = []
+        self._pid = None
+
+    @property
+    def pending(self):
+        """Returns the approximate number of queued jobs.
+        """
+        return self._queue.qsize()
+
+    def submit(self, func, *args, **kwargs):
+        """Queues ``func(*args, **kwargs)`` to be run on a worker thread.
+
+        :returns: ``True`` if the job was queued, ``False`` if it was dropped
+        :rtype: `bool`
+        """
+        self._ensure_workers()
+        job = (func, args, kwargs)
+
+        if self.overflow == BLOCK:
+            try:
+                self._queue.put(job, timeout=self.block_timeout)
+                return True
+            except queue.Full:
+                return self._drop()
+
+        while True:
+            try:
+                self._queue.put_nowait(job)
+                return True
+            except queue.Full:
+                if self.overflow == DROP_NEWEST:
+                    return self._drop()
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                continue
+            self._queue.task_done()
+            self._drop()
+
+    def flush(self, timeout=None):
+        """Waits until every queued job has been processed.
+
+        :params timeout: (optional) maximum number of seconds to wait
+        :returns: ``True`` if the queue was drained, ``False`` on timeout
+        :rtype: `bool`
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+        condition = self._queue.all_tasks_done
+
+        with condition:
+            while self._queue.unfinished_tasks:
+                if deadline is None:
+                    condition.wait()
+                    continue
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    return False
+                condition.wait(remaining)
+        return True
+
+    def _drop(self):
+        with self._lock:
+            self.dropped += 1
+        return False
+
+    def _ensure_workers(self):
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._threads = []
+            for index in range(self.workers):
+                thread = threading.Thread(
+                    target=self._work,
+                    name='exreporter-dispatch-{}'.format(index))
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+            self._pid = os.getpid()
+
+    def _work(self):
+        while True:
+            func, args, kwargs = self._queue.get()
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                logger.exception('Exreporter failed to dispatch a report')
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.fingerprint
+~~~~~~~~~~~~~~~~~~~~~~
+
+This module implements stable exception fingerprints used to group
+occurrences. A fingerprint hashes the exception type and the normalized
+frames of the traceback, i.e. import relative file paths and function names
+but no line numbers, so it survives deploys and differing install paths.
+
+Basic Usage:
+
+  >>> from exreporter.fingerprint import Fingerprinter
+  >>> reporter = ExReporter(store=gs, fingerprinter=Fingerprinter())
+
+Any callable taking a :class:`exreporter.stack_trace.StackTrace` and
+returning a string can be used as a fingerprinter.
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import os
+import re
+import sys
+import hashlib
+
+from .cache import LRUCache
+from .stack_trace import default_in_app
+
+
+MESSAGE_PATTERNS = (
+    (re.compile(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-'
+                r'[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'), '<uuid>'),
+    (re.compile(r'0x[0-9a-fA-F]+'), '<hex>'),
+    (re.compile(r'\b[0-9a-fA-F]{16,}\b'), '<id>'),
+    (re.compile(r'\d+'), '<n>'),
+)
+
+
+def normalize_message(message):
+    """Returns ``message`` with uuids, addresses, ids and numbers replaced.
+    """
+    for pattern, replacement in MESSAGE_PATTERNS:
+        message = pattern.sub(replacement, message)
+    return message
+
+
+def relative_path(filepath, paths=None):
+    """Returns ``filepath`` relative to the longest matching import path.
+    """
+    for path in sorted(paths or sys.path, key=len, reverse=True):
+        path = path.rstrip(os.sep)
+        if path and filepath.startswith(path + os.sep):
+            return filepath[len(path) + 1:]
+    return os.path.basename(filepath)
+
+
+class Fingerprinter(object):
+    """Default fingerprint callable.
+
+    Only frames considered in the application take part in the fingerprint,
+    or every frame when there is none. Normalized frames are cached per code
+    object, so a repeating traceback costs a dict lookup per frame plus one
+    hash.
+    """
+
+    def __init__(self, include_message=False, in_app=None, cache_size=4096):
+        '''Initializes the fingerprinter.
+
+        :params include_message: (optional) boolean specifying whether the
+            normalized exception message is part of the fingerprint
+        :params in_app: (optional) callable deciding whether a file path belongs to the application,
+            default: :func:`exreporter.stack_trace.default_in_app`
+        :params cache_size: (optional) number of code objects whose normalized frame is cached
+        '''
+        self.include_message = include_message
+        self.in_app = in_app or default_in_app
+        self._frames = LRUCache(max_size=cache_size)
+
+    def __call__(self, trace_info):
+        """Returns the fingerprint of ``trace_info``.
+
+        :params trace_info: object of :class:`exreporter.stack_trace.StackTrace`
+        :rtype: `str`
+        """
+        exception = trace_info.exception
+        parts = ['{}.{}'.format(exception.__module__, exception.__name__)]
+
+        frames, app_frames = [], []
+        trace = trace_info.traceback
+        while trace is not None:
+            frame = self._frame(trace.tb_frame.f_code)
+            frames.append(frame[0])
+            if frame[1]:
+                app_frames.append(frame[0])
+            trace = trace.tb_next
+        parts.extend(app_frames or frames)
+
+        if self.include_message:
+            parts.append(normalize_message(
+                '{}'.format(trace_info.exception_value)))
+
+        return hashlib.sha1(
+            '\n'.join(parts).encode('utf-8')).hexdigest()
+
+    def _frame(self, code):
+        frame = self._frames.get(code)
+        if frame is None:
+            frame = ('{}:{}'.format(
+                relative_path(code.co_filename), code.co_name),
+                self.in_app(code.co_filename))
+            self._frames.set(code, frame)
+        return frame
@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 
+import time
+
 
 class Formats(object):
 
     culprit = "`Culprit- {filepath}>{lineno}>{exception}`"
 
+    fingerprint = "`Fingerprint- {fingerprint}`"
+
     title = "{exception} - {filename}::{method_name}"
 
     body = """
@@ -22,6 +26,11 @@ Locals:
 
 """
 
+    extra_content = """
+
+Extra Content:
+{extra_content}"""
+
     request_data = """
 Request Data:
 
@@ -29,3 +38,52 @@ Request Data:
 {request_data}
 ```
 """
+
+    suppressed = """
+
+{count} more occurrence(s) were suppressed since the last report.
+"""
+
+    log_record = "{levelname} logged by {name}: {message}"
+
+    batched = """
+
+{count} more occurrence(s) in the same batch.
+"""
+
+    promoted = """
+
+{count} occurrence(s) recorded between {first_seen} and {last_seen}.
+"""
+
+    coalesced = """
+{count} occurrence(s) between {first_seen} and {last_seen}.
+
+Messages:
+{messages}
+"""
+
+    truncated = "\n... {count} characters truncated ...\n"
+
+    digest_title = "Exception storm digest"
+
+    digest_culprit = "`Culprit- exception storm digest`"
+
+    digest = """
+Exception storm: {count} occurrence(s) of {culprits} culprit(s) between {start} and {end}.
+
+| Occurrences | Culprit |
+| ---: | --- |
+{rows}
+
+{culprit}
+"""
+
+    digest_row = "| {count} | {culprit} |"
+
+
+def format_time(timestamp):
+    """Returns seconds since the epoch as an ISO 8601 UTC timestamp, eg:
+    ``'2014-12-11T10:00:00Z'``, as shown in issue bodies.
+    """
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(timestamp))
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.handler
+~~~~~~~~~~~~~~~~~~
+
+This module implements a :mod:`logging` handler reporting the exceptions of
+log records, eg: of ``logger.exception(...)``. The handler only queues the
+records; a listener thread reports them, so logging never waits for the
+store. The module requires Python 3.2 or later, for
+:class:`logging.handlers.QueueHandler`.
+
+Basic Usage:
+
+  >>> import logging
+  >>> from exreporter.handler import ExReporterHandler
+  >>> logging.getLogger().addHandler(ExReporterHandler(reporter))
+  >>> try:
+  ...     1 / 0
+  ... except ZeroDivisionError:
+  ...     logging.getLogger(__name__).exception('Division failed')
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import os
+import copy
+import logging
+import threading
+
+try:
+    from logging.handlers import QueueHandler, QueueListener
+except ImportError:  # pragma: no cover
+    raise ImportError('exreporter.handler requires Python 3.2 or later')
+
+from .compat import queue
+from .formats import Formats
+
+
+class ExReporterHandler(QueueHandler):
+    """Handler queueing the log records carrying exception info.
+
+    Records without exception info, and records of the ``exreporter``
+    loggers, are ignored. When ``max_size`` records are pending, further
+    ones are dropped and counted in ``dropped``. The listener thread is
+    started on the first record, and restarted after a fork.
+    """
+
+    def __init__(self, reporter, level=logging.ERROR, max_size=1000,
+                 close_timeout=5):
+        '''Initializes the handler.
+
+        :params reporter: object of :class:`exreporter.reporter.Reporter` reporting the records
+        :params level: (optional) minimum level of the records reported, default ``logging.ERROR``
+        :params max_size: (optional) maximum number of pending records, default value is ``1000``
+        :params close_timeout: (optional) seconds :meth:`close` waits for the pending
+            records to be reported, default value is ``5``
+        '''
+        QueueHandler.__init__(self, queue.Queue(maxsize=max_size))
+        self.setLevel(level)
+        self.reporter = reporter
+        self.close_timeout = close_timeout
+        self.dropped = 0
+        self.listener = None
+
+        self._pid = None
+        self._listener_lock = threading.Lock()
+
+    def emit(self, record):
+        if not record.exc_info or record.exc_info[0] is None or\
+                record.name.split('.', 1)[0] == 'exreporter':
+            return
+        self._ensure_listener()
+        QueueHandler.emit(self, record)
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._listener_lock:
+                self.dropped += 1
+
+    def prepare(self, record):
+        """Returns a copy of ``record`` with its message merged with its
+        arguments. Unlike :meth:`logging.handlers.QueueHandler.prepare`, the
+        exception info is kept for the listener.
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        return record
+
+    def stop(self, timeout=None):
+        """Reports the pending records and stops the listener thread.
+
+        :params timeout: (optional) maximum number of seconds to wait, ``None``
+            waits for every pending record
+        """
+        with self._listener_lock:
+            listener, self.listener, self._pid = self.listener, None, None
+        if listener is not None:
+            listener.stop(timeout)
+
+    def close(self):
+        """Reports the pending records, waiting up to ``close_timeout``
+        seconds, and closes the handler. Called by :func:`logging.shutdown`
+        at exit, the listener thread being a daemon.
+        """
+        self.stop(self.close_timeout)
+        QueueHandler.close(self)
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+
+        with self._listener_lock:
+            if self._pid == os.getpid():
+                return
+            self.listener = _Listener(
+                self.queue, ReportingHandler(self.reporter))
+            self.listener.start()
+            self._pid = os.getpid()
+
+
+class _Listener(QueueListener):
+
+    def stop(self, timeout=None):
+        # waits for a free slot, the queue may be full of pending records
+        try:
+            self.queue.put(self._sentinel, timeout=timeout)
+        except queue.Full:
+            pass
+        else:
+            self._thread.join(timeout)
+        self._thread = None
+
+
+class ReportingHandler(logging.Handler):
+    """Handler reporting log records on the calling thread, used by the
+    listener of :class:`ExReporterHandler`.
+
+    The log message is added to the issue body, and the ``request``
+    attribute set on records by Django is reported as request data.
+    """
+
+    def __init__(self, reporter, level=logging.NOTSET):
+        logging.Handler.__init__(self, level)
+        self.reporter = reporter
+
+    def emit(self, record):
+        try:
+            self.reporter.report(
+                exc_info=record.exc_info,
+                extra_content=Formats.log_record.format(
+                    levelname=record.levelname, name=record.name,
+                    message=record.getMessage()),
+                request=getattr(record, 'request', None))
+        except Exception:
+            self.handleError(record)
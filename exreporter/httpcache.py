@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.httpcache
+~~~~~~~~~~~~~~~~~~~~
+
+This module implements a cache of Github API responses for conditional
+requests. The ``ETag`` and ``Last-Modified`` headers of a response are kept
+with its parsed JSON, sent back as ``If-None-Match`` and
+``If-Modified-Since``, and the cached JSON is reused when Github answers
+``304 Not Modified``, which does not count against the rate limit.
+
+Basic Usage:
+
+  >>> from exreporter.httpcache import ResponseCache
+  >>> gs = GithubStore(credentials=gc, response_cache=ResponseCache(
+  ...     max_size=256, path='/var/tmp/exreporter.responses'))
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import json
+import time
+import threading
+
+from ._sqlite import Database
+from .cache import LRUCache
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    payload TEXT NOT NULL,
+    written_at REAL NOT NULL
+) WITHOUT ROWID
+'''
+
+
+class ResponseCache(object):
+    """Bounded URL to validators and payload mapping.
+
+    Entries live in an in-memory LRU cache of ``max_size`` URLs. When
+    ``path`` is given they are also written to a SQLite database, so that a
+    restarted process starts with warm validators; the database keeps the
+    ``max_size`` most recently written URLs.
+    """
+
+    def __init__(self, max_size=256, path=None, prune_every=64):
+        '''Initializes the cache, the database is created on first use.
+
+        :params max_size: (optional) maximum number of URLs kept, default value is ``256``
+        :params path: (optional) path of the SQLite database backing the cache,
+            ``None`` keeps it in memory only
+        :params prune_every: (optional) number of writes between two evictions
+            from the database
+        '''
+        self.max_size = max_size
+        self.path = path
+        self.prune_every = prune_every
+
+        self._entries = LRUCache(max_size=max_size)
+        self._lock = threading.Lock()
+        self._database = Database(path, SCHEMA)
+        self._writes = 0
+
+    def get(self, url):
+        """Returns the tuple of ``(etag, last_modified, payload)`` cached for
+        ``url`` or ``None``.
+
+        :rtype: `tuple`
+        """
+        entry = self._entries.get(url)
+        if entry is not None or self.path is None:
+            return entry
+
+        with self._lock:
+            row = self._database.connect().execute(
+                'SELECT etag, last_modified, payload FROM responses '
+                'WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return None
+        entry = (row[0], row[1], json.loads(row[2]))
+        self._entries.set(url, entry)
+        return entry
+
+    def headers(self, url):
+        """Returns the conditional request headers for ``url``.
+
+        :rtype: `dict`
+        """
+        entry = self.get(url)
+        headers = {}
+        if entry is not None:
+            if entry[0]:
+                headers['If-None-Match'] = entry[0]
+            if entry[1]:
+                headers['If-Modified-Since'] = entry[1]
+        return headers
+
+    def set(self, url, etag, last_modified, payload):
+        """Caches ``payload`` for ``url`` if the response had a validator.
+        """
+        if not etag and not last_modified:
+            return
+        self._entries.set(url, (etag, last_modified, payload))
+        if self.path is None:
+            return
+
+        with self._lock:
+            connection = self._database.connect()
+            connection.execute(
+                'INSERT OR REPLACE INTO responses '
+                '(url, etag, last_modified, payload, written_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (url, etag, last_modified, json.dumps(payload), time.time()))
+            self._writes += 1
+            if self._writes % self.prune_every == 0:
+                connection.execute(
+                    'DELETE FROM responses WHERE url NOT IN ('
+                    'SELECT url FROM responses ORDER BY written_at DESC '
+                    'LIMIT ?)', (self.max_size,))
+
+    def invalidate(self, url):
+        """Forgets the response cached for ``url``.
+        """
+        self._entries.pop(url)
+        if self.path is None:
+            return
+        with self._lock:
+            self._database.connect().execute(
+                'DELETE FROM responses WHERE url = ?', (url,))
+
+    def close(self):
+        with self._lock:
+            self._database.close()
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.metrics
+~~~~~~~~~~~~~~~~~~
+
+This module implements metrics of exreporter: time spent per stage of a
+report, counts of reports, suppressed reports and API calls, and queue
+depth. Reporters and stores send them to a hook, any object with the
+``increment``, ``timing`` and ``gauge`` methods of :class:`MetricsRegistry`.
+Without a hook, nothing is measured.
+
+Basic Usage:
+
+  >>> from exreporter.metrics import MetricsRegistry
+  >>> metrics = MetricsRegistry()
+  >>> gs = GithubStore(credentials=gc, metrics=metrics)
+  >>> reporter = ExReporter(store=gs, metrics=metrics)
+  >>> print(metrics.render_prometheus())
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import socket
+import logging
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+def _key(name, tags):
+    return name, tuple(sorted(
+        (tag, '{}'.format(value)) for tag, value in tags.items()))
+
+
+class MetricsRegistry(object):
+    """In-memory counters, timers and gauges.
+
+    Timers keep the number of measurements and their sum, in seconds.
+    """
+
+    def __init__(self, prefix='exreporter'):
+        self.prefix = prefix
+        self.counters = {}
+        self.timers = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1, **tags):
+        """Adds ``value`` to the counter ``name``.
+        """
+        key = _key(name, tags)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def timing(self, name, seconds, **tags):
+        """Records a measurement of the timer ``name``.
+        """
+        key = _key(name, tags)
+        with self._lock:
+            timer = self.timers.setdefault(key, [0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+
+    def gauge(self, name, value, **tags):
+        """Sets the gauge ``name`` to ``value``.
+        """
+        with self._lock:
+            self.gauges[_key(name, tags)] = value
+
+    def counter(self, name, **tags):
+        """Returns the value of the counter ``name``.
+        """
+        return self.counters.get(_key(name, tags), 0)
+
+    def render_prometheus(self):
+        """Returns the metrics in the Prometheus text exposition format.
+
+        :rtype: `str`
+        """
+        with self._lock:
+            counters = sorted(self.counters.items())
+            timers = sorted(self.timers.items())
+            gauges = sorted(self.gauges.items())
+
+        lines = []
+        for kind, suffix, items in (('counter', '_total', counters),
+                                    ('gauge', '', gauges)):
+            for name, group in _grouped(items):
+                metric = '{}_{}{}'.format(self.prefix, name, suffix)
+                lines.append('# TYPE {} {}'.format(metric, kind))
+                lines.extend(
+                    '{}{} {}'.format(metric, _labels(tags), value)
+                    for tags, value in group)
+
+        for name, group in _grouped(timers):
+            metric = '{}_{}_seconds'.format(self.prefix, name)
+            lines.append('# TYPE {} summary'.format(metric))
+            for tags, (count, total) in group:
+                lines.append('{}_count{} {}'.format(
+                    metric, _labels(tags), count))
+                lines.append('{}_sum{} {!r}'.format(
+                    metric, _labels(tags), total))
+        return '\n'.join(lines) + '\n'
+
+
+class StatsdSink(object):
+    """Hook sending metrics to a statsd compatible server over UDP.
+
+    Tags are appended to the metric name, eg: ``exreporter.api_calls.search.200``.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8125, prefix='exreporter'):
+        self.address = (host, port)
+        self.prefix = prefix
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+
+    def increment(self, name, value=1, **tags):
+        self._send(name, tags, '{}|c'.format(value))
+
+    def timing(self, name, seconds, **tags):
+        self._send(name, tags, '{:.3f}|ms'.format(seconds * 1000))
+
+    def gauge(self, name, value, **tags):
+        self._send(name, tags, '{}|g'.format(value))
+
+    def _send(self, name, tags, value):
+        metric = '.'.join(
+            [self.prefix, name] + ['{}'.format(tags[tag])
+                                   for tag in sorted(tags)])
+        try:
+            self.socket.sendto(
+                '{}:{}'.format(metric, value).encode('utf-8'), self.address)
+        except (IOError, OSError):
+            logger.debug('Exreporter failed to send a metric', exc_info=True)
+
+
+def _grouped(items):
+    groups = []
+    for (name, tags), value in items:
+        if not groups or groups[-1][0] != name:
+            groups.append((name, []))
+        groups[-1][1].append((tags, value))
+    return groups
+
+
+def _labels(tags):
+    if not tags:
+        return ''
+    return '{{{}}}'.format(','.join(
+        '{}="{}"'.format(key, '{}'.format(value).replace('"', '\\"'))
+        for key, value in tags))
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.ratelimit
+~~~~~~~~~~~~~~~~~~~~
+
+This module implements request budgets derived from the ``X-RateLimit-*``
+and ``Retry-After`` response headers, used by stores to schedule requests
+within the rate limits of an API instead of failing once they are hit.
+
+Basic Usage:
+
+  >>> from exreporter.ratelimit import RateLimitBucket
+  >>> bucket = RateLimitBucket()
+  >>> bucket.update(response.headers)
+  >>> bucket.delay()  # seconds to wait before the next request
+  0
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import time
+import random
+import threading
+
+
+class RateLimitBucket(object):
+    """Token bucket holding the requests left to one API resource.
+
+    The tokens are the remaining requests reported in the
+    ``X-RateLimit-Remaining`` header, refilled to ``X-RateLimit-Limit`` when
+    the window resets at ``X-RateLimit-Reset``. Between responses a token is
+    taken for each request sent. The bucket can also be blocked for a while,
+    eg: after a ``Retry-After`` header or a server error.
+    """
+
+    def __init__(self):
+        self.limit = None
+        self.remaining = None
+        self.reset_at = 0
+        self.blocked_until = 0
+        self._lock = threading.Lock()
+
+    def delay(self, now=None):
+        """Returns the number of seconds to wait before the next request.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            if self.remaining is not None and self.remaining <= 0 and\
+                    now >= self.reset_at:
+                self.remaining = self.limit
+            wait = self.blocked_until - now
+            if self.remaining is not None and self.remaining <= 0:
+                wait = max(wait, self.reset_at - now)
+        return max(wait, 0)
+
+    def take(self):
+        """Takes a token for a request about to be sent.
+        """
+        with self._lock:
+            if self.remaining is not None:
+                self.remaining -= 1
+
+    def update(self, headers):
+        """Updates the budget from the headers of a response.
+        """
+        if 'X-RateLimit-Remaining' not in headers:
+            return
+        with self._lock:
+            self.remaining = int(headers['X-RateLimit-Remaining'])
+            if 'X-RateLimit-Limit' in headers:
+                self.limit = int(headers['X-RateLimit-Limit'])
+            if 'X-RateLimit-Reset' in headers:
+                self.reset_at = int(headers['X-RateLimit-Reset'])
+
+    def block(self, seconds):
+        """Allows no request for the next ``seconds`` seconds.
+        """
+        with self._lock:
+            self.blocked_until = max(
+                self.blocked_until, time.time() + seconds)
+
+
+def retry_after(headers, attempt, backoff=1.0, max_backoff=60):
+    """Returns the seconds to wait before retrying a failed request.
+
+    Honours the ``Retry-After`` header, otherwise backs off exponentially
+    with jitter.
+
+    :params attempt: number of the failed attempt, starting at ``0``
+    """
+    if 'Retry-After' in headers:
+        try:
+            return float(headers['Retry-After'])
+        except ValueError:
+            pass
+    delay = min(max_backoff, backoff * 2 ** attempt)
+    return delay * random.uniform(0.5, 1.0)
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.render
+~~~~~~~~~~~~~~~~~
+
+This module implements size budgeted rendering of issue bodies. Github
+rejects issue bodies longer than 65536 characters, so sections are capped
+and, when the body is still too long, trimmed in priority order: request
+data and locals go first, the culprit and the innermost frames of the stack
+trace are never dropped. The exception message is capped on its own, so a
+long message does not push the frames out of the body.
+
+Basic Usage:
+
+  >>> from exreporter.render import BodyRenderer
+  >>> reporter = ExReporter(
+  ...     store=gs, renderer=BodyRenderer(max_length=30000))
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+from .formats import Formats
+
+
+GITHUB_BODY_LIMIT = 65536
+
+TRIM_ORDER = ('request', 'locals', 'extra', 'trace')
+
+CAPS = {
+    'message': 4096,
+    'locals': 16384,
+    'request': 8192,
+    'extra': 16384,
+}
+
+
+class BodyRenderer(object):
+    """Renders issue bodies from sections within a character budget.
+
+    A section is a tuple of its name, a prefix, a format string, the name of
+    the format string's field and the content filling it. Sections whose
+    name is not in ``trim_order`` are never trimmed. The ``trace`` section
+    keeps its last ``keep_trace`` characters, holding the innermost frames
+    and the exception.
+    """
+
+    def __init__(self, max_length=GITHUB_BODY_LIMIT - 4096, caps=None,
+                 trim_order=TRIM_ORDER, keep_trace=8192):
+        '''Initializes the renderer.
+
+        :params max_length: (optional) maximum number of characters of a body, default
+            leaves 4096 characters of Github's limit for coalesced summaries
+        :params caps: (optional) dict of maximum number of characters per section,
+            default caps the exception ``message``, ``locals``, ``request`` and ``extra``
+        :params trim_order: (optional) names of the sections trimmed when the body is
+            too long, first trimmed first
+        :params keep_trace: (optional) number of characters of the stack trace never
+            trimmed, default value is ``8192``
+        '''
+        self.max_length = max_length
+        self.caps = CAPS if caps is None else caps
+        self.trim_order = trim_order
+        self.keep_trace = keep_trace
+
+    def render(self, sections):
+        """Returns the body made of ``sections``, in one join.
+
+        :rtype: `str`
+        """
+        parts = []
+        total = 0
+
+        for name, prefix, template, field, content in sections:
+            content = '{}'.format(content)
+            cap = self.caps.get(name)
+            if cap is not None:
+                content = self.trim(name, content, cap)
+            overhead = len(prefix) + len(
+                '{}'.format(template.format(**{field: ''})))
+            parts.append([name, prefix, template, field, content])
+            total += overhead + len(content)
+
+        excess = total - self.max_length
+        for name in self.trim_order:
+            if excess <= 0:
+                break
+            keep = self.keep_trace if name == 'trace' else 0
+            for part in parts:
+                if part[0] != name or len(part[4]) <= keep or excess <= 0:
+                    continue
+                length = len(part[4])
+                part[4] = self.trim(
+                    name, part[4], max(keep, length - excess))
+                excess -= length - len(part[4])
+
+        return ''.join(
+            '{}{}'.format(prefix, template.format(**{field: content}))
+            for _, prefix, template, field, content in parts)
+
+    def trace(self, frames, message):
+        """Returns the content of the ``trace`` section made of the formatted
+        ``frames`` and the exception ``message``, cut to the ``message`` cap.
+
+        :rtype: `str`
+        """
+        cap = self.caps.get('message')
+        if cap is not None:
+            message = self.trim('message', message, cap)
+        return '{}{}'.format(frames, message)
+
+    def trim(self, name, content, length):
+        """Returns ``content`` cut to at most ``length`` characters, marking
+        the cut. The stack trace keeps its end, other sections their start.
+
+        :rtype: `str`
+        """
+        if len(content) <= length:
+            return content
+
+        keep = max(length - len(
+            Formats.truncated.format(count=len(content))), 0)
+        marker = Formats.truncated.format(count=len(content) - keep)
+        if name == 'trace':
+            return '{}{}'.format(marker, content[len(content) - keep:])
+        return '{}{}'.format(content[:keep], marker)
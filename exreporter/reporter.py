@@ -1,15 +1,31 @@
 # -*- coding: utf-8 -*-
 
 import os
+import time
+import logging
 
+from .compat import monotonic
 from .formats import Formats
+from .render import BodyRenderer
+from .snapshot import RequestSnapshot
 from .stack_trace import StackTrace
+from .stores.base import RateLimitExceeded
+
+
+logger = logging.getLogger(__name__)
+
+# seconds a dispatcher worker waits for a rate limit before retrying once
+MAX_DISPATCH_WAIT = 60
 
 
 class Reporter(object):
 
     def __init__(self, store, max_comments=50,
-                 time_delta=10, include_locals=True, labels=['Bugs']):
+                 time_delta=10, include_locals=True, labels=['Bugs'],
+                 dispatcher=None, cooldown=None, coalescer=None,
+                 safe_repr=None, in_app=None, fingerprinter=None, spool=None,
+                 renderer=None, sampler=None, storm=None, metrics=None,
+                 snapshot=None):
         '''Initialize reporter object with issue attributes and other settings.
 
         :params store: object of store eg: 'stores.github.GithubStore'
@@ -20,15 +36,218 @@ class Reporter(object):
         :params time_delta: (optional) specifies minimum time interval after which issue should be reported if the exceptions occurs multiple times
         :params include_locals: (optional) boolean specifying whether dump of ``locals`` should be included in issue body
         :params labels: (optional) list of labels that are to be applied to the issue, default: ``['Bug']``
+        :params dispatcher: (optional) object of :class:`exreporter.dispatch.BackgroundDispatcher`, when given
+            :meth:`report` only renders the issue and hands the store call over to the dispatcher
+        :params cooldown: (optional) object of :class:`exreporter.throttle.CooldownGate`, when given
+            occurrences of a culprit within ``time_delta`` seconds of the last report are dropped
+            before touching the store
+        :params coalescer: (optional) object of :class:`exreporter.coalesce.Coalescer`, when given
+            occurrences are buffered per culprit and reported as one summary per window
+        :params safe_repr: (optional) object of :class:`exreporter.saferepr.SafeRepr` bounding the dump of ``locals``
+        :params in_app: (optional) callable deciding whether a file path belongs to the application,
+            see :class:`exreporter.stack_trace.StackTrace`
+        :params fingerprinter: (optional) callable taking a :class:`exreporter.stack_trace.StackTrace` and
+            returning a string, eg: :class:`exreporter.fingerprint.Fingerprinter`, when given occurrences
+            are grouped by fingerprint instead of file path, line number and exception
+        :params spool: (optional) object of :class:`exreporter.spool.Spool`, when given rendered issues
+            are written to disk and delivered to the store by the spool's drainer, with retries
+        :params renderer: (optional) object of :class:`exreporter.render.BodyRenderer` keeping the
+            issue body within Github's size limit
+        :params sampler: (optional) object of :class:`exreporter.sampling.Sampler`, when given
+            occurrences it samples out are dropped before being rendered and counted in the next report
+        :params storm: (optional) object of :class:`exreporter.storm.StormDetector`, when given
+            occurrences are only counted while exceptions come in too fast, and reported in
+            periodic digests
+        :params metrics: (optional) metrics hook, eg: :class:`exreporter.metrics.MetricsRegistry`,
+            receiving stage timings and counts of reports and suppressed reports
+        :params snapshot: (optional) object of :class:`exreporter.snapshot.RequestSnapshot` bounding
+            the request data reported for the ``request`` keyword argument
         '''
         self.max_comments = max_comments
         self.time_delta = time_delta
         self.include_locals = include_locals
         self.labels = labels
         self.store = store
+        self.dispatcher = dispatcher
+        self.cooldown = cooldown
+        self.coalescer = coalescer
+        self.safe_repr = safe_repr
+        self.in_app = in_app
+        self.fingerprinter = fingerprinter
+        self.spool = spool
+        self.renderer = renderer or BodyRenderer()
+        self.sampler = sampler
+        self.storm = storm
+        self.metrics = metrics
+        self.snapshot = snapshot or RequestSnapshot()
+
+        if spool is not None:
+            spool.start(self.store.create_or_update_issue)
+        if coalescer is not None:
+            coalescer.start(self.deliver)
+        if storm is not None:
+            storm.start(self.deliver_digest)
+
+    def report(self, exc_info=None, **kwargs):
+        '''Reports the exception currently being handled to the store.
+
+        :params exc_info: (optional) tuple of the exception type, value and traceback
+            to report instead, eg: ``record.exc_info`` of a :class:`logging.LogRecord`
+
+        :returns: the issue returned by the store, or ``None`` when the
+            report was suppressed or handed over to the dispatcher
+        '''
+        metrics = self.metrics
+        if metrics is not None:
+            started = monotonic()
+
+        trace_info = StackTrace(
+            safe_repr=self.safe_repr, in_app=self.in_app,
+            fingerprinter=self.fingerprinter, exc_info=exc_info)
+        culprit = self.culprit(trace_info)
+        suppressed = sampled_out = 0
+
+        if metrics is not None:
+            metrics.timing('stage', monotonic() - started, stage='capture')
+            metrics.increment('reports')
+
+        if self.storm is not None and self.storm.add(culprit):
+            self._suppressed('storm')
+            return None
+
+        if self.sampler is not None:
+            allowed, sampled_out = self.sampler.sample(
+                culprit, trace_info.exception)
+            if not allowed:
+                self._suppressed('sampled')
+                return None
+
+        if self.cooldown is not None:
+            allowed, suppressed = self.cooldown.allow(
+                culprit, kwargs.get('time_delta', self.time_delta))
+            if not allowed:
+                if sampled_out:
+                    self.sampler.carry(culprit, sampled_out)
+                self._suppressed('cooldown')
+                return None
+
+        suppressed += sampled_out
+
+        # taken now, the request is gone when a coalesced report is rendered
+        if kwargs.get('request'):
+            kwargs['request'] = self.snapshot.capture(kwargs['request'])
+
+        if self.coalescer is not None:
+            self.coalescer.add(
+                culprit, message=trace_info.exception_value,
+                render=lambda: self.render(
+                    trace_info=trace_info, culprit=culprit,
+                    suppressed=suppressed, **kwargs))
+            self._suppressed('coalesced')
+            return None
+
+        issue = self.render(
+            trace_info=trace_info, culprit=culprit, suppressed=suppressed,
+            **kwargs)
+        return self.deliver(**issue)
+
+    def culprit(self, trace_info):
+        '''Returns the string used to aggregate occurrences of an exception.
+        '''
+        if self.fingerprinter is not None:
+            return Formats.fingerprint.format(
+                fingerprint=trace_info.fingerprint)
+        return Formats.culprit.format(
+            filepath=trace_info.filepath, lineno=trace_info.lineno,
+            exception=trace_info.exception.__name__)
+
+    def deliver(self, **issue):
+        '''Sends a rendered issue to the store, through the spool or the
+        dispatcher if any.
+
+        When the store is rate limited, spooled reports are retried by the
+        spool, dispatched ones once by the dispatcher's worker after the
+        rate limit allows it again. Reports sent on the calling thread are
+        dropped, logged and counted as suppressed.
+        '''
+        metrics = self.metrics
+        if metrics is not None:
+            started = monotonic()
+
+        if self.spool is not None:
+            self.spool.append(**issue)
+            result = None
+        elif self.dispatcher is not None:
+            self.dispatcher.submit(self._dispatched, **issue)
+            if metrics is not None:
+                metrics.gauge('queue_depth', self.dispatcher.pending)
+            result = None
+        else:
+            try:
+                result = self.store.create_or_update_issue(**issue)
+            except RateLimitExceeded as error:
+                self._rate_limited(error, issue)
+                result = None
+
+        if metrics is not None:
+            metrics.timing('stage', monotonic() - started, stage='deliver')
+        return result
+
+    def _dispatched(self, **issue):
+        try:
+            return self.store.create_or_update_issue(**issue)
+        except RateLimitExceeded as error:
+            if error.retry_after > MAX_DISPATCH_WAIT:
+                self._rate_limited(error, issue)
+                return None
+            time.sleep(error.retry_after)
+        try:
+            return self.store.create_or_update_issue(**issue)
+        except RateLimitExceeded as error:
+            self._rate_limited(error, issue)
+
+    def _rate_limited(self, error, issue):
+        logger.warning(
+            'Exreporter dropped a report of %s: %s', issue.get('culprit'),
+            error)
+        self._suppressed('rate-limited')
+
+    def _suppressed(self, reason):
+        if self.metrics is not None:
+            self.metrics.increment('suppressed', reason=reason)
+
+    def deliver_digest(self, title, body, culprit):
+        '''Sends a storm digest to the store, commenting on the previous
+        digest issue regardless of ``time_delta``.
+        '''
+        return self.deliver(
+            title=title, body=body, culprit=culprit,
+            max_comments=self.max_comments, time_delta=-1,
+            labels=self.labels)
+
+    def render(self, trace_info=None, culprit=None, suppressed=0, **kwargs):
+        '''Renders the keyword arguments for :meth:`create_or_update_issue`
+        of the store.
+
+        :params trace_info: (optional) object of :class:`exreporter.stack_trace.StackTrace`,
+            captured from the exception currently being handled when not given
+        :params culprit: (optional) culprit of ``trace_info``
+        :params suppressed: (optional) number of occurrences dropped since the last report
+        :returns: dict of ``title``, ``body``, ``culprit``, ``max_comments``,
+            ``time_delta`` and ``labels``
+        :rtype: `dict`
+        '''
+        metrics = self.metrics
+        if metrics is not None:
+            started = monotonic()
+
+        if trace_info is None:
+            trace_info = StackTrace(
+                safe_repr=self.safe_repr, in_app=self.in_app,
+                fingerprinter=self.fingerprinter)
+        if culprit is None:
+            culprit = self.culprit(trace_info)
 
-    def report(self, **kwargs):
-        trace_info = StackTrace()
         title_format = kwargs.pop('title_format', Formats.title)
         body_format = kwargs.pop('body_format', Formats.body)
 
@@ -37,42 +256,41 @@ class Reporter(object):
         include_locals = kwargs.get('include_locals', self.include_locals)
         labels = kwargs.get('labels', self.labels)
 
-        culprit = Formats.culprit.format(
-            filepath=trace_info.filepath, lineno=trace_info.lineno,
-            exception=trace_info.exception.__name__)
-
         title = title_format.format(
             exception=trace_info.exception.__name__,
             filename=os.path.basename(trace_info.filepath),
             method_name=trace_info.method_name)
 
-        body = "{}".format(
-            body_format.format(stack_trace=trace_info.stack_trace_text))
+        sections = [
+            ('trace', '', body_format, 'stack_trace',
+             self.renderer.trace(*trace_info.trace_parts))]
 
         if include_locals:
-            body = "{} {}".format(
-                body, Formats.locals_format.format(
-                    locals_data=trace_info.locals_data)
-            )
+            sections.append(
+                ('locals', ' ', Formats.locals_format, 'locals_data',
+                 trace_info.locals_text))
 
         extra_content = kwargs.pop('extra_content', '')
 
         if extra_content:
-            body = "{}\n\nExtra Content:\n{}".format(
-                body, extra_content
-            )
+            sections.append(
+                ('extra', '', Formats.extra_content, 'extra_content',
+                 extra_content))
 
         if kwargs.get('request'):
-            body = "{} {}".format(
-                body, Formats.request_data.format(
-                    request_data=str(kwargs.get('request'))
-                )
-            )
+            sections.append(
+                ('request', ' ', Formats.request_data, 'request_data',
+                 self.snapshot.capture(kwargs.get('request'))))
+
+        if suppressed:
+            sections.append(
+                ('suppressed', '', Formats.suppressed, 'count', suppressed))
 
-        body = """{}
+        sections.append(('culprit', '', '\n\n{culprit}\n', 'culprit', culprit))
+        body = self.renderer.render(sections)
 
-{}
-""".format(body, culprit)
-        return self.store.create_or_update_issue(
+        if metrics is not None:
+            metrics.timing('stage', monotonic() - started, stage='render')
+        return dict(
             title=title, body=body, culprit=culprit, max_comments=max_comments,
             time_delta=time_delta, labels=labels)
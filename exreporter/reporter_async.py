@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.reporter_async
+~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module implements a reporter for asyncio applications. The exception is
+captured and rendered synchronously, the store call is scheduled as a task
+on the running event loop.
+
+Basic Usage:
+
+  >>> from exreporter.reporter_async import AsyncReporter
+  >>> from exreporter.stores.github_async import AsyncGithubStore
+  >>> reporter = AsyncReporter(store=AsyncGithubStore(credentials=gc))
+  >>> reporter.report()  # returns as soon as the task is scheduled
+  >>> await reporter.close()
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import asyncio
+import logging
+
+from .reporter import Reporter
+
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncReporter(Reporter):
+    """Reporter delivering issues to an asyncio store without blocking the loop.
+
+    The store's ``create_or_update_issue`` must be a coroutine function, eg:
+    :class:`exreporter.stores.github_async.AsyncGithubStore`. At most
+    ``max_pending`` deliveries are scheduled at a time, further reports are
+    dropped and counted in ``dropped``. A dispatcher or a spool, whose
+    threads call the store synchronously, cannot be used.
+    """
+
+    def __init__(self, store, max_pending=1000, **kwargs):
+        '''Initializes the reporter, see :class:`exreporter.reporter.Reporter`
+        for the other arguments.
+
+        :params max_pending: (optional) maximum number of scheduled deliveries, default value is ``1000``
+        '''
+        assert kwargs.get('dispatcher') is None,\
+            'AsyncReporter schedules deliveries on the event loop'
+        assert kwargs.get('spool') is None,\
+            'AsyncReporter cannot replay spooled reports to an asyncio store'
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._tasks = set()
+        self._loop = None
+        super(AsyncReporter, self).__init__(store=store, **kwargs)
+
+    @property
+    def pending(self):
+        """Returns the number of scheduled deliveries not finished yet.
+        """
+        return len(self._tasks)
+
+    def deliver(self, **issue):
+        '''Schedules the store call on the event loop.
+
+        When called outside of the loop, eg: by the coalescer's thread, the
+        store call is handed over to the loop the reporter last ran on.
+
+        :returns: the scheduled task, or ``None`` when the report was dropped
+            or handed over from another thread
+        :rtype: :class:`asyncio.Task`
+        '''
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is None:
+            if self._loop is None or self._loop.is_closed():
+                self.dropped += 1
+                logger.warning(
+                    'Exreporter dropped a report, no event loop is running')
+                return None
+            self._loop.call_soon_threadsafe(self._schedule, issue)
+            return None
+
+        self._loop = loop
+        return self._schedule(issue)
+
+    def _schedule(self, issue):
+        if len(self._tasks) >= self.max_pending:
+            self.dropped += 1
+            return None
+        task = self._loop.create_task(self._deliver(issue))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _deliver(self, issue):
+        try:
+            return await self.store.create_or_update_issue(**issue)
+        except Exception:
+            logger.exception('Exreporter failed to deliver a report')
+
+    async def flush(self, timeout=None):
+        """Waits until every scheduled delivery has finished.
+
+        :params timeout: (optional) maximum number of seconds to wait
+        :returns: ``True`` if all deliveries finished, ``False`` on timeout
+        :rtype: `bool`
+        """
+        if not self._tasks:
+            return True
+        _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        return not pending
+
+    async def close(self, timeout=None):
+        """Flushes scheduled deliveries and closes the store.
+
+        :returns: ``True`` if all deliveries finished, ``False`` on timeout
+        :rtype: `bool`
+        """
+        flushed = await self.flush(timeout=timeout)
+        close = getattr(self.store, 'close', None)
+        if close is not None:
+            await close()
+        return flushed
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.saferepr
+~~~~~~~~~~~~~~~~~~~
+
+This module implements a bounded ``repr`` used to dump ``locals`` into
+issues. Strings are sliced before they are repr'd, containers are cut after
+a number of items and a depth, and the whole dump shares one character
+budget, so the cost stays predictable whatever the frame holds.
+
+Basic Usage:
+
+  >>> from exreporter.saferepr import SafeRepr
+  >>> SafeRepr(max_string=12).repr_locals({'data': 'x' * 1024})
+  "data = 'xxxxxxxx..."
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import uuid
+import decimal
+import datetime
+from itertools import islice
+
+try:
+    text_type = unicode
+except NameError:
+    text_type = str
+
+try:
+    integer_types = (int, long)
+except NameError:
+    integer_types = (int, )
+
+
+CONTAINER_TYPES = (dict, list, tuple, set, frozenset)
+
+SAFE_TYPES = (
+    bool, float, complex, datetime.date, datetime.time, datetime.timedelta,
+    decimal.Decimal, uuid.UUID) + integer_types
+
+
+class SafeRepr(object):
+    """Bounded and exception safe ``repr``.
+
+    Objects other than builtin scalars, strings and containers are shown as
+    ``<module.Class object at 0x...>`` unless ``repr_objects`` is set, since
+    their ``repr`` may be arbitrarily expensive, e.g. evaluating a queryset.
+    """
+
+    ellipsis = '...'
+
+    def __init__(self, max_string=256, max_items=10, max_depth=3,
+                 max_chars=8192, repr_objects=False, safe_types=SAFE_TYPES):
+        '''Initializes the safe repr.
+
+        :params max_string: (optional) characters kept of a single value, default value is ``256``
+        :params max_items: (optional) items shown of a container, default value is ``10``
+        :params max_depth: (optional) nesting level after which containers are elided, default value is ``3``
+        :params max_chars: (optional) characters budget shared by a whole
+            :meth:`repr_locals` dump, default value is ``8192``
+        :params repr_objects: (optional) boolean specifying whether ``repr`` of arbitrary objects is called
+        :params safe_types: (optional) tuple of types whose ``repr`` is always called
+        '''
+        self.max_string = max_string
+        self.max_items = max_items
+        self.max_depth = max_depth
+        self.max_chars = max_chars
+        self.repr_objects = repr_objects
+        self.safe_types = safe_types
+
+    def repr_locals(self, locals_data):
+        """Returns a dump of ``locals_data``, one ``name = value`` per line.
+
+        :params locals_data: dict of local variables of a frame
+        :rtype: `str`
+        """
+        budget = [self.max_chars]
+        lines = []
+
+        for index, name in enumerate(locals_data):
+            if budget[0] <= 0:
+                lines.append('{} ({} more)'.format(
+                    self.ellipsis, len(locals_data) - index))
+                break
+            line = '{} = {}'.format(
+                name, self.repr(locals_data[name], _budget=budget))
+            budget[0] -= len(name) + 3
+            lines.append(line)
+
+        return '\n'.join(lines)
+
+    def repr(self, value, _depth=0, _budget=None):
+        """Returns a bounded ``repr`` of ``value``, never raises.
+
+        :rtype: `str`
+        """
+        if _budget is None:
+            _budget = [self.max_chars]
+
+        try:
+            text = self._repr(value, _depth, _budget)
+        except Exception as e:
+            text = '<unrepresentable {}: {}>'.format(
+                type(value).__name__, type(e).__name__)
+        if not isinstance(value, CONTAINER_TYPES):
+            _budget[0] -= len(text)
+        return text
+
+    def _repr(self, value, depth, budget):
+        if value is None or isinstance(value, self.safe_types):
+            return self._truncate(repr(value))
+
+        if isinstance(value, (bytes, text_type)):
+            return self._truncate(repr(value[:self.max_string]),
+                                  len(value) > self.max_string)
+
+        if isinstance(value, dict):
+            return self._repr_items(
+                '{', '}', value.items(), len(value), depth, budget,
+                lambda item: '{}: {}'.format(
+                    self.repr(item[0], depth + 1, budget),
+                    self.repr(item[1], depth + 1, budget)))
+
+        if isinstance(value, (list, tuple, set, frozenset)):
+            if isinstance(value, list):
+                start, end = '[', ']'
+            elif isinstance(value, tuple):
+                start, end = '(', ')'
+            else:
+                start, end = '{}({{'.format(type(value).__name__), '})'
+            return self._repr_items(
+                start, end, value, len(value), depth, budget,
+                lambda item: self.repr(item, depth + 1, budget))
+
+        if self.repr_objects:
+            return self._truncate(repr(value))
+
+        return '<{}.{} object at {:#x}>'.format(
+            type(value).__module__, type(value).__name__, id(value))
+
+    def _repr_items(self, start, end, items, length, depth, budget, render):
+        if not length:
+            return '{}{}'.format(start, end)
+        if depth >= self.max_depth:
+            return '{}{}{}'.format(start, self.ellipsis, end)
+
+        parts = []
+        for item in islice(items, self.max_items):
+            if budget[0] <= 0:
+                break
+            parts.append(render(item))
+        if len(parts) < length:
+            parts.append('{} ({} more)'.format(
+                self.ellipsis, length - len(parts)))
+        return '{}{}{}'.format(start, ', '.join(parts), end)
+
+    def _truncate(self, text, truncated=False):
+        if truncated or len(text) > self.max_string:
+            return '{}{}'.format(
+                text[:self.max_string - len(self.ellipsis)], self.ellipsis)
+        return text
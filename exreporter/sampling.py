@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.sampling
+~~~~~~~~~~~~~~~~~~~
+
+This module implements sampling of occurrences before they are rendered.
+Occurrences are kept with a fixed rate per exception class or module, scaled
+down when the overall rate of occurrences exceeds a target throughput. The
+first occurrence of a culprit is always kept, and the number of occurrences
+sampled out is mentioned in the next report of the culprit.
+
+Basic Usage:
+
+  >>> from exreporter.sampling import Sampler
+  >>> sampler = Sampler(rates={KeyError: 0.1, 'urllib3': 0.01}, target=1)
+  >>> reporter = ExReporter(store=gs, sampler=sampler)
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import random
+import threading
+
+from .cache import LRUCache
+from .compat import monotonic
+
+
+class Sampler(object):
+    """Decides which occurrences are reported.
+
+    Rates are looked up by exception class, by ``'module.ClassName'`` along
+    the class hierarchy, then by the exception's module and its parent
+    packages; ``default_rate`` applies when none matches.
+    """
+
+    def __init__(self, rates=None, default_rate=1.0, target=None, window=10,
+                 max_culprits=4096, seed=None):
+        '''Initializes the sampler.
+
+        :params rates: (optional) dict mapping exception classes, dotted class names or
+            module names to the fraction of occurrences kept
+        :params default_rate: (optional) fraction of other occurrences kept, default value is ``1.0``
+        :params target: (optional) number of occurrences per second kept at most on
+            average, rates are scaled down when more occur, ``None`` disables it
+        :params window: (optional) seconds over which the rate of occurrences is measured
+        :params max_culprits: (optional) number of culprits remembered, to keep their first
+            occurrence and their count of sampled out occurrences
+        :params seed: (optional) seed of the random generator
+        '''
+        self.rates = rates or {}
+        self.default_rate = default_rate
+        self.target = target
+        self.window = window
+        self.sampled_out = 0
+
+        self._random = random.Random(seed)
+        self._culprits = LRUCache(max_size=max_culprits)
+        self._type_rates = LRUCache(max_size=1024)
+        self._lock = threading.Lock()
+        self._window_start = monotonic()
+        self._window_count = 0
+        self._factor = 1.0
+
+    @property
+    def factor(self):
+        """Returns the scale applied to the rates to stay under ``target``.
+        """
+        return self._factor
+
+    def sample(self, culprit, exception):
+        """Decides whether an occurrence of ``culprit`` should be reported.
+
+        :params culprit: string used to identify the cause of the issue
+        :params exception: class of the exception
+        :returns: tuple of ``(allowed, sampled_out)`` where ``sampled_out`` is
+            the number of occurrences of ``culprit`` sampled out since its
+            last reported one
+        :rtype: `tuple`
+        """
+        factor = self._measure()
+
+        with self._lock:
+            sampled_out = self._culprits.get(culprit)
+            if sampled_out is not None and\
+                    self._random.random() >= self.rate(exception) * factor:
+                self._culprits.set(culprit, sampled_out + 1)
+                self.sampled_out += 1
+                return False, 0
+            self._culprits.set(culprit, 0)
+            return True, sampled_out or 0
+
+    def carry(self, culprit, count):
+        """Adds ``count`` to the occurrences of ``culprit`` to be mentioned in
+        its next report, eg: when a sampled in occurrence was dropped later.
+        """
+        with self._lock:
+            self._culprits.set(
+                culprit, (self._culprits.get(culprit) or 0) + count)
+
+    def rate(self, exception):
+        """Returns the fixed rate of occurrences of ``exception`` kept.
+        """
+        rate = self._type_rates.get(exception)
+        if rate is None:
+            rate = self._lookup(exception)
+            self._type_rates.set(exception, rate)
+        return rate
+
+    def _lookup(self, exception):
+        for cls in getattr(exception, '__mro__', (exception,)):
+            for key in (cls, '{}.{}'.format(cls.__module__, cls.__name__)):
+                if key in self.rates:
+                    return self.rates[key]
+
+        module = getattr(exception, '__module__', '')
+        while module:
+            if module in self.rates:
+                return self.rates[module]
+            module = module.rpartition('.')[0]
+        return self.default_rate
+
+    def _measure(self):
+        if self.target is None:
+            return 1.0
+
+        now = monotonic()
+        with self._lock:
+            self._window_count += 1
+            elapsed = now - self._window_start
+            if elapsed >= self.window:
+                offered = self._window_count / elapsed
+                self._factor = min(1.0, self.target / offered)
+                self._window_start, self._window_count = now, 0
+            return self._factor
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.snapshot
+~~~~~~~~~~~~~~~~~~~
+
+This module implements a bounded snapshot of the request being handled,
+reported instead of ``str(request)``. Only the method, the path, a truncated
+query string, an allowlist of headers and a prefix of the body are kept.
+Headers are looked up by name, the body is never read from its stream
+beyond the prefix, and the stream is left where it was, so the cost does
+not depend on the size of the request.
+
+Supported requests are Django ``HttpRequest`` objects, WSGI environs, ASGI
+scopes and request objects exposing their ``scope``, eg: Starlette's.
+
+Basic Usage:
+
+  >>> from exreporter.snapshot import RequestSnapshot
+  >>> reporter = ExReporter(
+  ...     store=gs, snapshot=RequestSnapshot(max_body=4096))
+  >>> reporter.report(request=environ)
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+from .saferepr import SafeRepr, text_type
+
+
+HEADERS = ('Host', 'User-Agent', 'Accept', 'Content-Type', 'Content-Length',
+           'Referer', 'X-Request-Id')
+
+# headers of WSGI environs without the ``HTTP_`` prefix
+CGI_HEADERS = ('CONTENT_TYPE', 'CONTENT_LENGTH')
+
+
+class RequestSnapshot(object):
+    """Bounded snapshot of a request.
+
+    The body prefix is taken from the body already read by the framework, or
+    from a seekable, eg: in-memory, WSGI input, which is rewound. It is left
+    out otherwise: a body is never read from a socket on the error path.
+    """
+
+    def __init__(self, headers=HEADERS, max_query=1024, max_body=1024,
+                 max_value=256, safe_repr=None):
+        '''Initializes the snapshot.
+
+        :params headers: (optional) names of the headers kept, any other header,
+            eg: ``Authorization`` or ``Cookie``, is left out
+        :params max_query: (optional) characters kept of the path and of the query string,
+            default value is ``1024``
+        :params max_body: (optional) bytes kept of the body, ``0`` leaves the body out,
+            default value is ``1024``
+        :params max_value: (optional) characters kept of a header, default value is ``256``
+        :params safe_repr: (optional) object of :class:`exreporter.saferepr.SafeRepr` used
+            for requests of other types
+        '''
+        self.headers = tuple(headers)
+        self.max_query = max_query
+        self.max_body = max_body
+        self.max_value = max_value
+        self.safe_repr = safe_repr or SafeRepr()
+
+        self._environ_keys = [
+            (name, _environ_key(name)) for name in self.headers]
+        self._scope_keys = dict(
+            (name.lower().encode('latin-1'), name) for name in self.headers)
+
+    def capture(self, request):
+        """Returns the snapshot of ``request`` as text. Text is returned as
+        is, so capturing a snapshot again is free.
+
+        :rtype: `str`
+        """
+        if isinstance(request, text_type):
+            return request
+
+        snapshot = self.extract(request)
+        if snapshot is None:
+            return self.safe_repr.repr(request)
+        return self.format(**snapshot)
+
+    def extract(self, request):
+        """Returns the snapshot of ``request`` as a dict of its ``method``,
+        ``path``, ``query``, ``headers``, ``body`` prefix and body ``size``,
+        or ``None`` for requests of an unknown type.
+
+        :rtype: `dict`
+        """
+        if isinstance(getattr(request, 'META', None), dict):
+            return self.from_django(request)
+        if isinstance(request, dict):
+            if 'REQUEST_METHOD' in request:
+                return self.from_wsgi(request)
+            if request.get('type') in ('http', 'websocket'):
+                return self.from_asgi(request)
+            return None
+        scope = getattr(request, 'scope', None)
+        if isinstance(scope, dict):
+            return self.from_asgi(scope, body=getattr(request, '_body', None))
+        return None
+
+    def from_django(self, request):
+        """Returns the snapshot of a Django ``HttpRequest``. The body prefix
+        is only kept when the view has read the body already.
+        """
+        meta = request.META
+        # ``request.body`` would read the whole stream
+        body = request.__dict__.get('_body')
+        return dict(
+            method=getattr(request, 'method', None),
+            path=getattr(request, 'path', None) or meta.get('PATH_INFO'),
+            query=meta.get('QUERY_STRING'),
+            headers=self._environ_headers(meta),
+            body=None if body is None else body[:self.max_body],
+            size=_size(meta.get('CONTENT_LENGTH'), body))
+
+    def from_wsgi(self, environ):
+        """Returns the snapshot of a WSGI environ. The body prefix is read from
+        a seekable ``wsgi.input``, up to ``CONTENT_LENGTH``, and the input is
+        rewound.
+        """
+        size = _size(environ.get('CONTENT_LENGTH'))
+        return dict(
+            method=environ.get('REQUEST_METHOD'),
+            path='{}{}'.format(
+                environ.get('SCRIPT_NAME', ''), environ.get('PATH_INFO', '')),
+            query=environ.get('QUERY_STRING'),
+            headers=self._environ_headers(environ),
+            body=self._peek(environ.get('wsgi.input'), size),
+            size=size)
+
+    def from_asgi(self, scope, body=None):
+        """Returns the snapshot of an ASGI scope. The body is not part of the
+        scope, its prefix is only kept when given as ``body``.
+        """
+        headers = []
+        for key, value in scope.get('headers') or ():
+            name = self._scope_keys.get(key.lower())
+            if name is not None:
+                headers.append((name, value[:self.max_value].decode(
+                    'latin-1')))
+        size = dict(headers).get('Content-Length')
+        return dict(
+            method=scope.get('method', scope.get('type', '').upper()),
+            path='{}{}'.format(scope.get('root_path', ''), scope.get('path')),
+            query=scope.get('query_string', b'')[:self.max_query].decode(
+                'latin-1'),
+            headers=headers,
+            body=None if body is None else body[:self.max_body],
+            size=_size(size, body))
+
+    def format(self, method, path, query, headers, body, size):
+        """Returns a snapshot as text: the request line, one line per header
+        and the body prefix.
+
+        :rtype: `str`
+        """
+        line = '{} {}'.format(method, _truncate(path, self.max_query))
+        if query:
+            line = '{}?{}'.format(line, _truncate(query, self.max_query))
+        lines = [line]
+        lines.extend('{}: {}'.format(name, value) for name, value in headers)
+
+        if body:
+            lines.append('')
+            if size is not None and size > len(body):
+                lines.append('Body (first {} of {} bytes):'.format(
+                    len(body), size))
+            else:
+                lines.append('Body:')
+            lines.append(repr(body))
+        return '\n'.join(lines)
+
+    def _environ_headers(self, environ):
+        headers = []
+        for name, key in self._environ_keys:
+            value = environ.get(key)
+            if value is not None:
+                headers.append((name, _truncate(value, self.max_value)))
+        return headers
+
+    def _peek(self, stream, size):
+        # a socket backed input would block, or read the next request
+        if stream is None or not size or self.max_body <= 0:
+            return None
+        try:
+            if not stream.seekable():
+                return None
+            position = stream.tell()
+            try:
+                return stream.read(min(self.max_body, size))
+            finally:
+                stream.seek(position)
+        except Exception:
+            return None
+
+
+def _environ_key(name):
+    key = name.upper().replace('-', '_')
+    if key in CGI_HEADERS:
+        return key
+    return 'HTTP_{}'.format(key)
+
+
+def _size(content_length, body=None):
+    if body is not None:
+        return len(body)
+    try:
+        return int(content_length)
+    except (TypeError, ValueError):
+        return None
+
+
+def _truncate(text, limit):
+    text = '{}'.format(text)
+    if len(text) > limit:
+        return '{}...'.format(text[:limit])
+    return text
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.spool
+~~~~~~~~~~~~~~~~
+
+This module implements a durable on-disk spool of rendered reports. The
+reporter appends reports to a SQLite database and a background drainer
+delivers them to the store in batches, retrying failed deliveries with
+backoff. Reports left over by a previous process are replayed on start.
+
+Basic Usage:
+
+  >>> from exreporter.spool import Spool
+  >>> spool = Spool(path='/var/tmp/exreporter.sqlite3')
+  >>> reporter = ExReporter(store=gs, spool=spool)
+  >>> reporter.report()  # returns as soon as the report is on disk
+  >>> spool.drain()  # deliver due reports on the calling thread
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import os
+import json
+import time
+import random
+import logging
+import threading
+
+from ._sqlite import Database
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    due_at REAL NOT NULL
+)
+'''
+
+
+class Spool(object):
+    """Append-only queue of rendered reports stored in SQLite.
+
+    The database runs in WAL mode with ``synchronous=NORMAL`` by default, so
+    appending a report does not wait for an fsync; the WAL is synced at
+    checkpoints. A batch is claimed by pushing its due time ``lease``
+    seconds ahead, so several processes can drain the same spool without
+    delivering a report twice.
+    """
+
+    def __init__(self, path, batch_size=50, interval=1.0, backoff=1.0,
+                 max_backoff=300, max_attempts=None, lease=60,
+                 synchronous='NORMAL'):
+        '''Initializes the spool, the database is created on first use.
+
+        :params path: path of the SQLite database file
+        :params batch_size: (optional) number of reports delivered per batch, default value is ``50``
+        :params interval: (optional) seconds between checks for due reports, default value is ``1.0``
+        :params backoff: (optional) seconds to wait before the first retry, doubled
+            on every failed attempt, default value is ``1.0``
+        :params max_backoff: (optional) maximum seconds between retries, default value is ``300``
+        :params max_attempts: (optional) number of attempts after which a report is
+            dropped, ``None`` retries forever
+        :params lease: (optional) seconds a claimed batch is hidden from other drainers
+        :params synchronous: (optional) SQLite ``synchronous`` pragma, ``'FULL'``
+            fsyncs every append
+        '''
+        self.path = path
+        self.batch_size = batch_size
+        self.interval = interval
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self.synchronous = synchronous
+        self.deliver = None
+
+        self._lock = threading.RLock()
+        self._wakeup = threading.Event()
+        self._database = Database(path, SCHEMA, synchronous=synchronous)
+        self._pid = None
+        self._compact = False
+
+    def __len__(self):
+        with self._lock:
+            return self._database.connect().execute(
+                'SELECT COUNT(*) FROM reports').fetchone()[0]
+
+    def start(self, deliver):
+        """Sets the callable delivering reports, ``deliver(**issue)``, and
+        starts the drainer thread, which replays the reports already spooled.
+
+        The drainer is restarted after a fork on the next append.
+        """
+        self.deliver = deliver
+        self._ensure_drainer()
+
+    def append(self, **issue):
+        """Writes a rendered report to the spool.
+        """
+        payload = json.dumps(issue)
+        with self._lock:
+            self._database.connect().execute(
+                'INSERT INTO reports (payload, due_at) VALUES (?, 0)',
+                (payload,))
+        if self.deliver is not None:
+            self._ensure_drainer()
+            self._wakeup.set()
+
+    def drain(self):
+        """Delivers one batch of due reports.
+
+        :returns: number of reports in the batch
+        :rtype: `int`
+        """
+        batch = self._claim()
+        delivered, failed, dropped = [], [], []
+
+        for report_id, payload, attempts in batch:
+            try:
+                self.deliver(**json.loads(payload))
+            except Exception as error:
+                attempts += 1
+                if self.max_attempts and attempts >= self.max_attempts:
+                    logger.exception(
+                        'Exreporter dropped a report after %s attempts',
+                        attempts)
+                    dropped.append(report_id)
+                else:
+                    logger.warning(
+                        'Exreporter failed to deliver a spooled report',
+                        exc_info=True)
+                    failed.append((
+                        attempts, report_id,
+                        getattr(error, 'retry_after', 0)))
+            else:
+                delivered.append(report_id)
+
+        self._settle(delivered + dropped, failed)
+        return len(batch)
+
+    def compact(self):
+        """Truncates the write-ahead log once delivered reports were removed.
+        """
+        with self._lock:
+            self._database.connect().execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            self._compact = False
+
+    def close(self):
+        with self._lock:
+            self._database.close()
+
+    def _claim(self):
+        now = time.time()
+        with self._lock:
+            connection = self._database.connect()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                batch = connection.execute(
+                    'SELECT id, payload, attempts FROM reports '
+                    'WHERE due_at <= ? ORDER BY id LIMIT ?',
+                    (now, self.batch_size)).fetchall()
+                connection.executemany(
+                    'UPDATE reports SET due_at = ? WHERE id = ?',
+                    [(now + self.lease, row[0]) for row in batch])
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+        return batch
+
+    def _settle(self, removed, failed):
+        if not removed and not failed:
+            return
+
+        now = time.time()
+        retries = [
+            (now + max(self._retry_delay(attempts), retry_after), attempts,
+             report_id)
+            for attempts, report_id, retry_after in failed]
+
+        with self._lock:
+            connection = self._database.connect()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                connection.executemany(
+                    'DELETE FROM reports WHERE id = ?',
+                    [(report_id,) for report_id in removed])
+                connection.executemany(
+                    'UPDATE reports SET due_at = ?, attempts = ? '
+                    'WHERE id = ?', retries)
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+            if removed:
+                self._compact = True
+
+    def _retry_delay(self, attempts):
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _ensure_drainer(self):
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            thread = threading.Thread(
+                target=self._run, name='exreporter-spool')
+            thread.daemon = True
+            thread.start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                while self.drain() == self.batch_size:
+                    pass
+                if self._compact:
+                    self.compact()
+            except Exception:
+                logger.exception('Exreporter failed to drain the spool')
+            self._wakeup.wait(self.interval)
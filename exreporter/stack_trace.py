@@ -3,54 +3,117 @@
 import sys
 import traceback
 
+from .saferepr import SafeRepr
+
+
+def default_in_app(filepath):
+    """Returns ``True`` when ``filepath`` is not part of an installed package.
+    """
+    return 'site-packages' not in filepath
+
 
 class StackTrace(object):
 
-    def __init__(self):
-        ex_type, ex_value, ex_trace = sys.exc_info()
+    def __init__(self, safe_repr=None, in_app=None, fingerprinter=None,
+                 exc_info=None):
+        '''Captures the exception currently being handled, or ``exc_info``.
+
+        :params safe_repr: (optional) object of :class:`exreporter.saferepr.SafeRepr` used to
+            render :attr:`locals_text`
+        :params in_app: (optional) callable taking a file path and returning whether it
+            belongs to the application, the innermost such frame is the culprit,
+            default: :func:`default_in_app`
+        :params fingerprinter: (optional) callable taking the stack trace and returning its
+            fingerprint, default: :class:`exreporter.fingerprint.Fingerprinter`
+        :params exc_info: (optional) tuple of the exception type, value and traceback,
+            as returned by :func:`sys.exc_info`, eg: of a :class:`logging.LogRecord`
+        '''
+        ex_type, ex_value, ex_trace = exc_info or sys.exc_info()
 
         assert ex_type is not None,\
             'No exception occurred, cannot proceed without any exception'
+        assert ex_trace is not None,\
+            'The exception has no traceback, it was never raised'
 
-        filepath, method_name, locals_data, lineno = self._get_trace_info(
-            trace=ex_trace)
+        culprit_trace = self._get_culprit_trace(
+            trace=ex_trace, in_app=in_app or default_in_app)
+        frame = culprit_trace.tb_frame
 
-        self.filepath = filepath
-        self.locals_data = locals_data
-        self.method_name = method_name
-        self.lineno = lineno
+        self.filepath = frame.f_code.co_filename
+        self.method_name = frame.f_code.co_name
+        self.locals_data = frame.f_locals
+        self.lineno = culprit_trace.tb_lineno
         self.exception = ex_type
         self.traceback = ex_trace
         self.exception_value = ex_value
+        self.safe_repr = safe_repr
+        self.fingerprinter = fingerprinter
+        self._locals_text = None
+        self._stack_trace_text = None
+        self._trace_parts = None
+        self._fingerprint = None
+
+    def _get_culprit_trace(self, trace, in_app):
+        """Returns the innermost traceback entry whose frame is in the
+        application, or the innermost entry when there is none.
+        """
+        culprit_trace = None
 
-    def _get_trace_info(self, trace):
-        custom_module_data = []
-
-        while trace:
-            filepath = trace.tb_frame.f_code.co_filename
-            method_name = trace.tb_frame.f_code.co_name
-            locals_data = trace.tb_frame.f_locals
-            lineno = trace.tb_frame.f_lineno
-
-            if 'site-packages' not in filepath:
-                custom_module_data.append(
-                    {
-                        'filepath': filepath,
-                        'method_name': method_name,
-                        'locals_data': locals_data,
-                        'lineno': lineno
-                    }
-                )
+        while True:
+            if in_app(trace.tb_frame.f_code.co_filename):
+                culprit_trace = trace
+            if trace.tb_next is None:
+                return culprit_trace or trace
             trace = trace.tb_next
 
-        if custom_module_data:
-            data = custom_module_data.pop(-1)
-            return (data['filepath'], data['method_name'],
-                    data['locals_data'], data['lineno'])
-        else:
-            return (filepath, method_name, locals_data, lineno)
+    @property
+    def locals_text(self):
+        """Returns a bounded dump of the culprit frame's locals.
+
+        Rendered on first access only, so capturing a trace never repr's
+        the locals unless they are going to be reported.
+        """
+        if self._locals_text is None:
+            safe_repr = self.safe_repr or SafeRepr()
+            self._locals_text = safe_repr.repr_locals(self.locals_data)
+        return self._locals_text
+
+    @property
+    def fingerprint(self):
+        """Returns the fingerprint used to group occurrences, computed once.
+        """
+        if self._fingerprint is None:
+            if self.fingerprinter is None:
+                from .fingerprint import Fingerprinter
+                self.fingerprinter = Fingerprinter()
+            self._fingerprint = self.fingerprinter(self)
+        return self._fingerprint
 
     @property
     def stack_trace_text(self):
-        return '\n'.join(traceback.format_exception(
-            self.exception, self.exception_value, self.traceback))
+        """Returns the formatted traceback, formatted on first access only.
+        """
+        if self._stack_trace_text is None:
+            self._stack_trace_text = '{}{}'.format(*self.trace_parts)
+        return self._stack_trace_text
+
+    @property
+    def trace_parts(self):
+        """Returns the formatted traceback split in the frames and the
+        exception message, formatted on first access only.
+
+        :rtype: `tuple`
+        """
+        if self._trace_parts is None:
+            lines = traceback.format_exception(
+                self.exception, self.exception_value, self.traceback)
+            message = traceback.format_exception_only(
+                self.exception, self.exception_value)
+            if len(message) < len(lines) and\
+                    lines[len(lines) - len(message):] == message:
+                frames = lines[:len(lines) - len(message)]
+                self._trace_parts = (
+                    '{}\n'.format('\n'.join(frames)), '\n'.join(message))
+            else:
+                self._trace_parts = ('\n'.join(lines), '')
+        return self._trace_parts
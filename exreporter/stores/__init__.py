@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
 
+from .base import BaseStore
+from .bitbucket import BitbucketStore
 from .github import GithubStore
+from .gitlab import GitlabStore
+from .sqlite import SqliteStore
 
 
-__all__ = [GithubStore]
+__all__ = [BaseStore, BitbucketStore, GithubStore, GitlabStore, SqliteStore]
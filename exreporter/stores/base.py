@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.stores.base
+~~~~~~~~~~~~~~~~~~~~~~
+
+This module implements the interface of exreporter stores and the
+aggregation of occurrences on issues shared by the issue tracker stores.
+
+A store takes rendered issues, one at a time through
+:meth:`BaseStore.create_or_update_issue` or in batches through
+:meth:`BaseStore.create_or_update_many`, which lets a store group the
+occurrences of a culprit and look up the issues of several culprits at
+once.
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import abc
+import calendar
+from collections import OrderedDict
+
+from ..cache import LRUCache
+from ..compat import ABC
+from ..formats import Formats
+
+
+CREATE = 'create'
+COMMENT = 'comment'
+DROP = 'drop'
+
+
+class StoreError(AssertionError):
+    """Base of the errors raised by the stores and their wrappers.
+
+    Derives from :class:`AssertionError`, raised by the stores for failed
+    requests, so existing error handling keeps working.
+    """
+
+
+class RateLimitExceeded(StoreError):
+    """Raised when a request is not allowed by the rate limit in time, see
+    :class:`exreporter.ratelimit.RateLimitBucket`.
+    """
+
+    def __init__(self, resource, retry_after):
+        super(RateLimitExceeded, self).__init__(
+            '{} rate limit exceeded, retry after {:.0f} seconds'.format(
+                resource, retry_after))
+        self.resource = resource
+        self.retry_after = retry_after
+
+
+class BaseStore(ABC):
+    """Interface of the stores.
+    """
+
+    @abc.abstractmethod
+    def create_or_update_issue(self, title, body, culprit, labels, **kwargs):
+        '''Creates or comments on existing issue in the store.
+
+        :params title: title for the issue
+        :params body: body, the content of the issue
+        :params culprit: string used to identify the cause of the issue,
+            also used for aggregation
+        :params labels: (optional) list of labels attached to the issue
+        :returns: issue object, or ``None`` when the occurrence was not reported
+        '''
+
+    def create_or_update_many(self, reports):
+        '''Creates or comments on issues for a batch of reports.
+
+        Reports of the same culprit are grouped: the first one is reported,
+        mentioning the number of the others in its body. A failure of one
+        culprit does not stop the others.
+
+        :params reports: list of dicts of the keyword arguments of
+            :meth:`create_or_update_issue`
+        :returns: list of the issue object, or of the exception raised, for
+            each report, in the order of ``reports``
+        :rtype: `list`
+        '''
+        results = [None] * len(reports)
+        for culprit, indexes in group_by_culprit(reports).items():
+            report = dict(reports[indexes[0]])
+            if len(indexes) > 1:
+                report['body'] = '{}{}'.format(
+                    report['body'],
+                    Formats.batched.format(count=len(indexes) - 1))
+            try:
+                result = self.create_or_update_issue(**report)
+            except Exception as error:
+                result = error
+            for index in indexes:
+                results[index] = result
+        return results
+
+
+class IssueStore(BaseStore):
+    """Store aggregating occurrences on the issues of an issue tracker.
+
+    The latest issue of a culprit is looked up, then commented on or a new
+    issue is created as decided by :func:`aggregate`. Issues are kept in a
+    local index, so repeat occurrences skip the lookup.
+
+    Subclasses implement :meth:`lookup` and :meth:`create_issue`, and may
+    implement :meth:`prefetch`, or extend :meth:`_create_once`,
+    :meth:`_remember` and :meth:`_forget`, eg: to share issues with other
+    processes. Their issue objects have the ``updated_time_delta`` and
+    ``comments_count`` attributes and a ``comment(body)`` method, see
+    :class:`exreporter.stores.github.GithubIssue`.
+    """
+
+    def __init__(self, index_size=1024, index_ttl=300):
+        '''Initializes the store.
+
+        :params index_size: (optional) number of culprits remembered by the
+            local issue index, ``0`` disables the index, default value is ``1024``
+        :params index_ttl: (optional) seconds after which an indexed issue is
+            looked up again, default value is ``300``
+        '''
+        self.index = LRUCache(
+            max_size=index_size, ttl=index_ttl) if index_size else None
+
+    def create_or_update_issue(self, title, body, culprit, labels=None,
+                               max_comments=50, time_delta=10, **kwargs):
+        '''Creates or comments on existing issue in the store.
+
+        :params max_comments: (optional) number of comments after which a new issue is created
+        :params time_delta: (optional) seconds since the last update of the issue
+            within which the occurrence is dropped
+        :returns: issue object, or ``None`` when the occurrence was dropped
+        '''
+        latest_issue = self._lookup(culprit=culprit, labels=labels)
+
+        try:
+            if latest_issue is not None:
+                issue = self.handle_issue_comment(
+                    issue=latest_issue, title=title, body=body,
+                    labels=labels, max_comments=max_comments,
+                    time_delta=time_delta)
+            else:
+                issue = self._create_once(
+                    culprit=culprit, title=title, body=body, labels=labels,
+                    max_comments=max_comments, time_delta=time_delta)
+        except Exception:
+            self._forget(culprit)
+            raise
+
+        if issue is not None:
+            self._remember(culprit, issue)
+        return issue
+
+    def handle_issue_comment(self, issue, title, body, labels=None,
+                             max_comments=50, time_delta=10):
+        '''Comments on ``issue``, creates a new issue or drops the occurrence,
+        as decided by :func:`aggregate`.
+
+        :returns: the issue commented on, the new issue, or ``None`` when the
+            occurrence was dropped
+        '''
+        action = aggregate(issue, max_comments, time_delta)
+        if action == COMMENT:
+            issue.comment(body=body)
+            return issue
+        elif action == CREATE:
+            return self.create_issue(title=title, body=body, labels=labels)
+
+    def create_or_update_many(self, reports):
+        for labels, culprits in self._missing(reports).items():
+            for culprit, issue in self.prefetch(
+                    culprits=culprits, labels=list(labels)).items():
+                if issue is not None:
+                    self._remember(culprit, issue)
+        return super(IssueStore, self).create_or_update_many(reports)
+
+    @abc.abstractmethod
+    def lookup(self, culprit, labels):
+        '''Returns the latest issue of ``culprit`` or ``None``.
+        '''
+
+    def prefetch(self, culprits, labels):
+        '''Returns a dict of the latest issue of each of ``culprits`` found,
+        with fewer requests than looking them up one by one. Culprits missing
+        from the dict are looked up one by one.
+
+        :rtype: `dict`
+        '''
+        return {}
+
+    @abc.abstractmethod
+    def create_issue(self, title, body, labels=None):
+        '''Creates a new issue and returns it.
+        '''
+
+    def _lookup(self, culprit, labels):
+        if self.index is not None:
+            issue = self.index.get(culprit)
+            if issue is not None:
+                return issue
+        return self.lookup(culprit=culprit, labels=labels)
+
+    def _create_once(self, culprit, title, body, labels, max_comments,
+                     time_delta):
+        # creates the first issue of a culprit
+        return self.create_issue(title=title, body=body, labels=labels)
+
+    def _remember(self, culprit, issue):
+        if self.index is not None:
+            self.index.set(culprit, issue)
+
+    def _forget(self, culprit):
+        if self.index is not None:
+            self.index.pop(culprit)
+
+    def _missing(self, reports):
+        missing = OrderedDict()
+        if self.index is None:
+            return missing
+        for report in reports:
+            culprit = report['culprit']
+            if culprit in self.index:
+                continue
+            culprits = missing.setdefault(
+                tuple(report.get('labels') or ()), [])
+            if culprit not in culprits:
+                culprits.append(culprit)
+        return missing
+
+
+def aggregate(issue, max_comments, time_delta):
+    """Returns what to do with an occurrence of a culprit, the aggregation
+    rule shared by the stores: :data:`CREATE` a new issue when the culprit
+    has none, :data:`DROP` the occurrence when its latest ``issue`` was
+    updated within ``time_delta`` seconds, :data:`COMMENT` on it while it
+    has less than ``max_comments`` comments, else :data:`CREATE` a new one.
+
+    :params issue: latest issue of the culprit or ``None``, with the
+        ``updated_time_delta`` and ``comments_count`` attributes
+    """
+    if issue is None:
+        return CREATE
+    if issue.updated_time_delta <= time_delta:
+        return DROP
+    if issue.comments_count < max_comments:
+        return COMMENT
+    return CREATE
+
+
+def group_by_culprit(reports):
+    """Returns an ordered dict of the indexes of ``reports`` by culprit.
+
+    :rtype: `OrderedDict`
+    """
+    groups = OrderedDict()
+    for index, report in enumerate(reports):
+        groups.setdefault(report['culprit'], []).append(index)
+    return groups
+
+
+def parse_time(value):
+    """Returns an ISO 8601 UTC timestamp, eg: ``'2014-12-11T10:00:00Z'``, as
+    seconds since the epoch, ignoring fractions of seconds. Numbers are
+    returned as they are.
+    """
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return calendar.timegm((
+        int(value[0:4]), int(value[5:7]), int(value[8:10]),
+        int(value[11:13]), int(value[14:16]), int(value[17:19]), 0, 0, 0))
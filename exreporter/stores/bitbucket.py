@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.stores.bitbucket
+~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module implements Bitbucket Cloud issue store for exreporter.
+Bitbucket issues have no labels, issues are created with the ``bug`` kind.
+
+Basic Usage:
+
+  >>> from exreporter.stores.bitbucket import (
+  ...     BitbucketCredentials, BitbucketStore)
+  >>> bc = BitbucketCredentials(
+  ...     workspace='workspace', repo='repo', user='user',
+  ...     app_password='app password')
+  >>> reporter = ExReporter(store=BitbucketStore(credentials=bc))
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import json
+import time
+import requests
+
+from .base import IssueStore, parse_time
+
+
+OPEN_STATES = ('new', 'open')
+
+
+class BitbucketCredentials(object):
+    """Bitbucket credentials.
+
+    :params workspace: workspace owning the repository
+    :params repo: slug of the repository
+    :params user: Bitbucket username
+    :params app_password: app password with the issue read and write permissions
+    """
+
+    def __init__(self, workspace, repo, user, app_password):
+        self.workspace, self.repo = workspace, repo
+        self.user, self.app_password = user, app_password
+
+
+class BitbucketStore(IssueStore):
+    """Bitbucket Issue Store.
+
+    A batch of reports looks up the issues of all its culprits in one search
+    request, combining the culprits with ``OR``.
+    """
+
+    def __init__(self, credentials, index_size=1024, index_ttl=300,
+                 pool_size=10, timeout=10, api_url=None, kind='bug'):
+        '''Initializes Bitbucket issue store.
+
+        :params credentials: object of :class:`BitbucketCredentials`
+        :params index_size: (optional) see :class:`exreporter.stores.base.IssueStore`
+        :params index_ttl: (optional) see :class:`exreporter.stores.base.IssueStore`
+        :params pool_size: (optional) see :class:`BitbucketRequest`
+        :params timeout: (optional) see :class:`BitbucketRequest`
+        :params api_url: (optional) see :class:`BitbucketRequest`
+        :params kind: (optional) kind of the issues created, default value is ``'bug'``
+        '''
+        assert type(credentials) is BitbucketCredentials,\
+            'Credentials object is not of type BitbucketCredentials'
+        super(BitbucketStore, self).__init__(
+            index_size=index_size, index_ttl=index_ttl)
+        self.credentials = credentials
+        self.kind = kind
+        self.bitbucket_request = BitbucketRequest(
+            credentials=credentials, pool_size=pool_size, timeout=timeout,
+            api_url=api_url)
+
+    def lookup(self, culprit, labels):
+        return self.prefetch(culprits=[culprit], labels=labels).get(culprit)
+
+    def prefetch(self, culprits, labels):
+        found = {}
+        for data in self.bitbucket_request.search(culprits):
+            content = (data.get('content') or {}).get('raw') or ''
+            for culprit in culprits:
+                if culprit not in found and culprit in content:
+                    found[culprit] = data
+
+        return dict(
+            (culprit, BitbucketIssue(
+                bitbucket_request=self.bitbucket_request, **data))
+            for culprit, data in found.items())
+
+    def create_issue(self, title, body, labels=None):
+        data = self.bitbucket_request.create(
+            title=title, body=body, kind=self.kind)
+        return BitbucketIssue(
+            bitbucket_request=self.bitbucket_request, comments=0, **data)
+
+
+class BitbucketIssue(object):
+    """Python object representation of issue on Bitbucket.
+
+    Issues carry no comment count, it is read from the comments of the
+    issue on the first access to :attr:`comments_count`, which is only
+    needed once the issue was not updated within ``time_delta``.
+    """
+
+    __slots__ = ('bitbucket_request', 'id', 'state', 'url', 'comments_url',
+                 'comments', 'updated_at')
+
+    def __init__(self, bitbucket_request, comments=None, **kwargs):
+        links = kwargs.get('links') or {}
+        self.bitbucket_request = bitbucket_request
+        self.id = kwargs.get('id')
+        self.state = kwargs.get('state')
+        self.url = (links.get('self') or {}).get('href')
+        self.comments_url = (links.get('comments') or {}).get('href')
+        self.comments = comments
+        self.updated_at = parse_time(kwargs.get('updated_on'))
+
+    @property
+    def comments_count(self):
+        if self.comments is None:
+            self.comments = self.bitbucket_request.comments_count(self)
+        return self.comments
+
+    @property
+    def updated_time_delta(self):
+        return int(time.time() - self.updated_at)
+
+    def comment(self, body):
+        """Adds a comment to the issue, reopening it if resolved or closed.
+
+        :rtype: :class:`BitbucketIssue`
+        """
+        self.bitbucket_request.comment(issue=self, body=body)
+        self.comments = self.comments_count + 1
+        self.updated_at = time.time()
+
+        if self.state not in OPEN_STATES:
+            self.bitbucket_request.update(issue=self, state='open')
+            self.state = 'open'
+        return self
+
+
+class BitbucketRequest(object):
+    """HTTP client of the Bitbucket Cloud issues API.
+    """
+
+    api_url = 'https://api.bitbucket.org/2.0'
+
+    def __init__(self, credentials, pool_size=10, timeout=10, api_url=None):
+        '''Initializes the HTTP session used for all requests to Bitbucket.
+
+        :params credentials: object of :class:`BitbucketCredentials`
+        :params pool_size: (optional) maximum number of pooled connections, default value is ``10``
+        :params timeout: (optional) seconds to wait for Bitbucket, default value is ``10``
+        :params api_url: (optional) base URL of the Bitbucket API, eg: of a local
+            stand-in, default value is ``'https://api.bitbucket.org/2.0'``
+        '''
+        if api_url is not None:
+            self.api_url = api_url.rstrip('/')
+        self.timeout = timeout
+        self.issues_url = '{}/repositories/{}/{}/issues'.format(
+            self.api_url, credentials.workspace, credentials.repo)
+        self.session = requests.Session()
+        self.session.auth = (credentials.user, credentials.app_password)
+        self.session.headers['Content-Type'] = 'application/json'
+
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def search(self, culprits, pagelen=50):
+        """Returns the issues whose content contains any of ``culprits``, the
+        most recently updated first.
+
+        :rtype: `list`
+        """
+        q = ' OR '.join(
+            'content.raw ~ {}'.format(json.dumps(culprit, ensure_ascii=False))
+            for culprit in culprits)
+        params = {'q': q, 'sort': '-updated_on', 'pagelen': pagelen}
+
+        return self._send('get', self.issues_url, 200, params=params)['values']
+
+    def comments_count(self, issue):
+        """Returns the number of comments of ``issue``.
+        """
+        return self._send(
+            'get', issue.comments_url, 200, params={'pagelen': 1})['size']
+
+    def create(self, title, body, kind='bug'):
+        data = {'title': title, 'content': {'raw': body}, 'kind': kind}
+
+        return self._send('post', self.issues_url, 201, data=data)
+
+    def comment(self, issue, body):
+        return self._send(
+            'post', issue.comments_url, 201, data={'content': {'raw': body}})
+
+    def update(self, issue, **kwargs):
+        return self._send('put', issue.url, 200, data=kwargs)
+
+    def _send(self, method, url, expected, data=None, params=None):
+        args = () if data is None else (json.dumps(data),)
+        response = getattr(self.session, method)(
+            url, *args, params=params, timeout=self.timeout)
+
+        assert response.status_code == expected
+        return json.loads(response.content)
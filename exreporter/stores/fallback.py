@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.stores.fallback
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module implements stores which make no network request, used as
+fallbacks while the real store is unavailable, see
+:class:`exreporter.breaker.BreakerStore`.
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import logging
+import threading
+
+from .base import BaseStore
+
+
+class NullStore(BaseStore):
+    """Store dropping every issue, counting them in ``dropped``.
+    """
+
+    def __init__(self):
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def create_or_update_issue(self, **issue):
+        with self._lock:
+            self.dropped += 1
+
+
+class LoggingStore(BaseStore):
+    """Store writing every issue to a logger.
+    """
+
+    def __init__(self, logger=None, level=logging.ERROR):
+        '''Initializes the store.
+
+        :params logger: (optional) logger the issues are written to, default is
+            the ``exreporter.stores.fallback`` logger
+        :params level: (optional) level of the log records, default ``logging.ERROR``
+        '''
+        self.logger = logger or logging.getLogger(__name__)
+        self.level = level
+
+    def create_or_update_issue(self, title, body, culprit, **kwargs):
+        self.logger.log(
+            self.level, '%s %s\n%s', title, culprit, body,
+            extra={'culprit': culprit})
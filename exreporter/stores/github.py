@@ -11,10 +11,13 @@ This module implements Github issue store for exporter.
 """
 
 import json
-import pytz
-import datetime
+import time
 import requests
-from dateutil.tz import tzlocal
+
+from ..cache import LRUCache
+from ..compat import monotonic
+from ..ratelimit import RateLimitBucket, retry_after
+from .base import IssueStore, RateLimitExceeded, parse_time
 
 
 class GithubCredentials(object):
@@ -32,42 +35,100 @@ class GithubCredentials(object):
         self.user, self.repo, self.auth_token = user, repo, auth_token
 
 
-class GithubStore(object):
+class GithubStore(IssueStore):
     """Github Issue Store.
+
+    Issues of new culprits are looked up through the dedup table, when
+    given, before searching Github, and only the process claiming a culprit
+    in the table creates its issue.
     """
 
-    def __init__(self, credentials):
+    def __init__(self, credentials, index_size=1024, index_ttl=300,
+                 pool_size=10, keep_alive=True, timeout=10, api_url=None,
+                 retries=2, max_wait=0, dedup=None, metrics=None,
+                 response_cache=None):
         '''Initializes Github issue store.
 
         :params credentials: object of :class:`GithubCredentials` with proper credentials
+        :params index_size: (optional) number of culprits remembered by the
+            local issue index, ``0`` disables the index, default value is ``1024``
+        :params index_ttl: (optional) seconds after which an indexed issue is
+            looked up on Github again, default value is ``300``
+        :params pool_size: (optional) see :class:`GithubRequest`
+        :params keep_alive: (optional) see :class:`GithubRequest`
+        :params timeout: (optional) see :class:`GithubRequest`
+        :params api_url: (optional) see :class:`GithubRequest`
+        :params retries: (optional) see :class:`GithubRequest`
+        :params max_wait: (optional) see :class:`GithubRequest`
+        :params dedup: (optional) object of :class:`exreporter.dedup.DedupTable` shared by the
+            processes of the host, so that only one of them creates the issue of a new culprit
+        :params metrics: (optional) see :class:`GithubRequest`
+        :params response_cache: (optional) see :class:`GithubRequest`
         '''
         assert type(credentials) is GithubCredentials,\
             'Credentials object is not of type GithubCredentials'
         self.credentials = credentials
-        self.github_request = GithubRequest(credentials=credentials)
+        self.github_request = GithubRequest(
+            credentials=credentials, pool_size=pool_size,
+            keep_alive=keep_alive, timeout=timeout, api_url=api_url,
+            retries=retries, max_wait=max_wait, metrics=metrics,
+            response_cache=response_cache)
+        super(GithubStore, self).__init__(
+            index_size=index_size, index_ttl=index_ttl)
+        self.dedup = dedup
+
+    def lookup(self, culprit, labels):
+        """Returns the latest issue of ``culprit``, shared by another process
+        through the dedup table or found by a search.
 
-    def create_or_update_issue(self, title, body, culprit, labels, **kwargs):
-        '''Creates or comments on existing issue in the store.
-
-        :params title: title for the issue
-        :params body: body, the content of the issue
-        :params culprit: string used to identify the cause of the issue,
-            also used for aggregation
-        :params labels: (optional) list of labels attached to the issue
-        :returns: issue object
         :rtype: :class:`exreporter.stores.github.GithubIssue`
-        '''
-        issues = self.search(q=culprit, labels=labels)
-        self.time_delta = kwargs.pop('time_delta')
-        self.max_comments = kwargs.pop('max_comments')
+        """
+        if self.dedup is not None:
+            entry = self.dedup.get(culprit)
+            if entry is not None:
+                return GithubIssue(github_request=self.github_request, **entry)
 
+        delay = self.github_request.delay('search')
+        if delay > self.github_request.max_wait:
+            # fail before waiting longer than allowed for the search budget,
+            # so that a spool or dispatcher can retry the report later
+            raise RateLimitExceeded('search', delay)
+
+        issues = self.search(q=culprit, labels=labels)
         if issues:
-            latest_issue = issues.pop(0)
+            return issues.pop(0)
+
+    def _create_once(self, culprit, title, body, labels, max_comments,
+                     time_delta):
+        if self.dedup is None:
+            return self.create_issue(title=title, body=body, labels=labels)
+
+        claimed, entry = self.dedup.wait(culprit)
+        if not claimed and entry is None:
+            # another process is still creating the issue, this occurrence
+            # is dropped as one within ``time_delta`` of it
+            return None
+        if not claimed:
             return self.handle_issue_comment(
-                issue=latest_issue, title=title, body=body, **kwargs)
-        else:
-            return self.create_issue(
-                title=title, body=body, **kwargs)
+                issue=GithubIssue(github_request=self.github_request, **entry),
+                title=title, body=body, labels=labels,
+                max_comments=max_comments, time_delta=time_delta)
+
+        try:
+            return self.create_issue(title=title, body=body, labels=labels)
+        except Exception:
+            self.dedup.release(culprit)
+            raise
+
+    def _remember(self, culprit, issue):
+        super(GithubStore, self)._remember(culprit, issue)
+        if self.dedup is not None:
+            self.dedup.put(culprit, IssueIndex.entry(issue))
+
+    def _forget(self, culprit):
+        super(GithubStore, self)._forget(culprit)
+        if self.dedup is not None:
+            self.dedup.invalidate(culprit)
 
     def search(self, q, labels, state='open,closed', **kwargs):
         """Search for issues in Github.
@@ -78,7 +139,8 @@ class GithubStore(object):
         :rtype: list
 
         """
-        search_result = self.github_request.search(q=q, state=state, **kwargs)
+        search_result = self.github_request.search(
+            q=q, state=state, labels=labels, **kwargs)
         if search_result['total_count'] > 0:
             return list(
                 map(lambda issue_dict: GithubIssue(
@@ -86,26 +148,6 @@ class GithubStore(object):
                     search_result['items'])
             )
 
-    def handle_issue_comment(self, issue, title, body, **kwargs):
-        """Decides whether to comment or create a new issue when trying to comment.
-
-        :param issue: issue on which the comment is to be added
-        :param title: title of the issue if new one is to be created
-        :param body: body of the issue/comment to be created
-        :returns: newly created issue or the one on which comment was created
-        :rtype: :class:`exreporter.stores.github.GithubIssue`
-
-        """
-        if self._is_time_delta_valid(issue.updated_time_delta):
-            if issue.comments_count < self.max_comments:
-                issue.comment(body=body)
-                return issue
-            else:
-                return self.create_issue(title=title, body=body, **kwargs)
-
-    def _is_time_delta_valid(self, delta):
-        return delta > self.time_delta
-
     def create_issue(self, title, body, labels=None):
         """Creates a new issue in Github.
 
@@ -122,8 +164,15 @@ class GithubStore(object):
 
 class GithubIssue(object):
     """Python object representation of issue on Github.
+
+    Only the attributes used by the store are kept, ``updated_at`` as
+    seconds since the epoch. The full JSON data is fetched from Github by
+    :meth:`fetch` when needed.
     """
 
+    __slots__ = ('github_request', 'number', 'url', 'comments_url', 'state',
+                 'comments', 'updated_at')
+
     def __init__(self, github_request, **kwargs):
         """Initializes Github issue object.
         For **kwargs please refer Github's documentation:
@@ -132,8 +181,20 @@ class GithubIssue(object):
         :params github_request: object of :class:`GithubRequest` used to make HTTP requests to Github
         """
         self.github_request = github_request
-        for attr, value in kwargs.items():
-            setattr(self, attr, value)
+        self.number = kwargs.get('number')
+        self.url = kwargs.get('url')
+        self.comments_url = kwargs.get('comments_url')
+        self.state = kwargs.get('state')
+        self.comments = kwargs.get('comments')
+        self.updated_at = parse_time(kwargs.get('updated_at'))
+
+    def fetch(self):
+        """Fetches the JSON data of the issue from Github.
+
+        :returns: dict of JSON data returned by Github
+        :rtype: `dict`
+        """
+        return self.github_request.issue(issue=self)
 
     @property
     def comments_count(self):
@@ -145,12 +206,7 @@ class GithubIssue(object):
     def updated_time_delta(self):
         """Returns the number of seconds ago the issue was updated from current time.
         """
-        local_timezone = tzlocal()
-        update_at = datetime.datetime.strptime(self.updated_at, '%Y-%m-%dT%XZ')
-        update_at_utc = pytz.utc.localize(update_at)
-        update_at_local = update_at_utc.astimezone(local_timezone)
-        delta = datetime.datetime.now(local_timezone) - update_at_local
-        return int(delta.total_seconds())
+        return int(time.time() - self.updated_at)
 
     def open_issue(self):
         """Changes the state of issue to 'open'.
@@ -166,13 +222,112 @@ class GithubIssue(object):
         :rtype: :class:`exreporter.stores.github.GithubIssue`
         """
         self.github_request.comment(issue=self, body=body)
+        self.commented()
 
         if self.state == 'closed':
             self.open_issue()
         return self
 
+    def commented(self):
+        """Updates comment count and update time after a comment was added.
+        """
+        self.comments = self.comments_count + 1
+        self.updated_at = time.time()
+
+
+class IssueIndex(object):
+    """Local index mapping a culprit to the issue it was last reported on.
+
+    Entries are populated from search results and newly created issues so
+    that repeat occurrences can be commented on without calling the search
+    API. Entries expire after ``ttl`` seconds and the least recently used
+    culprits are evicted once ``max_size`` is reached.
+    """
+
+    fields = ('number', 'url', 'comments_url', 'state', 'comments',
+              'updated_at')
+
+    def __init__(self, max_size=1024, ttl=300):
+        self._cache = LRUCache(max_size=max_size, ttl=ttl)
+
+    def __len__(self):
+        return len(self._cache)
+
+    def get(self, culprit):
+        """Returns the indexed issue attributes for ``culprit`` or ``None``.
+
+        :rtype: `dict`
+        """
+        entry = self._cache.get(culprit)
+        if entry is not None:
+            return dict(entry)
+
+    def put(self, culprit, issue):
+        """Indexes ``issue`` under ``culprit``.
+
+        :params issue: object of :class:`GithubIssue`
+        """
+        self._cache.set(culprit, self.entry(issue))
+
+    @classmethod
+    def entry(cls, issue):
+        """Returns the attributes of ``issue`` kept by the index.
+
+        :rtype: `dict`
+        """
+        return dict(
+            (field, getattr(issue, field, None)) for field in cls.fields)
+
+    def invalidate(self, culprit):
+        """Forgets the issue indexed under ``culprit``.
+        """
+        self._cache.pop(culprit)
+
+
+class GithubEndpoints(object):
+    """URLs and payloads of the Github API, shared by the Github clients.
+    """
+
+    api_url = 'https://api.github.com'
+
+    def __init__(self, credentials, api_url=None):
+        self.user = credentials.user
+        self.repo = credentials.repo
+        if api_url is not None:
+            self.api_url = api_url.rstrip('/')
+
+    def issues_url(self):
+        """Returns the URL of the issues of the repository.
+        """
+        return "{}/repos/{}/{}/issues".format(
+            self.api_url, self.user, self.repo)
+
+    def issue_data(self, title, body, labels):
+        """Returns the JSON data to create an issue with.
+        """
+        data = {
+            'title': title,
+            'body': body,
+        }
+
+        if labels:
+            data.update({'labels': labels})
+        return data
+
+    def search_url(self, q, state, labels):
+        """Returns the URL to search issues of the repository with.
+        """
+        # TODO: add support for search with labels
+        labels = ['"{}"'.format(label) for label in labels]
+        q = "'{}'+state:{}+label:{}".format(
+            q, '+state:'.join(state.split(',')), ','.join(labels))
+        sort = "updated"
+
+        return "{}/search/issues?q={}+repo:{}/{}&sort={}".format(
+            self.api_url, q, self.user, self.repo, sort)
 
-class GithubRequest(object):
+
+class GithubRequest(GithubEndpoints):
     """This class objects are created with valid credentials.
     The objects have methods to create/update issues and to add comments on Github.
 
@@ -183,13 +338,55 @@ class GithubRequest(object):
       >>> gr.create(title="title", body="body", labels=['labels'])
     """
 
-    def __init__(self, credentials):
-        self.user = credentials.user
-        self.repo = credentials.repo
+    def __init__(self, credentials, pool_size=10, keep_alive=True,
+                 timeout=10, api_url=None, retries=2, backoff=1.0,
+                 max_wait=0, metrics=None, response_cache=None):
+        '''Initializes the HTTP session used for all requests to Github.
+
+        :params credentials: object of :class:`GithubCredentials` with proper credentials
+        :params pool_size: (optional) maximum number of pooled connections, default value is ``10``
+        :params keep_alive: (optional) boolean specifying whether connections are reused, default ``True``
+        :params timeout: (optional) seconds to wait for Github, either a number or a
+            ``(connect, read)`` tuple, default value is ``10``
+        :params api_url: (optional) base URL of the Github API, eg: of a local
+            stand-in, default value is ``'https://api.github.com'``
+        :params retries: (optional) number of retries of requests failed with a
+            rate limit ``403`` or ``429``, or of ``GET`` requests failed with ``5xx``,
+            default value is ``2``
+        :params backoff: (optional) seconds to wait before the first retry when Github
+            sends no ``Retry-After`` header, doubled on every retry, default value is ``1.0``
+        :params max_wait: (optional) maximum seconds to wait for the rate limit, or
+            before a retry, on the calling thread before raising
+            :class:`exreporter.stores.base.RateLimitExceeded`, default value is ``0``,
+            leaving retries to a spool or a background thread
+        :params metrics: (optional) metrics hook, eg: :class:`exreporter.metrics.MetricsRegistry`,
+            receiving timings and counts of API calls by endpoint and status
+        :params response_cache: (optional) object of :class:`exreporter.httpcache.ResponseCache`,
+            when given ``GET`` requests are conditional and answered from the cache on ``304``
+        '''
+        super(GithubRequest, self).__init__(
+            credentials=credentials, api_url=api_url)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_wait = max_wait
+        self.metrics = metrics
+        self.response_cache = response_cache
+        self.rate_limits = {
+            'core': RateLimitBucket(),
+            'search': RateLimitBucket(),
+        }
         self.session = requests.Session()
         self.session.headers.update({
             'Authorization': 'token {}'.format(credentials.auth_token)
         })
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
 
     def create(self, title, body, labels):
         """Create an issue in Github.
@@ -203,21 +400,10 @@ class GithubRequest(object):
         :rtype: `dict`
 
         """
-        url = "https://api.github.com/repos/{}/{}/issues".format(
-            self.user, self.repo)
+        url = self.issues_url()
+        data = self.issue_data(title=title, body=body, labels=labels)
 
-        data = {
-            'title': title,
-            'body': body,
-        }
-
-        if labels:
-            data.update({'labels': labels})
-
-        response = self.session.post(url, json.dumps(data))
-
-        assert response.status_code == 201
-        return json.loads(response.content)
+        return self._send('post', url, 201, data=data, endpoint='create')
 
     def comment(self, issue, body):
         """Comment on existing issue on Github.
@@ -233,10 +419,19 @@ class GithubRequest(object):
         url = issue.comments_url
         data = {'body': body}
 
-        response = self.session.post(url, json.dumps(data))
-        assert response.status_code == 201
+        return self._send('post', url, 201, data=data, endpoint='comment')
+
+    def issue(self, issue):
+        """Get an existing issue from Github.
+        For JSON data returned by Github refer:
+        https://developer.github.com/v3/issues/#get-a-single-issue
 
-        return json.loads(response.content)
+        :param issue: object of existing issue
+        :returns: dict of JSON data returned by Github.
+        :rtype: `dict`
+
+        """
+        return self._send('get', issue.url, 200, endpoint='issue')
 
     def update(self, issue, **kwargs):
         """Update an existing issue on Github.
@@ -250,10 +445,7 @@ class GithubRequest(object):
         """
         url = issue.url
 
-        response = self.session.patch(url, json.dumps(kwargs))
-
-        assert response.status_code == 200
-        return json.loads(response.content)
+        return self._send('patch', url, 200, data=kwargs, endpoint='update')
 
     def search(self, q, state, labels):
         """Search for issues in Github.
@@ -267,16 +459,89 @@ class GithubRequest(object):
         :rtype: `dict`
 
         """
-        # TODO: add support for search with labels
-        labels = ['"{}"'.format(label) for label in labels]
-        q = "'{}'+state:{}+label:{}".format(
-            q, '+state:'.join(state.split(',')), ','.join(labels))
-        sort = "updated"
+        url = self.search_url(q=q, state=state, labels=labels)
+
+        return self._send(
+            'get', url, 200, resource='search', endpoint='search')
 
-        url = "https://api.github.com/search/"\
-              "issues?q={}+repo:{}/{}&sort={}".format(
-                  q, self.user, self.repo, sort)
+    def remaining(self, resource='core'):
+        """Returns the number of requests left to ``resource`` in the current
+        rate limit window, ``None`` before the first response.
 
-        response = self.session.get(url)
-        assert response.status_code == 200
-        return json.loads(response.content)
+        :params resource: ``'core'`` or ``'search'``
+        """
+        return self.rate_limits[resource].remaining
+
+    def delay(self, resource='core'):
+        """Returns the number of seconds until a request to ``resource`` is
+        allowed by the rate limit.
+        """
+        return self.rate_limits[resource].delay()
+
+    def _send(self, method, url, expected, data=None, resource='core',
+              endpoint=None):
+        bucket = self.rate_limits[resource]
+        args = () if data is None else (json.dumps(data),)
+        metrics = self.metrics
+        cache = self.response_cache if method == 'get' else None
+        kwargs = {'timeout': self.timeout}
+        if cache is not None:
+            kwargs['headers'] = cache.headers(url)
+
+        for attempt in range(self.retries + 1):
+            delay = bucket.delay()
+            if delay > self.max_wait:
+                if metrics is not None:
+                    metrics.increment(
+                        'api_calls', endpoint=endpoint, status='rate-limited')
+                raise RateLimitExceeded(resource, delay)
+            if delay:
+                time.sleep(delay)
+            response = self._call(bucket, method, url, args, kwargs, endpoint)
+
+            if response.status_code == 304 and kwargs.get('headers'):
+                cached = cache.get(url)
+                if cached is not None:
+                    return cached[2]
+                # evicted since the request was sent, ask for the payload
+                del kwargs['headers']
+                response = self._call(
+                    bucket, method, url, args, kwargs, endpoint)
+            if response.status_code == expected:
+                payload = json.loads(response.content)
+                if cache is not None:
+                    cache.set(
+                        url, response.headers.get('ETag'),
+                        response.headers.get('Last-Modified'), payload)
+                return payload
+            if not self._is_retryable(method, response) or\
+                    attempt == self.retries:
+                break
+            bucket.block(retry_after(
+                response.headers, attempt, backoff=self.backoff))
+
+        assert response.status_code == expected
+
+    def _call(self, bucket, method, url, args, kwargs, endpoint):
+        metrics = self.metrics
+        bucket.take()
+        if metrics is not None:
+            started = monotonic()
+        response = getattr(self.session, method)(url, *args, **kwargs)
+        bucket.update(response.headers)
+        if metrics is not None:
+            metrics.timing(
+                'api_call', monotonic() - started, endpoint=endpoint)
+            metrics.increment(
+                'api_calls', endpoint=endpoint, status=response.status_code)
+        return response
+
+    def _is_retryable(self, method, response):
+        # rate limited requests were not processed, a write failed with a
+        # server error may have been, and is not sent twice
+        if response.status_code == 403:
+            return 'Retry-After' in response.headers or\
+                response.headers.get('X-RateLimit-Remaining') == '0'
+        if response.status_code == 429:
+            return True
+        return method == 'get' and response.status_code >= 500
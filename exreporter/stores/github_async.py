@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.stores.github_async
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module implements an asyncio native Github issue store for exreporter.
+Requests go through a pluggable transport; the default one is built on
+``aiohttp``, which is only imported when the transport is first used.
+
+Basic Usage:
+
+  >>> from exreporter.stores.github_async import AsyncGithubStore
+  >>> gs = AsyncGithubStore(credentials=gc, max_concurrency=4)
+  >>> issue = await gs.create_or_update_issue(
+  ...     title='title', body='body', culprit='culprit', labels=['Bug'],
+  ...     max_comments=50, time_delta=10)
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import json
+import asyncio
+
+from .github import (
+    GithubCredentials, GithubEndpoints, GithubIssue, IssueIndex)
+from .base import COMMENT, CREATE, aggregate
+
+
+class AiohttpTransport(object):
+    """Pooled HTTP transport built on an ``aiohttp.ClientSession``.
+
+    A transport is any object with a ``request`` coroutine taking the method,
+    URL, headers, body and timeout and returning the status code and body of
+    the response, and a ``close`` coroutine. Any such object, eg: a local
+    stand-in for Github, can be passed to :class:`AsyncGithubRequest`.
+    """
+
+    def __init__(self, pool_size=10, keep_alive=True):
+        '''Initializes the transport, the session is created on first use.
+
+        :params pool_size: (optional) maximum number of pooled connections, default value is ``10``
+        :params keep_alive: (optional) boolean specifying whether connections are reused, default ``True``
+        '''
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.session = None
+
+    def _session(self):
+        if self.session is None or self.session.closed:
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size, force_close=not self.keep_alive)
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    async def request(self, method, url, headers, data=None, timeout=10):
+        """Sends a request and returns the status code and body of the response.
+
+        :params timeout: seconds to wait, either a number or a ``(connect, read)`` tuple
+        :rtype: `tuple`
+        """
+        import aiohttp
+
+        if isinstance(timeout, tuple):
+            timeout = aiohttp.ClientTimeout(
+                sock_connect=timeout[0], sock_read=timeout[1])
+        else:
+            timeout = aiohttp.ClientTimeout(total=timeout)
+
+        async with self._session().request(
+                method, url, headers=headers, data=data,
+                timeout=timeout) as response:
+            return response.status, await response.text()
+
+    async def close(self):
+        """Closes the pooled connections.
+        """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class AsyncGithubRequest(GithubEndpoints):
+    """Asyncio counterpart of :class:`exreporter.stores.github.GithubRequest`.
+
+    At most ``max_concurrency`` requests to Github are in flight at a time,
+    further ones wait for a free slot without blocking the event loop.
+    """
+
+    def __init__(self, credentials, transport=None, max_concurrency=10,
+                 timeout=10, api_url=None):
+        '''Initializes the client.
+
+        :params credentials: object of :class:`GithubCredentials` with proper credentials
+        :params transport: (optional) transport used to send requests, default is
+            an :class:`AiohttpTransport`
+        :params max_concurrency: (optional) maximum number of requests in flight, default value is ``10``
+        :params timeout: (optional) seconds to wait for Github, either a number or a
+            ``(connect, read)`` tuple, default value is ``10``
+        :params api_url: (optional) base URL of the Github API
+        '''
+        super(AsyncGithubRequest, self).__init__(
+            credentials=credentials, api_url=api_url)
+        self.transport = transport or AiohttpTransport(
+            pool_size=max_concurrency)
+        self.timeout = timeout
+        self.headers = {
+            'Authorization': 'token {}'.format(credentials.auth_token),
+            'Content-Type': 'application/json',
+        }
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _request(self, method, url, expected, data=None):
+        if data is not None:
+            data = json.dumps(data)
+
+        async with self._semaphore:
+            status, content = await self.transport.request(
+                method, url, headers=self.headers, data=data,
+                timeout=self.timeout)
+
+        assert status == expected
+        return json.loads(content)
+
+    async def create(self, title, body, labels):
+        """Create an issue in Github.
+
+        :returns: dict of JSON data returned by Github of newly created issue
+        :rtype: `dict`
+        """
+        return await self._request(
+            'POST', self.issues_url(), 201,
+            data=self.issue_data(title=title, body=body, labels=labels))
+
+    async def comment(self, issue, body):
+        """Comment on existing issue on Github.
+
+        :returns: dict of JSON data returned by Github of the new comment
+        :rtype: `dict`
+        """
+        return await self._request(
+            'POST', issue.comments_url, 201, data={'body': body})
+
+    async def issue(self, issue):
+        """Get an existing issue from Github.
+
+        :returns: dict of JSON data returned by Github.
+        :rtype: `dict`
+        """
+        return await self._request('GET', issue.url, 200)
+
+    async def update(self, issue, **kwargs):
+        """Update an existing issue on Github.
+
+        :returns: dict of JSON data returned by Github.
+        :rtype: `dict`
+        """
+        return await self._request('PATCH', issue.url, 200, data=kwargs)
+
+    async def search(self, q, state, labels):
+        """Search for issues in Github.
+
+        :returns: dictionary of JSON data returned by Github
+        :rtype: `dict`
+        """
+        return await self._request(
+            'GET', self.search_url(q=q, state=state, labels=labels), 200)
+
+    async def close(self):
+        """Closes the transport.
+        """
+        await self.transport.close()
+
+
+class AsyncGithubIssue(GithubIssue):
+    """Github issue whose updates are coroutines.
+    """
+
+    __slots__ = ()
+
+    async def fetch(self):
+        """Fetches the JSON data of the issue from Github.
+
+        :rtype: `dict`
+        """
+        return await self.github_request.issue(issue=self)
+
+    async def open_issue(self):
+        """Changes the state of issue to 'open'.
+        """
+        await self.github_request.update(issue=self, state='open')
+        self.state = 'open'
+
+    async def comment(self, body):
+        """Adds a comment to the issue.
+
+        :returns: issue object
+        :rtype: :class:`exreporter.stores.github_async.AsyncGithubIssue`
+        """
+        await self.github_request.comment(issue=self, body=body)
+        self.commented()
+
+        if self.state == 'closed':
+            await self.open_issue()
+        return self
+
+
+class AsyncGithubStore(object):
+    """Asyncio counterpart of :class:`exreporter.stores.github.GithubStore`.
+    """
+
+    def __init__(self, credentials, transport=None, max_concurrency=10,
+                 index_size=1024, index_ttl=300, timeout=10, api_url=None):
+        '''Initializes Github issue store.
+
+        :params credentials: object of :class:`GithubCredentials` with proper credentials
+        :params transport: (optional) see :class:`AsyncGithubRequest`
+        :params max_concurrency: (optional) see :class:`AsyncGithubRequest`
+        :params index_size: (optional) see :class:`exreporter.stores.github.GithubStore`
+        :params index_ttl: (optional) see :class:`exreporter.stores.github.GithubStore`
+        :params timeout: (optional) see :class:`AsyncGithubRequest`
+        :params api_url: (optional) see :class:`AsyncGithubRequest`
+        '''
+        assert type(credentials) is GithubCredentials,\
+            'Credentials object is not of type GithubCredentials'
+        self.credentials = credentials
+        self.github_request = AsyncGithubRequest(
+            credentials=credentials, transport=transport,
+            max_concurrency=max_concurrency, timeout=timeout,
+            api_url=api_url)
+        self.index = IssueIndex(
+            max_size=index_size, ttl=index_ttl) if index_size else None
+
+    async def create_or_update_issue(self, title, body, culprit, labels,
+                                     max_comments=50, time_delta=10,
+                                     **kwargs):
+        '''Creates or comments on existing issue in the store.
+
+        :returns: issue object
+        :rtype: :class:`exreporter.stores.github_async.AsyncGithubIssue`
+        '''
+        latest_issue = await self._lookup(culprit=culprit, labels=labels)
+
+        try:
+            if latest_issue is not None:
+                issue = await self.handle_issue_comment(
+                    issue=latest_issue, title=title, body=body,
+                    labels=labels, max_comments=max_comments,
+                    time_delta=time_delta, **kwargs)
+            else:
+                issue = await self.create_issue(
+                    title=title, body=body, labels=labels, **kwargs)
+        except Exception:
+            if self.index is not None:
+                self.index.invalidate(culprit)
+            raise
+
+        if self.index is not None and issue is not None:
+            self.index.put(culprit, issue)
+        return issue
+
+    async def _lookup(self, culprit, labels):
+        if self.index is not None:
+            entry = self.index.get(culprit)
+            if entry is not None:
+                return AsyncGithubIssue(
+                    github_request=self.github_request, **entry)
+
+        issues = await self.search(q=culprit, labels=labels)
+        if issues:
+            return issues.pop(0)
+
+    async def search(self, q, labels, state='open,closed', **kwargs):
+        """Search for issues in Github.
+
+        :returns: list of issue objects
+        :rtype: list
+        """
+        search_result = await self.github_request.search(
+            q=q, state=state, labels=labels, **kwargs)
+        if search_result['total_count'] > 0:
+            return [
+                AsyncGithubIssue(
+                    github_request=self.github_request, **issue_dict)
+                for issue_dict in search_result['items']]
+
+    async def handle_issue_comment(self, issue, title, body, max_comments=50,
+                                   time_delta=10, **kwargs):
+        """Decides whether to comment or create a new issue when trying to comment.
+
+        :returns: newly created issue or the one on which comment was created
+        :rtype: :class:`exreporter.stores.github_async.AsyncGithubIssue`
+        """
+        action = aggregate(issue, max_comments, time_delta)
+        if action == COMMENT:
+            return await issue.comment(body=body)
+        elif action == CREATE:
+            return await self.create_issue(title=title, body=body, **kwargs)
+
+    async def create_issue(self, title, body, labels=None):
+        """Creates a new issue in Github.
+
+        :returns: newly created issue
+        :rtype: :class:`exreporter.stores.github_async.AsyncGithubIssue`
+        """
+        kwargs = await self.github_request.create(
+            title=title, body=body, labels=labels)
+        return AsyncGithubIssue(github_request=self.github_request, **kwargs)
+
+    async def close(self):
+        """Closes the pooled connections to Github.
+        """
+        await self.github_request.close()
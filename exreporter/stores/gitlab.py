@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.stores.gitlab
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module implements GitLab issue store for exreporter.
+
+Basic Usage:
+
+  >>> from exreporter.stores.gitlab import GitlabCredentials, GitlabStore
+  >>> gl = GitlabCredentials(project='group/project', auth_token='token')
+  >>> reporter = ExReporter(store=GitlabStore(credentials=gl))
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import json
+import time
+import requests
+
+try:
+    from urllib.parse import quote
+except ImportError:  # pragma: no cover
+    from urllib import quote
+
+from .base import IssueStore, parse_time
+
+
+class GitlabCredentials(object):
+    """GitLab credentials.
+
+    :params project: numeric id or ``'namespace/project'`` path of the project
+    :params auth_token: personal, project or group access token with the ``api`` scope
+    """
+
+    def __init__(self, project, auth_token):
+        self.project, self.auth_token = project, auth_token
+
+
+class GitlabStore(IssueStore):
+    """GitLab Issue Store.
+
+    A batch of reports looks up the issues of all its culprits in one
+    request listing the most recently updated issues.
+    """
+
+    def __init__(self, credentials, index_size=1024, index_ttl=300,
+                 pool_size=10, timeout=10, api_url=None, prefetch_size=100):
+        '''Initializes GitLab issue store.
+
+        :params credentials: object of :class:`GitlabCredentials`
+        :params index_size: (optional) see :class:`exreporter.stores.base.IssueStore`
+        :params index_ttl: (optional) see :class:`exreporter.stores.base.IssueStore`
+        :params pool_size: (optional) see :class:`GitlabRequest`
+        :params timeout: (optional) see :class:`GitlabRequest`
+        :params api_url: (optional) see :class:`GitlabRequest`
+        :params prefetch_size: (optional) number of recently updated issues listed
+            to look up the culprits of a batch, default value is ``100``
+        '''
+        assert type(credentials) is GitlabCredentials,\
+            'Credentials object is not of type GitlabCredentials'
+        super(GitlabStore, self).__init__(
+            index_size=index_size, index_ttl=index_ttl)
+        self.credentials = credentials
+        self.prefetch_size = prefetch_size
+        self.gitlab_request = GitlabRequest(
+            credentials=credentials, pool_size=pool_size, timeout=timeout,
+            api_url=api_url)
+
+    def lookup(self, culprit, labels):
+        issues = self.gitlab_request.search(q=culprit, labels=labels)
+        if issues:
+            return GitlabIssue(gitlab_request=self.gitlab_request, **issues[0])
+
+    def prefetch(self, culprits, labels):
+        issues = self.gitlab_request.search(
+            labels=labels, per_page=self.prefetch_size)
+        found = {}
+        for data in issues:
+            description = data.get('description') or ''
+            for culprit in culprits:
+                if culprit not in found and culprit in description:
+                    found[culprit] = GitlabIssue(
+                        gitlab_request=self.gitlab_request, **data)
+        return found
+
+    def create_issue(self, title, body, labels=None):
+        data = self.gitlab_request.create(
+            title=title, body=body, labels=labels)
+        return GitlabIssue(gitlab_request=self.gitlab_request, **data)
+
+
+class GitlabIssue(object):
+    """Python object representation of issue on GitLab.
+    """
+
+    __slots__ = ('gitlab_request', 'iid', 'state', 'comments', 'updated_at')
+
+    def __init__(self, gitlab_request, **kwargs):
+        self.gitlab_request = gitlab_request
+        self.iid = kwargs.get('iid')
+        self.state = kwargs.get('state')
+        self.comments = kwargs.get('user_notes_count') or 0
+        self.updated_at = parse_time(kwargs.get('updated_at'))
+
+    @property
+    def comments_count(self):
+        return self.comments
+
+    @property
+    def updated_time_delta(self):
+        return int(time.time() - self.updated_at)
+
+    def comment(self, body):
+        """Adds a comment to the issue, reopening it if closed.
+
+        :rtype: :class:`GitlabIssue`
+        """
+        self.gitlab_request.comment(issue=self, body=body)
+        self.comments += 1
+        self.updated_at = time.time()
+
+        if self.state == 'closed':
+            self.gitlab_request.update(issue=self, state_event='reopen')
+            self.state = 'opened'
+        return self
+
+
+class GitlabRequest(object):
+    """HTTP client of the GitLab issues API.
+    """
+
+    api_url = 'https://gitlab.com/api/v4'
+
+    def __init__(self, credentials, pool_size=10, timeout=10, api_url=None):
+        '''Initializes the HTTP session used for all requests to GitLab.
+
+        :params credentials: object of :class:`GitlabCredentials`
+        :params pool_size: (optional) maximum number of pooled connections, default value is ``10``
+        :params timeout: (optional) seconds to wait for GitLab, default value is ``10``
+        :params api_url: (optional) base URL of the GitLab API, eg: of a
+            self-managed instance, default value is ``'https://gitlab.com/api/v4'``
+        '''
+        if api_url is not None:
+            self.api_url = api_url.rstrip('/')
+        self.timeout = timeout
+        self.project_url = '{}/projects/{}'.format(
+            self.api_url, quote('{}'.format(credentials.project), safe=''))
+        self.session = requests.Session()
+        self.session.headers.update({
+            'PRIVATE-TOKEN': credentials.auth_token,
+            'Content-Type': 'application/json',
+        })
+
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def issue_url(self, issue):
+        return '{}/issues/{}'.format(self.project_url, issue.iid)
+
+    def search(self, q=None, labels=None, per_page=20):
+        """Returns the issues whose description contains ``q``, the most
+        recently updated first.
+
+        :rtype: `list`
+        """
+        params = {
+            'order_by': 'updated_at',
+            'sort': 'desc',
+            'scope': 'all',
+            'per_page': per_page,
+        }
+        if q is not None:
+            params.update({'search': q, 'in': 'description'})
+        if labels:
+            params['labels'] = ','.join(labels)
+
+        return self._send(
+            'get', '{}/issues'.format(self.project_url), 200, params=params)
+
+    def create(self, title, body, labels=None):
+        data = {'title': title, 'description': body}
+        if labels:
+            data['labels'] = ','.join(labels)
+
+        return self._send(
+            'post', '{}/issues'.format(self.project_url), 201, data=data)
+
+    def comment(self, issue, body):
+        return self._send(
+            'post', '{}/notes'.format(self.issue_url(issue)), 201,
+            data={'body': body})
+
+    def update(self, issue, **kwargs):
+        return self._send('put', self.issue_url(issue), 200, data=kwargs)
+
+    def _send(self, method, url, expected, data=None, params=None):
+        args = () if data is None else (json.dumps(data),)
+        response = getattr(self.session, method)(
+            url, *args, params=params, timeout=self.timeout)
+
+        assert response.status_code == expected
+        return json.loads(response.content)
@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.stores.sqlite
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+This module implements a local issue store kept in a SQLite database, for
+batch jobs raising large numbers of exceptions and for staging deployments.
+Issues, comments and every occurrence are recorded with the aggregation
+rules of the Github store, and a sync job promotes the aggregated issues to
+another store, eg: Github, on a schedule.
+
+Basic Usage:
+
+  >>> from exreporter.stores.sqlite import SqliteStore, SqliteSync
+  >>> local = SqliteStore(path='/var/tmp/exreporter.issues')
+  >>> reporter = ExReporter(store=local)
+  >>> SqliteSync(local, target=gs, interval=300).start()
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+from .._sqlite import Database
+from ..formats import Formats, format_time
+from .base import BaseStore, COMMENT, CREATE, aggregate
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS issues (
+    id INTEGER PRIMARY KEY,
+    culprit TEXT NOT NULL,
+    title TEXT NOT NULL,
+    body TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    comments INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    synced_through INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS issues_culprit ON issues (culprit, updated_at);
+CREATE TABLE IF NOT EXISTS comments (
+    id INTEGER PRIMARY KEY,
+    issue_id INTEGER NOT NULL REFERENCES issues (id),
+    body TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS comments_issue ON comments (issue_id, id);
+CREATE TABLE IF NOT EXISTS occurrences (
+    id INTEGER PRIMARY KEY,
+    issue_id INTEGER NOT NULL REFERENCES issues (id),
+    occurred_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS occurrences_issue ON occurrences (issue_id, id);
+'''
+
+
+class SqliteStore(BaseStore):
+    """Issue store kept in a SQLite database in WAL mode.
+
+    Each occurrence is recorded on the latest issue of its culprit. The
+    issue is commented on if it was updated more than ``time_delta``
+    seconds ago and has less than ``max_comments`` comments, otherwise a new
+    issue is created, as by :class:`exreporter.stores.github.GithubStore`.
+    A batch of reports is written in a single transaction.
+    """
+
+    def __init__(self, path, synchronous='NORMAL'):
+        '''Initializes the store, the database is created on first use.
+
+        :params path: path of the SQLite database file
+        :params synchronous: (optional) SQLite ``synchronous`` pragma, ``'FULL'``
+            fsyncs every transaction
+        '''
+        self.path = path
+        self.synchronous = synchronous
+
+        self._lock = threading.Lock()
+        self._database = Database(path, SCHEMA, synchronous=synchronous)
+
+    def create_or_update_issue(self, title, body, culprit, labels=None,
+                               **kwargs):
+        '''Creates or comments on existing issue in the store.
+
+        :params title: title for the issue
+        :params body: body, the content of the issue
+        :params culprit: string used to identify the cause of the issue,
+            also used for aggregation
+        :params labels: (optional) list of labels attached to the issue
+        :returns: issue object, or ``None`` when the occurrence was only recorded
+        :rtype: :class:`SqliteIssue`
+        '''
+        result = self.create_or_update_many([dict(
+            kwargs, title=title, body=body, culprit=culprit,
+            labels=labels)])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def create_or_update_many(self, reports):
+        '''Records a batch of reports in one transaction. Each report is
+        recorded on its own, a failed report is rolled back alone.
+
+        :returns: list of the issue object, ``None`` or the exception raised
+            for each report, in the order of ``reports``
+        :rtype: `list`
+        '''
+        results = []
+        with self._lock:
+            connection = self._database.connect()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                for report in reports:
+                    connection.execute('SAVEPOINT report')
+                    try:
+                        results.append(self._record(connection, **report))
+                    except Exception as error:
+                        connection.execute('ROLLBACK TO report')
+                        results.append(error)
+                    connection.execute('RELEASE report')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+        return results
+
+    def issue(self, culprit):
+        '''Returns the latest issue of ``culprit`` or ``None``.
+
+        :rtype: :class:`SqliteIssue`
+        '''
+        with self._lock:
+            return self._latest(self._database.connect(), culprit)
+
+    def occurrences(self, culprit):
+        '''Returns the number of occurrences recorded for ``culprit``.
+        '''
+        with self._lock:
+            return self._database.connect().execute(
+                'SELECT COUNT(*) FROM occurrences JOIN issues '
+                'ON issues.id = occurrences.issue_id '
+                'WHERE issues.culprit = ?', (culprit,)).fetchone()[0]
+
+    def pending(self, limit=100):
+        '''Returns the issues with occurrences not synced yet, oldest first.
+
+        :returns: list of dicts of the ``id``, ``culprit``, ``title``,
+            ``body`` (of the latest comment, else of the issue), ``labels``,
+            ``count``, ``first_seen``, ``last_seen`` and ``through`` (latest
+            occurrence id) of each issue
+        :rtype: `list`
+        '''
+        with self._lock:
+            rows = self._database.connect().execute(
+                'SELECT issues.id, culprit, title, COALESCE(('
+                'SELECT body FROM comments WHERE issue_id = issues.id '
+                'ORDER BY id DESC LIMIT 1), body), labels, '
+                'COUNT(occurrences.id), MIN(occurred_at), MAX(occurred_at), '
+                'MAX(occurrences.id) '
+                'FROM issues JOIN occurrences '
+                'ON occurrences.issue_id = issues.id '
+                'AND occurrences.id > issues.synced_through '
+                'GROUP BY issues.id ORDER BY MIN(occurrences.id) LIMIT ?',
+                (limit,)).fetchall()
+
+        return [dict(
+            id=row[0], culprit=row[1], title=row[2], body=row[3],
+            labels=json.loads(row[4]), count=row[5], first_seen=row[6],
+            last_seen=row[7], through=row[8]) for row in rows]
+
+    def mark_synced(self, issue_id, through):
+        '''Marks the occurrences of an issue up to id ``through`` as synced.
+        '''
+        with self._lock:
+            self._database.connect().execute(
+                'UPDATE issues SET synced_through = MAX(synced_through, ?) '
+                'WHERE id = ?', (through, issue_id))
+
+    def close(self):
+        with self._lock:
+            self._database.close()
+
+    def _record(self, connection, title, body, culprit, labels=None,
+                max_comments=50, time_delta=10, **kwargs):
+        now = time.time()
+        issue = self._latest(connection, culprit)
+        action = aggregate(issue, max_comments, time_delta)
+
+        if action == CREATE:
+            cursor = connection.execute(
+                'INSERT INTO issues (culprit, title, body, labels, '
+                'created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (culprit, title, body, json.dumps(labels or []), now, now))
+            issue = SqliteIssue(cursor.lastrowid, culprit, title, 0, now)
+            result = issue
+        elif action == COMMENT:
+            connection.execute(
+                'INSERT INTO comments (issue_id, body, created_at) '
+                'VALUES (?, ?, ?)', (issue.id, body, now))
+            connection.execute(
+                'UPDATE issues SET comments = comments + 1, updated_at = ? '
+                'WHERE id = ?', (now, issue.id))
+            issue.comments += 1
+            issue.updated_at = now
+            result = issue
+        else:
+            result = None
+
+        connection.execute(
+            'INSERT INTO occurrences (issue_id, occurred_at) VALUES (?, ?)',
+            (issue.id, now))
+        return result
+
+    def _latest(self, connection, culprit):
+        row = connection.execute(
+            'SELECT id, culprit, title, comments, updated_at FROM issues '
+            'WHERE culprit = ? ORDER BY updated_at DESC LIMIT 1',
+            (culprit,)).fetchone()
+        if row is not None:
+            return SqliteIssue(*row)
+
+
+class SqliteIssue(object):
+    """Python object representation of issue in a :class:`SqliteStore`.
+    """
+
+    __slots__ = ('id', 'culprit', 'title', 'comments', 'updated_at')
+
+    def __init__(self, id, culprit, title, comments, updated_at):
+        self.id = id
+        self.culprit = culprit
+        self.title = title
+        self.comments = comments
+        self.updated_at = updated_at
+
+    @property
+    def comments_count(self):
+        return self.comments
+
+    @property
+    def updated_time_delta(self):
+        return int(time.time() - self.updated_at)
+
+
+class SqliteSync(object):
+    """Job promoting the issues of a :class:`SqliteStore` to another store.
+
+    Every ``interval`` seconds, each local issue with new occurrences is
+    sent to ``target`` as one report, with the body of its latest comment
+    and the number of occurrences recorded since the previous sync. Issues
+    of the same culprit are promoted as one report. Reports failing in
+    ``target`` are sent again by the next run.
+    """
+
+    def __init__(self, source, target, interval=300, batch_size=100,
+                 max_comments=50):
+        '''Initializes the job, it is scheduled by :meth:`start`.
+
+        :params source: object of :class:`SqliteStore`
+        :params target: store the issues are promoted to, eg:
+            :class:`exreporter.stores.github.GithubStore`
+        :params interval: (optional) seconds between two runs, default value is ``300``
+        :params batch_size: (optional) number of issues promoted per batch, default value is ``100``
+        :params max_comments: (optional) ``max_comments`` of the promoted reports
+        '''
+        self.source = source
+        self.target = target
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_comments = max_comments
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Starts the background thread running the job every ``interval``
+        seconds.
+        """
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            thread = threading.Thread(target=self._run, name='exreporter-sync')
+            thread.daemon = True
+            thread.start()
+            self._pid = os.getpid()
+
+    def run(self):
+        """Promotes the pending issues, batch by batch.
+
+        :returns: number of issues promoted
+        :rtype: `int`
+        """
+        promoted = 0
+        while True:
+            pending = self.source.pending(limit=self.batch_size)
+            if not pending:
+                return promoted
+
+            # issues of a culprit rolled over after max_comments are
+            # promoted as one report, the target would merge them anyway
+            groups = OrderedDict()
+            for issue in pending:
+                groups.setdefault(issue['culprit'], []).append(issue)
+            results = self.target.create_or_update_many(
+                [self._report(issues) for issues in groups.values()])
+
+            failed = 0
+            for issues, result in zip(groups.values(), results):
+                if isinstance(result, Exception):
+                    failed += 1
+                    logger.warning(
+                        'Exreporter failed to promote an issue: %r', result)
+                    continue
+                for issue in issues:
+                    self.source.mark_synced(issue['id'], issue['through'])
+                    promoted += 1
+            if failed or len(pending) < self.batch_size:
+                return promoted
+
+    def _report(self, issues):
+        latest = max(issues, key=lambda issue: issue['last_seen'])
+        return dict(
+            title=latest['title'],
+            body='{}{}'.format(latest['body'], Formats.promoted.format(
+                count=sum(issue['count'] for issue in issues),
+                first_seen=format_time(
+                    min(issue['first_seen'] for issue in issues)),
+                last_seen=format_time(latest['last_seen']))),
+            culprit=latest['culprit'], labels=latest['labels'],
+            max_comments=self.max_comments, time_delta=-1)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.run()
+            except Exception:
+                logger.exception('Exreporter failed to sync issues')
+
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.storm
+~~~~~~~~~~~~~~~~
+
+This module implements storm mode: when occurrences of all culprits
+together come in faster than a threshold, the reporter stops reporting them
+one by one and emits a digest of the most frequent culprits per interval
+instead, until the rate drops again.
+
+Basic Usage:
+
+  >>> from exreporter.storm import StormDetector
+  >>> storm = StormDetector(threshold=5, window=60, interval=300)
+  >>> reporter = ExReporter(store=gs, storm=storm)
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import Counter
+
+from .formats import Formats, format_time
+
+
+logger = logging.getLogger(__name__)
+
+# prefixes of the culprits left out of their labels in digests, eg: 'Culprit- '
+LABEL_PREFIXES = tuple(
+    template.split('{')[0].lstrip('`')
+    for template in (Formats.culprit, Formats.fingerprint))
+
+
+class StormDetector(object):
+    """Sliding window rate of occurrences across all culprits.
+
+    Storm mode starts once more than ``threshold`` occurrences per second
+    came in on average over the last ``window`` seconds, and ends once the
+    rate fell below ``threshold * recovery``. While it lasts, occurrences
+    are only counted, and a digest listing the ``top`` culprits is emitted
+    every ``interval`` seconds and when the storm ends. Culprits are listed
+    by :func:`culprit_hash`.
+    """
+
+    def __init__(self, threshold=5, window=60, interval=300, top=10,
+                 recovery=0.5, max_culprits=1024, tick=1.0):
+        '''Initializes the detector.
+
+        :params threshold: (optional) occurrences per second starting storm mode, default value is ``5``
+        :params window: (optional) seconds the rate is measured over, default value is ``60``
+        :params interval: (optional) seconds between two digests, default value is ``300``
+        :params top: (optional) number of culprits listed in a digest, default value is ``10``
+        :params recovery: (optional) fraction of ``threshold`` under which storm mode ends
+        :params max_culprits: (optional) number of culprits counted during a digest
+            interval, further ones are counted together
+        :params tick: (optional) seconds between two checks of the rate
+        '''
+        self.threshold = threshold
+        self.window = int(window)
+        self.interval = interval
+        self.top = top
+        self.recovery = recovery
+        self.max_culprits = max_culprits
+        self.tick = tick
+        self.emit = None
+        self.storming = False
+
+        self._seconds = [0] * self.window
+        self._counts = [0] * self.window
+        self._culprits = Counter()
+        self._others = 0
+        self._started_at = None
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def start(self, emit):
+        """Sets the callable receiving digests, ``emit(title, body, culprit)``.
+
+        The background thread checking the rate is started on the first
+        occurrence, and restarted after a fork.
+        """
+        self.emit = emit
+
+    @property
+    def rate(self):
+        """Returns the average occurrences per second over the window.
+        """
+        return self._rate(time.time())
+
+    def add(self, culprit):
+        """Counts an occurrence of ``culprit``.
+
+        :returns: ``True`` when storm mode is on and the occurrence should
+            not be reported on its own
+        :rtype: `bool`
+        """
+        self._ensure_ticker()
+        second = int(time.time())
+        slot = second % self.window
+
+        with self._lock:
+            if self._seconds[slot] != second:
+                self._seconds[slot], self._counts[slot] = second, 0
+            self._counts[slot] += 1
+
+            if not self.storming:
+                return False
+            if culprit in self._culprits or\
+                    len(self._culprits) < self.max_culprits:
+                self._culprits[culprit] += 1
+            else:
+                self._others += 1
+            return True
+
+    def check(self, now=None):
+        """Switches storm mode on or off and emits a digest when due.
+
+        :returns: ``True`` if storm mode is on
+        :rtype: `bool`
+        """
+        now = time.time() if now is None else now
+        rate = self._rate(now)
+        digest = None
+
+        with self._lock:
+            if not self.storming and rate > self.threshold:
+                self.storming, self._started_at = True, now
+                logger.warning(
+                    'Exreporter storm mode on, %.1f occurrences per second',
+                    rate)
+            elif self.storming and (
+                    rate < self.threshold * self.recovery or
+                    now - self._started_at >= self.interval):
+                digest = self._digest(self._started_at, now)
+                self._culprits, self._others = Counter(), 0
+                self._started_at = now
+                if rate < self.threshold * self.recovery:
+                    self.storming = False
+                    logger.warning('Exreporter storm mode off')
+
+        if digest is not None:
+            try:
+                self.emit(**digest)
+            except Exception:
+                logger.exception('Exreporter failed to emit a digest')
+        return self.storming
+
+    def _rate(self, now):
+        oldest = int(now) - self.window
+        with self._lock:
+            total = sum(
+                count for second, count in zip(self._seconds, self._counts)
+                if second > oldest)
+        return float(total) / self.window
+
+    def _digest(self, start, end):
+        culprits = self._culprits.most_common(self.top)
+        rows = [
+            Formats.digest_row.format(
+                count=count, culprit=culprit_label(culprit))
+            for culprit, count in culprits]
+        others = sum(self._culprits.values()) + self._others - sum(
+            count for _, count in culprits)
+        if others:
+            rows.append(Formats.digest_row.format(
+                count=others, culprit='others'))
+
+        return dict(
+            title=Formats.digest_title,
+            body=Formats.digest.format(
+                count=sum(self._culprits.values()) + self._others,
+                culprits=len(self._culprits),
+                start=format_time(start), end=format_time(end),
+                rows='\n'.join(rows), culprit=Formats.digest_culprit),
+            culprit=Formats.digest_culprit)
+
+    def _ensure_ticker(self):
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            thread = threading.Thread(target=self._run, name='exreporter-storm')
+            thread.daemon = True
+            thread.start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            time.sleep(self.tick)
+            self.check()
+
+
+def culprit_label(culprit):
+    """Returns the label listing ``culprit`` in digests: the culprit without
+    its backticks and prefix, followed by the first 12 hex digits of its
+    SHA-1, eg: ``/app/views.py>12>ValueError (5d41402abc4b)``.
+
+    Stores find the issue of a culprit by searching issue bodies for it, a
+    digest holding the culprits verbatim would be found instead.
+    """
+    label = culprit.strip('`')
+    for prefix in LABEL_PREFIXES:
+        if label.startswith(prefix):
+            label = label[len(prefix):]
+            break
+    return '{} ({})'.format(
+        label, hashlib.sha1(culprit.encode('utf-8')).hexdigest()[:12])
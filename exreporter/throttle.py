@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+"""
+exreporter.throttle
+~~~~~~~~~~~~~~~~~~~
+
+This module implements an in-memory, per-culprit cooldown gate which lets
+the reporter drop repeat occurrences before any store I/O happens.
+
+Basic Usage:
+
+  >>> from exreporter.throttle import CooldownGate
+  >>> reporter = ExReporter(store=gs, time_delta=10,
+  ...                       cooldown=CooldownGate(max_size=4096))
+
+:copyright: (c) 2014 by Vedarth Kulkarni.
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import threading
+from collections import OrderedDict
+
+from .compat import monotonic
+
+
+class CooldownGate(object):
+    """Remembers when each culprit was last let through.
+
+    An occurrence is let through when at least ``time_delta`` seconds passed
+    since the last one for the same culprit; otherwise it is counted as
+    suppressed. The suppressed count is handed back with the next occurrence
+    that is let through, so it can be mentioned in that report.
+    """
+
+    def __init__(self, max_size=1024):
+        '''Initializes the gate.
+
+        :params max_size: (optional) number of culprits remembered, the least
+            recently seen ones are forgotten first, default value is ``1024``
+        '''
+        self.max_size = max_size
+        self._culprits = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._culprits)
+
+    def allow(self, culprit, time_delta):
+        """Decides whether an occurrence of ``culprit`` should be reported.
+
+        :params culprit: string used to identify the cause of the issue
+        :params time_delta: minimum number of seconds between two reports
+        :returns: tuple of ``(allowed, suppressed)`` where ``suppressed`` is
+            the number of occurrences dropped since the last allowed one
+        :rtype: `tuple`
+        """
+        now = monotonic()
+
+        with self._lock:
+            state = self._culprits.pop(culprit, None)
+
+            if state is not None and now - state[0] < time_delta:
+                state[1] += 1
+                self._culprits[culprit] = state
+                return False, 0
+
+            self._culprits[culprit] = [now, 0]
+            if len(self._culprits) > self.max_size:
+                self._culprits.popitem(last=False)
+            return True, state[1] if state is not None else 0
+
+    def reset(self, culprit=None):
+        """Forgets ``culprit``, or every culprit when none is given.
+        """
+        with self._lock:
+            if culprit is None:
+                self._culprits.clear()
+            else:
+                self._culprits.pop(culprit, None)
@@ -14,8 +14,6 @@ history = open('HISTORY.rst').read().replace('.. :changelog:', '')
 
 requirements = [
     'requests',
-    'pytz',
-    'python-dateutil',
 ]
 
 test_requirements = requirements.extend([
@@ -36,6 +34,14 @@ setup(
                  'exreporter'},
     include_package_data=True,
     install_requires=requirements,
+    extras_require={
+        'async': ['aiohttp'],
+    },
+    entry_points={
+        'console_scripts': [
+            'exreporter-agent = exreporter.agent:main',
+        ],
+    },
     license="MIT",
     zip_safe=False,
     keywords='exreporter',
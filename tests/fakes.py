@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+"""
+fakes
+----------------------------------
+
+Local stand-ins for the parts of the GitLab and Bitbucket issue APIs used
+by `exreporter.stores.gitlab` and `exreporter.stores.bitbucket`, served over
+HTTP on localhost. Issues live in memory.
+"""
+
+import re
+import json
+import time
+import threading
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs, urlsplit
+except ImportError:  # pragma: no cover
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import parse_qs, urlsplit
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class FakeServer(object):
+    """In-memory issue tracker API, routed by :meth:`route`.
+    """
+
+    def __init__(self):
+        self.issues = {}
+        self.comments = []
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                fake._handle(self)
+
+            do_POST = do_PUT = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _Server(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={'poll_interval': 0.01})
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _handle(self, handler):
+        length = int(handler.headers.get('Content-Length') or 0)
+        data = json.loads(handler.rfile.read(length) or '{}')
+        parts = urlsplit(handler.path)
+        query = dict(
+            (key, values[0])
+            for key, values in parse_qs(parts.query).items())
+
+        with self._lock:
+            self.requests.append((handler.command, parts.path))
+            status, body = self.route(
+                handler.command, parts.path, query, data, handler.headers)
+
+        content = json.dumps(body).encode('utf-8')
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(content)))
+        handler.end_headers()
+        handler.wfile.write(content)
+
+
+class FakeGitlab(FakeServer):
+    """GitLab issues API of one project.
+    """
+
+    ISSUES = re.compile(r'^/projects/[^/]+/issues$')
+    ISSUE = re.compile(r'^/projects/[^/]+/issues/(\d+)$')
+    NOTES = re.compile(r'^/projects/[^/]+/issues/(\d+)/notes$')
+
+    def route(self, method, path, query, data, headers):
+        if headers.get('PRIVATE-TOKEN') is None:
+            return 401, {'message': '401 Unauthorized'}
+
+        if self.ISSUES.match(path) and method == 'GET':
+            return 200, self._search(query)
+        if self.ISSUES.match(path) and method == 'POST':
+            iid = len(self.issues) + 1
+            self.issues[iid] = {
+                'iid': iid,
+                'title': data['title'],
+                'description': data['description'],
+                'labels': (data.get('labels') or '').split(','),
+                'state': 'opened',
+                'user_notes_count': 0,
+                'updated_at': _now('%Y-%m-%dT%H:%M:%S.000Z'),
+            }
+            return 201, self.issues[iid]
+
+        match = self.NOTES.match(path)
+        if match and method == 'POST' and int(match.group(1)) in self.issues:
+            issue = self.issues[int(match.group(1))]
+            issue['user_notes_count'] += 1
+            issue['updated_at'] = _now('%Y-%m-%dT%H:%M:%S.000Z')
+            self.comments.append((issue['iid'], data['body']))
+            return 201, {'body': data['body']}
+
+        match = self.ISSUE.match(path)
+        if match and method == 'PUT' and int(match.group(1)) in self.issues:
+            issue = self.issues[int(match.group(1))]
+            if data.get('state_event') == 'reopen':
+                issue['state'] = 'opened'
+            return 200, issue
+
+        return 404, {'message': '404 Not found'}
+
+    def _search(self, query):
+        labels = set(filter(None, query.get('labels', '').split(',')))
+        issues = [
+            issue for issue in sorted(
+                self.issues.values(), key=lambda issue: issue['updated_at'],
+                reverse=True)
+            if query.get('search', '') in issue['description'] and
+            labels.issubset(issue['labels'])]
+        return issues[:int(query.get('per_page', 20))]
+
+
+class FakeBitbucket(FakeServer):
+    """Bitbucket Cloud issues API of one repository.
+    """
+
+    ISSUES = re.compile(r'^/repositories/[^/]+/[^/]+/issues$')
+    ISSUE = re.compile(r'^/repositories/[^/]+/[^/]+/issues/(\d+)$')
+    COMMENTS = re.compile(
+        r'^/repositories/[^/]+/[^/]+/issues/(\d+)/comments$')
+    TERM = re.compile(r'content\.raw ~ ("(?:[^"\\]|\\.)*")')
+
+    def route(self, method, path, query, data, headers):
+        if not headers.get('Authorization', '').startswith('Basic '):
+            return 401, {'type': 'error'}
+
+        if self.ISSUES.match(path) and method == 'GET':
+            return 200, self._search(query)
+        if self.ISSUES.match(path) and method == 'POST':
+            number = len(self.issues) + 1
+            url = '{}{}/{}'.format(self.url, path, number)
+            self.issues[number] = {
+                'id': number,
+                'title': data['title'],
+                'content': data['content'],
+                'kind': data.get('kind'),
+                'state': 'new',
+                'updated_on': _now(),
+                'comments': 0,
+                'links': {
+                    'self': {'href': url},
+                    'comments': {'href': '{}/comments'.format(url)},
+                },
+            }
+            return 201, self._public(self.issues[number])
+
+        match = self.COMMENTS.match(path)
+        if match and int(match.group(1)) in self.issues:
+            issue = self.issues[int(match.group(1))]
+            if method == 'GET':
+                return 200, {'size': issue['comments'], 'values': []}
+            if method == 'POST':
+                issue['comments'] += 1
+                issue['updated_on'] = _now()
+                self.comments.append((issue['id'], data['content']['raw']))
+                return 201, {'content': data['content']}
+
+        match = self.ISSUE.match(path)
+        if match and method == 'PUT' and int(match.group(1)) in self.issues:
+            issue = self.issues[int(match.group(1))]
+            issue.update(data)
+            return 200, self._public(issue)
+
+        return 404, {'type': 'error'}
+
+    def _search(self, query):
+        terms = [
+            json.loads(term) for term in self.TERM.findall(query.get('q', ''))]
+        values = [
+            self._public(issue) for issue in sorted(
+                self.issues.values(), key=lambda issue: issue['updated_on'],
+                reverse=True)
+            if any(term in issue['content']['raw'] for term in terms)]
+        return {'size': len(values), 'values': values}
+
+    def _public(self, issue):
+        return dict(
+            (key, value) for key, value in issue.items() if key != 'comments')
+
+
+def _now(format='%Y-%m-%dT%H:%M:%S.000000+00:00'):
+    return time.strftime(format, time.gmtime())
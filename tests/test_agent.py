@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_agent
+----------------------------------
+
+Tests for `exreporter.agent` module.
+"""
+
+import io
+import os
+import socket
+import stat
+import time
+import shutil
+import tempfile
+import unittest
+from mock import MagicMock
+
+from exreporter.agent import Agent, AgentError, AgentStore, decode, encode
+
+
+class TestMessages(unittest.TestCase):
+
+    def test_round_trip(self):
+        report = {'title': u'title ☃', 'culprit': 'culprit'}
+        stream = io.BytesIO(encode(report) + encode(report)[:-1])
+
+        self.assertEqual(decode(stream), report)
+        self.assertIsNone(decode(stream))
+
+    def test_oversized_message_is_rejected(self):
+        stream = io.BytesIO(encode({'body': 'x' * 100}))
+
+        self.assertRaises(ValueError, decode, stream, max_size=10)
+
+
+class TestAgent(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'agent.sock')
+        self.store = MagicMock()
+        self.store.create_or_update_many.side_effect = lambda reports: [
+            None] * len(reports)
+
+    def report(self, culprit):
+        return dict(
+            title='title', body='body', culprit=culprit, labels=['Bug'],
+            max_comments=50, time_delta=10)
+
+    def agent(self, **kwargs):
+        agent = Agent(self.store, path=self.path, **kwargs).start()
+        self.addCleanup(agent.stop)
+        return agent
+
+    def client(self):
+        client = AgentStore(self.path)
+        self.addCleanup(client.close)
+        return client
+
+    def test_stale_socket_is_replaced(self):
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.path)
+        stale.close()
+
+        self.agent()
+        self.client().create_or_update_issue(**self.report('a'))
+
+    def test_live_agent_and_other_files_are_kept(self):
+        self.agent()
+
+        self.assertRaises(
+            OSError, Agent(self.store, path=self.path).start)
+        self.assertTrue(os.path.exists(self.path))
+
+        other = self.path + '.txt'
+        with open(other, 'w') as f:
+            f.write('data')
+        self.assertRaises(OSError, Agent(self.store, path=other).start)
+        with open(other) as f:
+            self.assertEqual(f.read(), 'data')
+
+    def wait_received(self, agent, count):
+        deadline = time.time() + 5
+        while agent.received < count and time.time() < deadline:
+            time.sleep(0.001)
+        self.assertTrue(agent.flush(timeout=5))
+
+    def test_reports_of_all_clients_are_delivered(self):
+        agent = self.agent(interval=0.05)
+        first, second = self.client(), self.client()
+
+        first.create_or_update_issue(**self.report('a'))
+        second.create_or_update_many([self.report('b'), self.report('a')])
+        self.wait_received(agent, 3)
+
+        batches = [
+            call[0][0] for call in
+            self.store.create_or_update_many.call_args_list]
+        self.assertEqual(
+            sorted(report['culprit'] for batch in batches for report in batch),
+            ['a', 'a', 'b'])
+        self.assertEqual(agent.received, 3)
+        self.assertEqual(
+            stat.S_IMODE(os.stat(self.path).st_mode), 0o660)
+
+    def test_batches_are_bounded(self):
+        agent = Agent(self.store, path=self.path, batch_size=2)
+        agent._read(io.BytesIO(b''.join(
+            encode(self.report(culprit)) for culprit in 'abc')))
+
+        self.assertEqual(agent.deliver(), 2)
+        self.assertEqual(agent.deliver(), 1)
+        self.assertEqual(agent.deliver(), 0)
+
+    def test_store_failure_does_not_stop_the_agent(self):
+        agent = self.agent(interval=0.01)
+        self.store.create_or_update_many.side_effect = AssertionError
+        self.client().create_or_update_issue(**self.report('a'))
+
+        self.wait_received(agent, 1)
+        self.assertTrue(self.store.create_or_update_many.called)
+
+    def test_client_fails_without_agent(self):
+        self.assertRaises(
+            AgentError, self.client().create_or_update_issue,
+            **self.report('a'))
+
+    def test_client_reconnects_to_a_restarted_agent(self):
+        agent = self.agent(interval=0.01)
+        client = self.client()
+        client.create_or_update_issue(**self.report('a'))
+        self.wait_received(agent, 1)
+        agent.stop()
+
+        self.assertRaises(
+            AgentError, client.create_or_update_many,
+            [self.report('b')] * 1000)
+        agent = self.agent(interval=0.01)
+        client.create_or_update_issue(**self.report('c'))
+
+        self.wait_received(agent, 1)
+        self.assertEqual(
+            self.store.create_or_update_many.call_args[0][0],
+            [self.report('c')])
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_base
+----------------------------------
+
+Tests for `exreporter.stores.base` module.
+"""
+
+import unittest
+
+from exreporter.formats import Formats
+from exreporter.stores.base import (
+    BaseStore, IssueStore, RateLimitExceeded, StoreError, COMMENT, CREATE,
+    DROP, aggregate)
+
+
+class Issue(object):
+
+    def __init__(self, updated_time_delta, comments_count):
+        self.updated_time_delta = updated_time_delta
+        self.comments_count = comments_count
+
+
+class ListStore(BaseStore):
+
+    def __init__(self):
+        self.issues = []
+
+    def create_or_update_issue(self, title, body, culprit, labels, **kwargs):
+        if culprit == 'broken':
+            raise AssertionError
+        self.issues.append(body)
+        return len(self.issues)
+
+
+class TestBaseStore(unittest.TestCase):
+
+    def report(self, culprit):
+        return dict(
+            title='title', body='body', culprit=culprit, labels=['Bug'],
+            max_comments=50, time_delta=10)
+
+    def test_batch_groups_reports_of_a_culprit(self):
+        store = ListStore()
+
+        results = store.create_or_update_many([
+            self.report('a'), self.report('b'), self.report('a')])
+
+        self.assertEqual(results, [1, 2, 1])
+        self.assertEqual(store.issues, [
+            'body' + Formats.batched.format(count=1), 'body'])
+
+    def test_failed_culprit_does_not_stop_the_batch(self):
+        results = ListStore().create_or_update_many([
+            self.report('broken'), self.report('a')])
+
+        self.assertIsInstance(results[0], AssertionError)
+        self.assertEqual(results[1], 1)
+
+
+class TestAggregate(unittest.TestCase):
+
+    def test_rules(self):
+        self.assertEqual(aggregate(None, 50, 10), CREATE)
+        self.assertEqual(aggregate(Issue(10, 0), 50, 10), DROP)
+        self.assertEqual(aggregate(Issue(11, 49), 50, 10), COMMENT)
+        self.assertEqual(aggregate(Issue(11, 50), 50, 10), CREATE)
+
+    def test_issue_store_requires_lookup_and_create_issue(self):
+
+        class LookupOnly(IssueStore):
+
+            def lookup(self, culprit, labels):
+                return None
+
+        self.assertRaises(TypeError, LookupOnly)
+
+    def test_base_store_requires_create_or_update_issue(self):
+
+        class ManyOnly(BaseStore):
+            pass
+
+        self.assertRaises(TypeError, ManyOnly)
+
+
+class TestStoreError(unittest.TestCase):
+
+    def test_rate_limit_exceeded_is_a_store_error(self):
+        error = RateLimitExceeded('search', 30)
+
+        self.assertIsInstance(error, StoreError)
+        self.assertIsInstance(error, AssertionError)
+        self.assertEqual(error.retry_after, 30)
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_bitbucket
+----------------------------------
+
+Tests for `exreporter.stores.bitbucket` module.
+"""
+
+import unittest
+
+from exreporter.formats import Formats
+from exreporter.stores.bitbucket import BitbucketCredentials, BitbucketStore
+
+from .fakes import FakeBitbucket
+
+
+class TestBitbucketStore(unittest.TestCase):
+
+    def setUp(self):
+        self.bitbucket = FakeBitbucket().start()
+        self.addCleanup(self.bitbucket.stop)
+        self.store = BitbucketStore(
+            credentials=BitbucketCredentials(
+                workspace='w', repo='r', user='u', app_password='p'),
+            api_url=self.bitbucket.url)
+
+    def report(self, culprit='culprit', **kwargs):
+        report = dict(
+            title='title', body='body {}'.format(culprit), culprit=culprit,
+            labels=['Bug'], max_comments=50, time_delta=-1)
+        report.update(kwargs)
+        return report
+
+    def test_creates_then_comments(self):
+        first = self.store.create_or_update_issue(**self.report())
+        second = self.store.create_or_update_issue(**self.report())
+
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(self.bitbucket.issues[1]['kind'], 'bug')
+        self.assertEqual(self.bitbucket.comments, [(1, 'body culprit')])
+
+    def test_comment_count_is_read_on_lookup(self):
+        self.store.create_or_update_issue(**self.report())
+        self.store.create_or_update_issue(**self.report())
+        self.store.index.clear()
+
+        issue = self.store.create_or_update_issue(
+            **self.report(max_comments=1))
+
+        self.assertEqual(issue.id, 2)
+
+    def test_resolved_issue_is_reopened(self):
+        self.store.create_or_update_issue(**self.report())
+        self.bitbucket.issues[1]['state'] = 'resolved'
+        self.store.index.clear()
+
+        self.store.create_or_update_issue(**self.report())
+
+        self.assertEqual(self.bitbucket.issues[1]['state'], 'open')
+
+    def test_batch_searches_culprits_in_one_request(self):
+        for culprit in ('culprit-a', 'culprit-b', 'culprit-"c"'):
+            self.store.create_or_update_issue(**self.report(culprit))
+        self.store.index.clear()
+        del self.bitbucket.requests[:]
+
+        results = self.store.create_or_update_many([
+            self.report('culprit-a'), self.report('culprit-b'),
+            self.report('culprit-a'), self.report('culprit-"c"')])
+
+        self.assertEqual([issue.id for issue in results], [1, 2, 1, 3])
+        searches = [
+            path for method, path in self.bitbucket.requests
+            if method == 'GET' and path.endswith('/issues')]
+        self.assertEqual(len(searches), 1)
+        self.assertEqual(self.bitbucket.comments[0], (
+            1, 'body culprit-a' + Formats.batched.format(count=1)))
+
+    def test_comment_count_is_only_read_when_compared(self):
+        for culprit in ('culprit-a', 'culprit-b'):
+            self.store.create_or_update_issue(**self.report(culprit))
+        self.store.index.clear()
+        del self.bitbucket.requests[:]
+
+        results = self.store.create_or_update_many([
+            self.report('culprit-a', time_delta=10),
+            self.report('culprit-b', time_delta=10)])
+
+        self.assertEqual(results, [None, None])
+        self.assertEqual(len(self.bitbucket.requests), 1)
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_breaker
+----------------------------------
+
+Tests for `exreporter.breaker` module.
+"""
+
+import time
+import unittest
+from mock import MagicMock
+
+from exreporter.breaker import BreakerStore, CircuitBreaker, CircuitOpenError
+from exreporter.stores.base import StoreError
+from exreporter.stores.fallback import NullStore
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def fail(self, breaker, times=1):
+        for _ in range(times):
+            self.assertRaises(AssertionError, breaker.call, self.raise_error)
+
+    def raise_error(self):
+        raise AssertionError
+
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3)
+        self.fail(breaker, 2)
+        breaker.call(lambda: None)
+        self.fail(breaker, 2)
+
+        self.assertEqual(breaker.state, 'closed')
+        self.fail(breaker)
+        self.assertEqual(breaker.state, 'open')
+
+        func = MagicMock()
+        self.assertRaises(CircuitOpenError, breaker.call, func)
+        self.assertFalse(func.called)
+        self.assertEqual(breaker.rejected, 1)
+
+    def test_half_open_trial_closes_or_reopens(self):
+        transitions = []
+        breaker = CircuitBreaker(
+            failure_threshold=1, cooldown=0.01,
+            listeners=[lambda b, old, new: transitions.append(new)])
+        self.fail(breaker)
+        time.sleep(0.02)
+
+        self.assertEqual(breaker.state, 'half-open')
+        self.fail(breaker)
+        self.assertEqual(breaker.state, 'open')
+        time.sleep(0.02)
+        breaker.call(lambda: None)
+
+        self.assertEqual(breaker.state, 'closed')
+        self.assertEqual(
+            transitions, ['open', 'half-open', 'open', 'half-open', 'closed'])
+
+    def test_half_open_allows_limited_trials(self):
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=0)
+        self.fail(breaker)
+
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+
+
+class TestBreakerStore(unittest.TestCase):
+
+    def test_open_circuit_diverts_to_fallback_without_calling_store(self):
+        store = MagicMock()
+        store.create_or_update_issue.side_effect = AssertionError
+        fallback = NullStore()
+        breaker_store = BreakerStore(
+            store, breaker=CircuitBreaker(failure_threshold=2),
+            fallback=fallback)
+
+        for _ in range(5):
+            breaker_store.create_or_update_issue(title='title')
+
+        self.assertEqual(store.create_or_update_issue.call_count, 2)
+        self.assertEqual(fallback.dropped, 5)
+        self.assertEqual(breaker_store.breaker.stats()['rejected'], 3)
+
+    def test_without_fallback_errors_are_raised(self):
+        store = MagicMock()
+        store.create_or_update_issue.side_effect = AssertionError
+        breaker_store = BreakerStore(
+            store, breaker=CircuitBreaker(failure_threshold=1))
+
+        self.assertRaises(
+            AssertionError, breaker_store.create_or_update_issue)
+        self.assertRaises(
+            CircuitOpenError, breaker_store.create_or_update_issue)
+        self.assertRaises(
+            StoreError, breaker_store.create_or_update_issue)
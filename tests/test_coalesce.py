@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_coalesce
+----------------------------------
+
+Tests for `exreporter.coalesce` module.
+"""
+
+import unittest
+from mock import MagicMock
+
+from exreporter.coalesce import Coalescer
+
+
+class TestCoalescer(unittest.TestCase):
+
+    def setUp(self):
+        self.emit = MagicMock()
+        self.render = MagicMock(return_value={
+            'title': 'title', 'body': 'body', 'culprit': 'culprit'})
+        self.coalescer = Coalescer(window=60)
+        self.coalescer.start(self.emit)
+
+    def test_occurrences_are_emitted_as_one_summary(self):
+        for message in ('first', 'second', 'first'):
+            self.coalescer.add('culprit', message, self.render)
+
+        self.assertFalse(self.emit.called)
+        self.assertEqual(self.coalescer.flush(), 1)
+
+        self.render.assert_called_once_with()
+        issue = self.emit.call_args[1]
+        self.assertEqual(issue['culprit'], 'culprit')
+        self.assertIn('3 occurrence(s)', issue['body'])
+        self.assertIn('- `first`\n- `second`\n', issue['body'])
+        self.assertTrue(issue['body'].endswith('body'))
+
+    def test_open_windows_are_kept_until_closed(self):
+        self.coalescer.add('culprit', 'message', self.render)
+
+        self.assertEqual(self.coalescer.flush(force=False), 0)
+        self.coalescer.window = 0
+        self.assertEqual(self.coalescer.flush(force=False), 1)
+
+    def test_oldest_window_is_closed_when_full(self):
+        self.coalescer.max_culprits = 1
+
+        self.coalescer.add('first', 'message', self.render)
+        self.coalescer.add('second', 'message', self.render)
+
+        self.assertEqual(self.emit.call_count, 1)
+        self.assertEqual(len(self.coalescer), 1)
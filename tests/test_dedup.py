@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_dedup
+----------------------------------
+
+Tests for `exreporter.dedup` module.
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from mock import patch
+
+from exreporter.dedup import DedupTable
+from exreporter.stores.github import GithubCredentials, GithubStore
+
+from .test_github import issue_json
+
+
+class TestDedupTable(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'dedup.sqlite3')
+
+    def table(self, **kwargs):
+        table = DedupTable(path=self.path, **kwargs)
+        self.addCleanup(table.close)
+        return table
+
+    def test_only_one_owner_claims_a_culprit(self):
+        first, second = self.table(), self.table()
+
+        self.assertEqual(first.claim('culprit'), (True, None))
+        self.assertEqual(second.claim('culprit'), (False, None))
+        self.assertEqual(first.claim('culprit'), (True, None))
+
+    def test_indexed_issue_is_shared(self):
+        first, second = self.table(), self.table()
+        first.claim('culprit')
+        first.put('culprit', {'number': 1})
+
+        self.assertEqual(second.get('culprit'), {'number': 1})
+        self.assertEqual(second.claim('culprit'), (False, {'number': 1}))
+
+    def test_expired_claim_can_be_taken_over(self):
+        first, second = self.table(claim_timeout=0), self.table()
+        first.claim('culprit')
+
+        self.assertEqual(second.claim('culprit'), (True, None))
+
+    def test_released_claim_can_be_taken(self):
+        first, second = self.table(), self.table()
+        first.claim('culprit')
+        first.release('culprit')
+
+        self.assertEqual(second.claim('culprit'), (True, None))
+
+    def test_wait_is_bounded(self):
+        first, second = self.table(), self.table(max_wait=0.05, poll=0.01)
+        first.claim('culprit')
+        started = time.time()
+
+        self.assertEqual(second.wait('culprit'), (False, None))
+        self.assertLess(time.time() - started, 1)
+
+    def test_failed_claim_is_rolled_back(self):
+        table = self.table()
+        with patch.object(DedupTable, '_claim', side_effect=RuntimeError):
+            self.assertRaises(RuntimeError, table.claim, 'culprit')
+
+        self.assertFalse(table._database.connect().in_transaction)
+        self.assertEqual(table.claim('culprit'), (True, None))
+
+    def test_entries_expire(self):
+        table = self.table(ttl=0)
+        table.put('culprit', {'number': 1})
+        time.sleep(0.001)
+
+        self.assertIsNone(table.get('culprit'))
+        self.assertEqual(table.claim('culprit'), (True, None))
+
+
+class TestGithubStoreWithDedup(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'dedup.sqlite3')
+
+        patcher = patch('exreporter.stores.github.GithubRequest')
+        self.github_request = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.github_request.delay.return_value = 0
+        self.github_request.max_wait = 0
+        self.github_request.search.return_value = {'total_count': 0}
+        self.github_request.create.return_value = issue_json()
+
+    def store(self):
+        return GithubStore(
+            credentials=GithubCredentials(user='u', repo='r', auth_token='t'),
+            dedup=DedupTable(path=self.path, poll=0.01))
+
+    def report(self, store):
+        return store.create_or_update_issue(
+            title='title', body='body', culprit='culprit', labels=['Bug'],
+            max_comments=50, time_delta=-1)
+
+    def test_second_process_attaches_to_claimed_issue(self):
+        creator, waiter = self.store(), self.store()
+        creator.dedup.claim('culprit')
+
+        def create():
+            time.sleep(0.05)
+            creator.dedup.put('culprit', issue_json())
+
+        thread = threading.Thread(target=create)
+        thread.start()
+        issue = self.report(waiter)
+        thread.join()
+
+        self.assertEqual(issue.number, 1)
+        self.assertFalse(self.github_request.create.called)
+        self.assertEqual(self.github_request.comment.call_count, 1)
+
+    def test_occurrence_is_dropped_while_another_process_creates(self):
+        creator, waiter = self.store(), self.store()
+        creator.dedup.claim('culprit')
+        waiter.dedup.max_wait = 0.05
+
+        self.assertIsNone(self.report(waiter))
+        self.assertFalse(self.github_request.create.called)
+        self.assertFalse(self.github_request.comment.called)
+
+    def test_issue_created_by_one_process_skips_search_in_another(self):
+        self.report(self.store())
+        self.report(self.store())
+
+        self.assertEqual(self.github_request.search.call_count, 1)
+        self.assertEqual(self.github_request.create.call_count, 1)
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_dispatch
+----------------------------------
+
+Tests for `exreporter.dispatch` module.
+"""
+
+import threading
+import unittest
+
+from exreporter.dispatch import BackgroundDispatcher
+
+
+class TestBackgroundDispatcher(unittest.TestCase):
+
+    def _blocked_dispatcher(self, **kwargs):
+        gate = threading.Event()
+        started = threading.Event()
+
+        def block():
+            started.set()
+            gate.wait()
+
+        dispatcher = BackgroundDispatcher(**kwargs)
+        dispatcher.submit(block)
+        started.wait(1)
+        return dispatcher, gate
+
+    def test_submit_runs_job_on_worker(self):
+        calls = []
+        dispatcher = BackgroundDispatcher()
+
+        self.assertTrue(dispatcher.submit(calls.append, 1))
+        self.assertTrue(dispatcher.flush(timeout=1))
+        self.assertEqual(calls, [1])
+
+    def test_drop_oldest_keeps_latest_jobs(self):
+        calls = []
+        dispatcher, gate = self._blocked_dispatcher(max_size=2)
+
+        for value in range(4):
+            dispatcher.submit(calls.append, value)
+        gate.set()
+
+        self.assertTrue(dispatcher.flush(timeout=1))
+        self.assertEqual(calls, [2, 3])
+        self.assertEqual(dispatcher.dropped, 2)
+
+    def test_drop_newest_keeps_earliest_jobs(self):
+        calls = []
+        dispatcher, gate = self._blocked_dispatcher(
+            max_size=2, overflow='drop-newest')
+
+        for value in range(4):
+            self.assertEqual(
+                dispatcher.submit(calls.append, value), value < 2)
+        gate.set()
+
+        self.assertTrue(dispatcher.flush(timeout=1))
+        self.assertEqual(calls, [0, 1])
+
+    def test_flush_times_out_while_worker_is_busy(self):
+        dispatcher, gate = self._blocked_dispatcher()
+
+        self.assertFalse(dispatcher.flush(timeout=0.01))
+        gate.set()
+        self.assertTrue(dispatcher.flush(timeout=1))
+
+    def test_failing_job_does_not_stop_worker(self):
+        calls = []
+        dispatcher = BackgroundDispatcher()
+
+        dispatcher.submit(lambda: 1 / 0)
+        dispatcher.submit(calls.append, 1)
+
+        self.assertTrue(dispatcher.flush(timeout=1))
+        self.assertEqual(calls, [1])
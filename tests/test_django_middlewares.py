@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_django_middlewares
+----------------------------------
+
+Tests for `exreporter.contrib.django_middlewares` module.
+"""
+
+import sys
+import types
+import unittest
+from mock import ANY, patch
+
+
+class Settings(object):
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def django_modules(settings):
+    django = types.ModuleType('django')
+    conf = types.ModuleType('django.conf')
+    conf.settings = settings
+    django.conf = conf
+    return {'django': django, 'django.conf': conf}
+
+
+class TestExreporterGithubMiddleware(unittest.TestCase):
+
+    def setUp(self):
+        self.settings = Settings(
+            EXREPORTER_GITHUB_USER='u',
+            EXREPORTER_GITHUB_REPO='r',
+            EXREPORTER_GITHUB_AUTH_TOKEN='t',
+            EXREPORTER_GITHUB_LABELS=['Bug'],
+            EXREPORTER_GITHUB_POOL_SIZE=4,
+            EXREPORTER_GITHUB_TIMEOUT=(1, 5),
+            EXREPORTER_MAX_COMMENTS=20,
+            EXREPORTER_TIME_DELTA=60,
+            EXREPORTER_INCLUDE_LOCALS=False)
+
+        modules = patch.dict(sys.modules, django_modules(self.settings))
+        modules.start()
+        self.addCleanup(modules.stop)
+        sys.modules.pop('exreporter.contrib.django_middlewares', None)
+        self.addCleanup(
+            sys.modules.pop, 'exreporter.contrib.django_middlewares', None)
+        from exreporter.contrib import django_middlewares
+        self.module = django_middlewares
+
+        for name in ('GithubStore', 'ExReporter'):
+            patcher = patch.object(django_middlewares, name)
+            setattr(self, name, patcher.start())
+            self.addCleanup(patcher.stop)
+
+    def test_reporter_is_built_once_from_settings(self):
+        middleware = self.module.ExreporterGithubMiddleware()
+        build_reporter = patch.object(
+            middleware, 'build_reporter', wraps=middleware.build_reporter)
+
+        with build_reporter as build:
+            middleware.process_exception(request='first', exception=None)
+            middleware.process_exception(request='second', exception=None)
+
+        self.assertEqual(build.call_count, 1)
+        self.GithubStore.assert_called_once_with(
+            credentials=ANY, pool_size=4, keep_alive=True, timeout=(1, 5),
+            dedup=None)
+        credentials = self.GithubStore.call_args[1]['credentials']
+        self.assertEqual(
+            (credentials.user, credentials.repo, credentials.auth_token),
+            ('u', 'r', 't'))
+        self.ExReporter.assert_called_once_with(
+            store=self.GithubStore.return_value, labels=['Bug'],
+            max_comments=20, time_delta=60, include_locals=False)
+        reporter = self.ExReporter.return_value
+        self.assertEqual(
+            [call[1] for call in reporter.report.call_args_list],
+            [{'request': 'first'}, {'request': 'second'}])
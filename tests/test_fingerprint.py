@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_fingerprint
+----------------------------------
+
+Tests for `exreporter.fingerprint` module.
+"""
+
+import unittest
+
+from exreporter.fingerprint import (
+    Fingerprinter, normalize_message, relative_path)
+from exreporter.stack_trace import StackTrace
+
+
+def fail(message):
+    raise ValueError(message)
+
+
+def fail_elsewhere(message):
+    raise ValueError(message)
+
+
+class TestFingerprinter(unittest.TestCase):
+
+    def capture(self, func, message='failed', **kwargs):
+        try:
+            func(message)
+        except ValueError:
+            return StackTrace(fingerprinter=Fingerprinter(**kwargs))
+
+    def test_same_frames_give_same_fingerprint(self):
+        first = self.capture(fail)
+        second = self.capture(fail, message='other')
+
+        self.assertEqual(first.fingerprint, second.fingerprint)
+        self.assertNotEqual(
+            first.fingerprint, self.capture(fail_elsewhere).fingerprint)
+
+    def test_normalized_message_is_included(self):
+        first, second, third = [
+            self.capture(fail, message, include_message=True)
+            for message in ('user 12 at 0xdeadbeef', 'user 345 at 0x1234',
+                            'group 12 at 0xdeadbeef')]
+
+        self.assertEqual(first.fingerprint, second.fingerprint)
+        self.assertNotEqual(first.fingerprint, third.fingerprint)
+
+    def test_custom_fingerprinter(self):
+        try:
+            fail('failed')
+        except ValueError:
+            trace_info = StackTrace(
+                fingerprinter=lambda trace_info: trace_info.method_name)
+
+        self.assertEqual(trace_info.fingerprint, 'fail')
+
+    def test_normalize_message(self):
+        self.assertEqual(
+            normalize_message(
+                'row 42 id 6fa459ea-ee8a-3ca4-894e-db77e160355e at 0x7f'),
+            'row <n> id <uuid> at <hex>')
+
+    def test_relative_path(self):
+        self.assertEqual(
+            relative_path('/srv/app/releases/12/app/views.py',
+                          paths=['/srv/app', '/srv/app/releases/12']),
+            'app/views.py')
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_github
+----------------------------------
+
+Tests for `exreporter.stores.github` module.
+"""
+
+import time
+import unittest
+from mock import patch, MagicMock
+
+from exreporter.stores.base import RateLimitExceeded
+from exreporter.stores.github_async import AsyncGithubIssue
+from exreporter.stores.github import (
+    GithubCredentials, GithubIssue, GithubRequest, GithubStore, IssueIndex,
+    parse_time)
+
+
+def issue_json(number=1, state='open', comments=0, updated_at=None):
+    return {
+        'number': number,
+        'url': 'https://api.github.com/repos/u/r/issues/{}'.format(number),
+        'comments_url':
+            'https://api.github.com/repos/u/r/issues/{}/comments'.format(
+                number),
+        'state': state,
+        'comments': comments,
+        'updated_at': updated_at or '2014-12-11T10:00:00Z',
+    }
+
+
+class TestGithubStore(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch('exreporter.stores.github.GithubRequest')
+        self.GithubRequest = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.github_request = self.GithubRequest.return_value
+        self.github_request.delay.return_value = 0
+        self.github_request.max_wait = 0
+        self.store = GithubStore(credentials=GithubCredentials(
+            user='u', repo='r', auth_token='t'))
+
+    def report(self, culprit='culprit', time_delta=10):
+        return self.store.create_or_update_issue(
+            title='title', body='body', culprit=culprit, labels=['Bug'],
+            max_comments=50, time_delta=time_delta)
+
+    def test_creates_issue_when_search_finds_nothing(self):
+        self.github_request.search.return_value = {'total_count': 0}
+        self.github_request.create.return_value = issue_json()
+
+        issue = self.report()
+
+        self.assertEqual(issue.number, 1)
+        self.github_request.create.assert_called_once_with(
+            title='title', body='body', labels=['Bug'])
+
+    def test_repeat_occurrence_skips_search(self):
+        self.github_request.search.return_value = {
+            'total_count': 1, 'items': [issue_json(comments=3)]}
+
+        self.report(time_delta=-1)
+        issue = self.report(time_delta=-1)
+
+        self.assertEqual(self.github_request.search.call_count, 1)
+        self.assertEqual(self.github_request.comment.call_count, 2)
+        self.assertEqual(issue.comments, 5)
+
+    def test_failed_write_invalidates_index(self):
+        self.github_request.search.return_value = {'total_count': 0}
+        self.github_request.create.return_value = issue_json()
+        self.report()
+
+        self.github_request.comment.side_effect = AssertionError
+        self.assertRaises(AssertionError, self.report, time_delta=-1)
+
+        self.assertIsNone(self.store.index.get('culprit'))
+
+    def test_interleaved_reports_keep_their_own_time_delta(self):
+        store = GithubStore(
+            credentials=GithubCredentials(user='u', repo='r', auth_token='t'),
+            index_size=0)
+        results = []
+
+        def search(**kwargs):
+            # another thread reports the same culprit while this one searches
+            if not results:
+                results.append(None)
+                results.append(self.report(time_delta=1000))
+            return {'total_count': 1, 'items': [
+                issue_json(updated_at=time.time() - 100)]}
+
+        self.github_request.search.side_effect = search
+        self.store = store
+
+        issue = self.report(time_delta=10)
+
+        self.assertIsNone(results[1])
+        self.assertEqual(issue.comments, 1)
+        self.assertEqual(self.github_request.comment.call_count, 1)
+
+    def test_exhausted_search_budget_fails_before_searching(self):
+        self.github_request.delay.return_value = 30
+
+        self.assertRaises(RateLimitExceeded, self.report)
+        self.assertFalse(self.github_request.search.called)
+
+    def test_search_waits_within_max_wait(self):
+        self.github_request.delay.return_value = 5
+        self.github_request.max_wait = 10
+        self.github_request.search.return_value = {'total_count': 0}
+        self.github_request.create.return_value = issue_json()
+
+        self.assertEqual(self.report().number, 1)
+        self.assertTrue(self.github_request.search.called)
+
+    def test_index_entries_expire(self):
+        self.github_request.create.return_value = issue_json()
+        store = GithubStore(
+            credentials=GithubCredentials(user='u', repo='r', auth_token='t'),
+            index_ttl=0)
+        store.index.set('culprit', store.create_issue(
+            title='title', body='body'))
+        time.sleep(0.001)
+
+        self.assertIsNone(store.index.get('culprit'))
+
+
+class TestGithubIssue(unittest.TestCase):
+
+    def test_keeps_only_used_fields(self):
+        data = dict(issue_json(), title='title', user={'login': 'u'})
+        github_request = MagicMock()
+        github_request.issue.return_value = data
+        issue = GithubIssue(github_request=github_request, **data)
+
+        self.assertFalse(hasattr(issue, '__dict__'))
+        self.assertEqual(issue.updated_at, 1418292000)
+        self.assertRaises(AttributeError, getattr, issue, 'title')
+        self.assertEqual(issue.fetch()['user'], {'login': 'u'})
+        github_request.issue.assert_called_once_with(issue=issue)
+
+    def test_async_issue_has_no_dict(self):
+        issue = AsyncGithubIssue(github_request=None, **issue_json())
+
+        self.assertFalse(hasattr(issue, '__dict__'))
+
+    def test_updated_time_delta_is_seconds_since_update(self):
+        issue = GithubIssue(github_request=None, **issue_json())
+
+        with patch('time.time', return_value=1418292000 + 90.5):
+            self.assertEqual(issue.updated_time_delta, 90)
+
+    def test_index_entry_round_trips(self):
+        issue = GithubIssue(github_request=None, **issue_json(comments=3))
+        copy = GithubIssue(github_request=None, **IssueIndex.entry(issue))
+
+        self.assertEqual(copy.updated_at, issue.updated_at)
+        self.assertEqual(copy.comments_count, 3)
+
+    def test_parse_time(self):
+        self.assertEqual(parse_time('1970-01-02T00:00:01Z'), 86401)
+        self.assertEqual(parse_time(86401.5), 86401.5)
+        self.assertIsNone(parse_time(None))
+
+
+class TestGithubRequest(unittest.TestCase):
+
+    def setUp(self):
+        self.credentials = GithubCredentials(
+            user='u', repo='r', auth_token='t')
+
+    def test_session_is_pooled(self):
+        github_request = GithubRequest(
+            credentials=self.credentials, pool_size=4)
+        adapter = github_request.session.get_adapter('https://api.github.com')
+
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertNotEqual(
+            github_request.session.headers.get('Connection'), 'close')
+
+    def test_requests_use_timeout(self):
+        github_request = GithubRequest(
+            credentials=self.credentials, keep_alive=False, timeout=(1, 5))
+        github_request.session = MagicMock()
+        github_request.session.get.return_value.status_code = 200
+        github_request.session.get.return_value.content = '{}'
+
+        github_request.search(q='culprit', state='open', labels=['Bug'])
+
+        self.assertEqual(
+            github_request.session.get.call_args[1]['timeout'], (1, 5))
+
+    def response(self, status_code, headers=None, content='{}'):
+        response = MagicMock(status_code=status_code, content=content)
+        response.headers = headers or {}
+        return response
+
+    def test_retries_server_errors_of_reads_with_backoff(self):
+        github_request = GithubRequest(
+            credentials=self.credentials, backoff=0.001, max_wait=1)
+        github_request.session = MagicMock()
+        github_request.session.get.side_effect = [
+            self.response(502), self.response(200, content='{"items": []}')]
+
+        data = github_request.search(q='culprit', state='open', labels=[])
+
+        self.assertEqual(data, {'items': []})
+        self.assertEqual(github_request.session.get.call_count, 2)
+
+    def test_server_errors_of_writes_are_not_retried(self):
+        github_request = GithubRequest(
+            credentials=self.credentials, backoff=0.001, max_wait=1)
+        github_request.session = MagicMock()
+        github_request.session.post.return_value = self.response(502)
+
+        self.assertRaises(
+            AssertionError, github_request.create,
+            title='title', body='body', labels=None)
+        self.assertEqual(github_request.session.post.call_count, 1)
+
+    def test_retries_are_left_to_the_caller_by_default(self):
+        github_request = GithubRequest(credentials=self.credentials)
+        github_request.session = MagicMock()
+        github_request.session.post.return_value = self.response(
+            429, {'Retry-After': '1'})
+
+        self.assertRaises(
+            RateLimitExceeded, github_request.create,
+            title='title', body='body', labels=None)
+        self.assertEqual(github_request.session.post.call_count, 1)
+
+    def test_budgets_are_tracked_per_resource(self):
+        github_request = GithubRequest(credentials=self.credentials)
+        github_request.session = MagicMock()
+        github_request.session.get.return_value = self.response(200, {
+            'X-RateLimit-Limit': '30', 'X-RateLimit-Remaining': '0',
+            'X-RateLimit-Reset': str(int(time.time()) + 60)})
+
+        github_request.search(q='culprit', state='open', labels=['Bug'])
+
+        self.assertEqual(github_request.remaining('search'), 0)
+        self.assertIsNone(github_request.remaining('core'))
+        self.assertGreater(github_request.delay('search'), 50)
+        self.assertEqual(github_request.delay('core'), 0)
+        self.assertRaises(
+            RateLimitExceeded, github_request.search,
+            q='culprit', state='open', labels=['Bug'])
+        self.assertEqual(github_request.session.get.call_count, 1)
+
+    def test_secondary_rate_limit_honours_retry_after(self):
+        github_request = GithubRequest(
+            credentials=self.credentials, max_wait=5)
+        github_request.session = MagicMock()
+        github_request.session.post.return_value = self.response(
+            403, {'Retry-After': '60'})
+
+        self.assertRaises(
+            RateLimitExceeded, github_request.create,
+            title='title', body='body', labels=None)
+        self.assertEqual(github_request.session.post.call_count, 1)
+
+    def test_forbidden_without_rate_limit_is_not_retried(self):
+        github_request = GithubRequest(credentials=self.credentials)
+        github_request.session = MagicMock()
+        github_request.session.post.return_value = self.response(403)
+
+        self.assertRaises(
+            AssertionError, github_request.create,
+            title='title', body='body', labels=None)
+        self.assertEqual(github_request.session.post.call_count, 1)
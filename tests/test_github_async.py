@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_github_async
+----------------------------------
+
+Tests for `exreporter.stores.github_async` and `exreporter.reporter_async`
+modules.
+"""
+
+import json
+import time
+import asyncio
+import unittest
+
+from exreporter.reporter_async import AsyncReporter
+from exreporter.stores.github import GithubCredentials
+from exreporter.stores.github_async import AsyncGithubIssue, AsyncGithubStore
+
+from .test_github import issue_json
+
+
+class FakeTransport(object):
+    """Local stand-in for Github answering from canned responses.
+    """
+
+    def __init__(self, responses, delay=0):
+        self.responses = responses
+        self.delay = delay
+        self.requests = []
+        self.in_flight = self.max_in_flight = 0
+        self.closed = False
+
+    async def request(self, method, url, headers, data=None, timeout=10):
+        self.requests.append((method, url))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+
+        status, body = self.responses[method]
+        return status, json.dumps(body)
+
+    async def close(self):
+        self.closed = True
+
+
+def credentials():
+    return GithubCredentials(user='u', repo='r', auth_token='t')
+
+
+class TestAsyncGithubStore(unittest.TestCase):
+
+    def report(self, store, culprit='culprit'):
+        return store.create_or_update_issue(
+            title='title', body='body', culprit=culprit, labels=['Bug'],
+            max_comments=50, time_delta=-1)
+
+    def test_creates_issue_then_comments_without_search(self):
+        transport = FakeTransport({
+            'GET': (200, {'total_count': 0}),
+            'POST': (201, issue_json()),
+        })
+        store = AsyncGithubStore(
+            credentials=credentials(), transport=transport)
+
+        async def run():
+            await self.report(store)
+            return await self.report(store)
+
+        issue = asyncio.run(run())
+
+        self.assertEqual(issue.comments, 1)
+        self.assertEqual(
+            [method for method, _ in transport.requests],
+            ['GET', 'POST', 'POST'])
+        self.assertTrue(transport.requests[0][1].startswith(
+            'https://api.github.com/search/issues'))
+
+    def test_concurrency_is_bounded(self):
+        transport = FakeTransport({
+            'GET': (200, {'total_count': 0}),
+            'POST': (201, issue_json()),
+        }, delay=0.01)
+        store = AsyncGithubStore(
+            credentials=credentials(), transport=transport,
+            max_concurrency=2, index_size=0)
+
+        async def run():
+            await asyncio.gather(*[
+                self.report(store, culprit=str(index))
+                for index in range(6)])
+
+        asyncio.run(run())
+
+        self.assertEqual(len(transport.requests), 12)
+        self.assertEqual(transport.max_in_flight, 2)
+
+    def test_concurrent_reports_keep_their_own_time_delta(self):
+        transport = FakeTransport({
+            'GET': (200, {'total_count': 1, 'items': [
+                issue_json(updated_at=time.time() - 100)]}),
+            'POST': (201, {}),
+        }, delay=0.01)
+        store = AsyncGithubStore(
+            credentials=credentials(), transport=transport, index_size=0)
+
+        async def run():
+            return await asyncio.gather(*[
+                store.create_or_update_issue(
+                    title='title', body='body', culprit='culprit',
+                    labels=['Bug'], max_comments=50, time_delta=time_delta)
+                for time_delta in (10, 1000)])
+
+        commented, dropped = asyncio.run(run())
+
+        self.assertEqual(commented.comments, 1)
+        self.assertIsNone(dropped)
+        self.assertEqual(
+            [method for method, _ in transport.requests],
+            ['GET', 'GET', 'POST'])
+
+    def test_issue_is_fetched(self):
+        transport = FakeTransport({
+            'GET': (200, dict(issue_json(), title='title'))})
+        store = AsyncGithubStore(
+            credentials=credentials(), transport=transport)
+        issue = AsyncGithubIssue(
+            github_request=store.github_request, **issue_json())
+
+        data = asyncio.run(issue.fetch())
+
+        self.assertEqual(data['title'], 'title')
+        self.assertEqual(transport.requests, [('GET', issue.url)])
+
+    def test_api_url_can_point_to_local_server(self):
+        transport = FakeTransport({'POST': (201, issue_json())})
+        store = AsyncGithubStore(
+            credentials=credentials(), transport=transport,
+            api_url='http://127.0.0.1:8000/')
+
+        asyncio.run(store.create_issue(title='title', body='body'))
+
+        self.assertEqual(
+            transport.requests,
+            [('POST', 'http://127.0.0.1:8000/repos/u/r/issues')])
+
+
+class TestAsyncReporter(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = FakeTransport({
+            'GET': (200, {'total_count': 0}),
+            'POST': (201, issue_json()),
+        })
+        self.reporter = AsyncReporter(store=AsyncGithubStore(
+            credentials=credentials(), transport=self.transport))
+
+    def raise_and_report(self):
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            return self.reporter.report()
+
+    def test_report_schedules_delivery_on_running_loop(self):
+        async def run():
+            task = self.raise_and_report()
+            self.assertEqual(self.transport.requests, [])
+            self.assertTrue(await self.reporter.close(timeout=1))
+            return task
+
+        task = asyncio.run(run())
+
+        self.assertEqual(task.result().number, 1)
+        self.assertTrue(self.transport.closed)
+
+    def test_reports_over_max_pending_are_dropped(self):
+        self.reporter.max_pending = 1
+
+        async def run():
+            self.raise_and_report()
+            self.assertIsNone(self.raise_and_report())
+            await self.reporter.flush(timeout=1)
+
+        asyncio.run(run())
+
+        self.assertEqual(self.reporter.dropped, 1)
+
+    def test_spool_is_rejected(self):
+        self.assertRaises(
+            AssertionError, AsyncReporter,
+            store=self.reporter.store, spool=object())
+
+    def test_failed_delivery_is_logged_not_raised(self):
+        self.transport.responses['GET'] = (500, {})
+
+        async def run():
+            task = self.raise_and_report()
+            await self.reporter.flush(timeout=1)
+            return task
+
+        with self.assertLogs('exreporter.reporter_async'):
+            task = asyncio.run(run())
+        self.assertIsNone(task.result())
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_gitlab
+----------------------------------
+
+Tests for `exreporter.stores.gitlab` module.
+"""
+
+import unittest
+
+from exreporter.formats import Formats
+from exreporter.stores.gitlab import GitlabCredentials, GitlabStore
+
+from .fakes import FakeGitlab
+
+
+class TestGitlabStore(unittest.TestCase):
+
+    def setUp(self):
+        self.gitlab = FakeGitlab().start()
+        self.addCleanup(self.gitlab.stop)
+        self.store = GitlabStore(
+            credentials=GitlabCredentials(
+                project='group/project', auth_token='t'),
+            api_url=self.gitlab.url)
+
+    def report(self, culprit='culprit', **kwargs):
+        report = dict(
+            title='title', body='body {}'.format(culprit), culprit=culprit,
+            labels=['Bug'], max_comments=50, time_delta=-1)
+        report.update(kwargs)
+        return report
+
+    def test_creates_then_comments(self):
+        first = self.store.create_or_update_issue(**self.report())
+        second = self.store.create_or_update_issue(**self.report())
+
+        self.assertEqual(first.iid, second.iid)
+        self.assertEqual(self.gitlab.issues[1]['user_notes_count'], 1)
+        self.assertEqual(self.gitlab.issues[1]['labels'], ['Bug'])
+
+    def test_occurrence_within_time_delta_is_dropped(self):
+        self.store.create_or_update_issue(**self.report())
+
+        self.assertIsNone(self.store.create_or_update_issue(
+            **self.report(time_delta=10)))
+        self.assertEqual(self.gitlab.issues[1]['user_notes_count'], 0)
+
+    def test_new_issue_after_max_comments(self):
+        self.store.create_or_update_issue(**self.report())
+        self.store.create_or_update_issue(**self.report(max_comments=1))
+        issue = self.store.create_or_update_issue(
+            **self.report(max_comments=1))
+
+        self.assertEqual(issue.iid, 2)
+
+    def test_closed_issue_is_reopened(self):
+        self.store.create_or_update_issue(**self.report())
+        self.gitlab.issues[1]['state'] = 'closed'
+        self.store.index.clear()
+
+        self.store.create_or_update_issue(**self.report())
+
+        self.assertEqual(self.gitlab.issues[1]['state'], 'opened')
+
+    def test_batch_looks_up_culprits_in_one_request(self):
+        self.store.create_or_update_issue(**self.report('culprit-a'))
+        self.store.create_or_update_issue(**self.report('culprit-b'))
+        self.store.index.clear()
+        del self.gitlab.requests[:]
+
+        results = self.store.create_or_update_many([
+            self.report('culprit-a'), self.report('culprit-b'),
+            self.report('culprit-a'), self.report('culprit-c')])
+
+        self.assertEqual([issue.iid for issue in results], [1, 2, 1, 3])
+        self.assertEqual(
+            [method for method, _ in self.gitlab.requests].count('GET'), 2)
+        self.assertEqual(self.gitlab.comments, [
+            (1, 'body culprit-a' + Formats.batched.format(count=1)),
+            (2, 'body culprit-b')])
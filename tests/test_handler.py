@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_handler
+----------------------------------
+
+Tests for `exreporter.handler` module.
+"""
+
+import time
+import logging
+import threading
+import unittest
+from mock import MagicMock
+
+from exreporter.handler import ExReporterHandler
+from exreporter.reporter import Reporter
+
+
+class TestExReporterHandler(unittest.TestCase):
+
+    def setUp(self):
+        self.reporter = MagicMock()
+        self.handler = ExReporterHandler(self.reporter)
+        self.addCleanup(self.handler.stop)
+        self.logger = logging.getLogger('tests.handler')
+        self.logger.propagate = False
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+
+    def log_exception(self, logger=None):
+        try:
+            {}['missing']
+        except KeyError:
+            (logger or self.logger).exception('Lookup of %s failed', 'key')
+
+    def test_records_are_reported_on_the_listener_thread(self):
+        threads = []
+        self.reporter.report.side_effect = lambda **kwargs: threads.append(
+            threading.current_thread())
+
+        self.log_exception()
+        self.handler.stop()
+
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.current_thread())
+        kwargs = self.reporter.report.call_args[1]
+        self.assertIs(kwargs['exc_info'][0], KeyError)
+        self.assertEqual(
+            kwargs['extra_content'],
+            'ERROR logged by tests.handler: Lookup of key failed')
+
+    def test_records_without_exception_are_ignored(self):
+        self.logger.error('No exception')
+        self.log_exception(logging.getLogger('exreporter.dispatch'))
+        self.handler.stop()
+
+        self.assertFalse(self.reporter.report.called)
+
+    def test_records_are_dropped_when_the_queue_is_full(self):
+        release = threading.Event()
+        self.reporter.report.side_effect = lambda **kwargs: release.wait(5)
+        handler = ExReporterHandler(self.reporter, max_size=1)
+        self.logger.addHandler(handler)
+        self.addCleanup(self.logger.removeHandler, handler)
+
+        for _ in range(5):
+            self.log_exception()
+        release.set()
+        handler.stop()
+
+        self.assertGreaterEqual(handler.dropped, 3)
+
+    def test_close_reports_pending_records(self):
+        for _ in range(5):
+            self.log_exception()
+        self.handler.close()
+
+        self.assertEqual(self.reporter.report.call_count, 5)
+        self.assertIsNone(self.handler.listener)
+
+    def test_close_is_bounded(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        self.reporter.report.side_effect = lambda **kwargs: release.wait(5)
+        self.handler.close_timeout = 0.05
+        self.log_exception()
+        started = time.time()
+
+        self.handler.close()
+
+        self.assertLess(time.time() - started, 1)
+
+    def test_reporter_renders_the_record_exception(self):
+        store = MagicMock()
+        self.handler.reporter = Reporter(store=store)
+
+        self.log_exception()
+        self.handler.stop()
+
+        issue = store.create_or_update_issue.call_args[1]
+        self.assertTrue(issue['title'].startswith('KeyError'))
+        self.assertIn('Lookup of key failed', issue['body'])
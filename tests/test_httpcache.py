@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_httpcache
+----------------------------------
+
+Tests for `exreporter.httpcache` module.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from mock import MagicMock
+
+from exreporter.httpcache import ResponseCache
+from exreporter.stores.github import GithubCredentials, GithubRequest
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'responses.sqlite3')
+
+    def test_headers_carry_validators(self):
+        cache = ResponseCache()
+        cache.set('/a', '"etag"', 'Mon, 01 Jan 2024 00:00:00 GMT', {})
+
+        self.assertEqual(cache.headers('/a'), {
+            'If-None-Match': '"etag"',
+            'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'})
+        self.assertEqual(cache.headers('/b'), {})
+
+    def test_responses_without_validators_are_not_cached(self):
+        cache = ResponseCache()
+        cache.set('/a', None, None, {'items': []})
+
+        self.assertIsNone(cache.get('/a'))
+
+    def test_least_recently_used_url_is_evicted(self):
+        cache = ResponseCache(max_size=2)
+        cache.set('/a', '"a"', None, 1)
+        cache.set('/b', '"b"', None, 2)
+        cache.get('/a')
+        cache.set('/c', '"c"', None, 3)
+
+        self.assertIsNone(cache.get('/b'))
+        self.assertEqual(cache.get('/a'), ('"a"', None, 1))
+
+    def test_entries_survive_restarts(self):
+        cache = ResponseCache(path=self.path)
+        cache.set('/a', '"a"', None, {'items': [1]})
+        cache.close()
+
+        cache = ResponseCache(path=self.path)
+        self.addCleanup(cache.close)
+        self.assertEqual(cache.get('/a'), ('"a"', None, {'items': [1]}))
+
+    def test_database_is_pruned(self):
+        cache = ResponseCache(max_size=2, path=self.path, prune_every=1)
+        self.addCleanup(cache.close)
+        for url in ('/a', '/b', '/c'):
+            cache.set(url, '"etag"', None, url)
+
+        count = cache._database.connect().execute(
+            'SELECT COUNT(*) FROM responses').fetchone()[0]
+        self.assertEqual(count, 2)
+
+
+class TestConditionalRequests(unittest.TestCase):
+
+    def setUp(self):
+        self.github_request = GithubRequest(
+            credentials=GithubCredentials(user='u', repo='r', auth_token='t'),
+            response_cache=ResponseCache())
+        self.github_request.session = MagicMock()
+
+    def response(self, status_code, headers=None, content=''):
+        response = MagicMock(status_code=status_code, content=content)
+        response.headers = headers or {}
+        return response
+
+    def test_not_modified_reuses_cached_payload(self):
+        get = self.github_request.session.get
+        get.side_effect = [
+            self.response(200, {'ETag': '"v1"'}, '{"total_count": 1}'),
+            self.response(304, {'ETag': '"v1"'}),
+        ]
+
+        first = self.github_request.search(
+            q='culprit', state='open', labels=['Bug'])
+        second = self.github_request.search(
+            q='culprit', state='open', labels=['Bug'])
+
+        self.assertEqual(first, {'total_count': 1})
+        self.assertEqual(second, {'total_count': 1})
+        self.assertEqual(get.call_args_list[0][1]['headers'], {})
+        self.assertEqual(
+            get.call_args_list[1][1]['headers'], {'If-None-Match': '"v1"'})
+
+    def test_evicted_entry_is_fetched_again(self):
+        get = self.github_request.session.get
+        get.side_effect = [
+            self.response(304, {'ETag': '"v1"'}),
+            self.response(200, {'ETag': '"v1"'}, '{"total_count": 1}'),
+        ]
+        # the entry is evicted between reading its validators and the 304
+        self.github_request.response_cache.headers = MagicMock(
+            return_value={'If-None-Match': '"v1"'})
+
+        data = self.github_request.search(
+            q='culprit', state='open', labels=['Bug'])
+
+        self.assertEqual(data, {'total_count': 1})
+        self.assertNotIn('headers', get.call_args_list[1][1])
+
+    def test_changed_response_replaces_cached_payload(self):
+        get = self.github_request.session.get
+        get.side_effect = [
+            self.response(200, {'ETag': '"v1"'}, '{"total_count": 1}'),
+            self.response(200, {'ETag': '"v2"'}, '{"total_count": 2}'),
+        ]
+
+        self.github_request.search(q='culprit', state='open', labels=['Bug'])
+        self.github_request.search(q='culprit', state='open', labels=['Bug'])
+
+        url = self.github_request.search_url(
+            q='culprit', state='open', labels=['Bug'])
+        self.assertEqual(
+            self.github_request.response_cache.get(url),
+            ('"v2"', None, {'total_count': 2}))
+
+    def test_writes_are_not_conditional(self):
+        post = self.github_request.session.post
+        post.return_value = self.response(201, {'ETag': '"v1"'}, '{}')
+
+        self.github_request.create(title='title', body='body', labels=None)
+
+        self.assertNotIn('headers', post.call_args[1])
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_metrics
+----------------------------------
+
+Tests for `exreporter.metrics` module.
+"""
+
+import socket
+import unittest
+from mock import patch, MagicMock
+
+from exreporter.metrics import MetricsRegistry, StatsdSink
+from exreporter.reporter import Reporter
+from exreporter.stores.github import GithubCredentials, GithubRequest
+from exreporter.throttle import CooldownGate
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def test_render_prometheus(self):
+        metrics = MetricsRegistry()
+        metrics.increment('reports')
+        metrics.increment('api_calls', endpoint='search', status=200)
+        metrics.increment('api_calls', endpoint='search', status=200)
+        metrics.increment('api_calls', endpoint='search', status='rate-limited')
+        metrics.timing('stage', 0.5, stage='capture')
+        metrics.gauge('queue_depth', 3)
+
+        self.assertEqual(metrics.render_prometheus(), '\n'.join([
+            '# TYPE exreporter_api_calls_total counter',
+            'exreporter_api_calls_total{endpoint="search",status="200"} 2',
+            'exreporter_api_calls_total'
+            '{endpoint="search",status="rate-limited"} 1',
+            '# TYPE exreporter_reports_total counter',
+            'exreporter_reports_total 1',
+            '# TYPE exreporter_queue_depth gauge',
+            'exreporter_queue_depth 3',
+            '# TYPE exreporter_stage_seconds summary',
+            'exreporter_stage_seconds_count{stage="capture"} 1',
+            'exreporter_stage_seconds_sum{stage="capture"} 0.5',
+        ]) + '\n')
+
+    def test_statsd_sink_sends_udp_packets(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        server.bind(('127.0.0.1', 0))
+        server.settimeout(1)
+        self.addCleanup(server.close)
+
+        sink = StatsdSink(port=server.getsockname()[1])
+        sink.increment('api_calls', endpoint='search', status=200)
+        sink.timing('stage', 0.25, stage='render')
+
+        self.assertEqual(
+            server.recv(512), b'exreporter.api_calls.search.200:1|c')
+        self.assertEqual(
+            server.recv(512), b'exreporter.stage.render:250.000|ms')
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    @patch('exreporter.reporter.StackTrace')
+    def test_reporter_times_stages_and_counts_reports(self, StackTrace):
+        trace_info = StackTrace.return_value
+        trace_info.exception = ValueError
+        trace_info.trace_parts = ('Traceback\n', 'ValueError\n')
+        trace_info.filepath = '/app/views.py'
+        metrics = MetricsRegistry()
+        reporter = Reporter(
+            store=MagicMock(), cooldown=CooldownGate(), metrics=metrics)
+
+        reporter.report()
+        reporter.report()
+
+        self.assertEqual(metrics.counter('reports'), 2)
+        self.assertEqual(metrics.counter('suppressed', reason='cooldown'), 1)
+        for stage in ('capture', 'render', 'deliver'):
+            self.assertIn(('stage', (('stage', stage),)), metrics.timers)
+
+    def test_github_request_counts_api_calls(self):
+        metrics = MetricsRegistry()
+        github_request = GithubRequest(
+            credentials=GithubCredentials(user='u', repo='r', auth_token='t'),
+            metrics=metrics)
+        github_request.session = MagicMock()
+        github_request.session.get.return_value = MagicMock(
+            status_code=200, content='{}', headers={})
+
+        github_request.search(q='culprit', state='open', labels=['Bug'])
+
+        self.assertEqual(
+            metrics.counter('api_calls', endpoint='search', status=200), 1)
+        self.assertIn(
+            ('api_call', (('endpoint', 'search'),)), metrics.timers)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_render
+----------------------------------
+
+Tests for `exreporter.render` module.
+"""
+
+import unittest
+
+import mock
+
+from exreporter.render import BodyRenderer
+from exreporter.reporter import Reporter
+
+
+def sections(trace='trace', locals_data='locals', request='request'):
+    return [
+        ('trace', '', '```{stack_trace}```', 'stack_trace', trace),
+        ('locals', ' ', '{locals_data}', 'locals_data', locals_data),
+        ('request', ' ', '{request_data}', 'request_data', request),
+        ('culprit', '', '\n\n{culprit}\n', 'culprit', 'culprit'),
+    ]
+
+
+class TestBodyRenderer(unittest.TestCase):
+
+    def test_small_body_is_not_trimmed(self):
+        body = BodyRenderer().render(sections())
+
+        self.assertEqual(body, '```trace``` locals request\n\nculprit\n')
+
+    def test_sections_are_capped(self):
+        body = BodyRenderer(caps={'locals': 100}).render(
+            sections(locals_data='x' * 1000))
+
+        self.assertIn('characters truncated', body)
+        self.assertLess(len(body), 200)
+
+    def test_request_and_locals_are_trimmed_before_trace(self):
+        trace = 'frame\n' * 100
+        body = BodyRenderer(max_length=1000, caps={}).render(sections(
+            trace=trace, locals_data='l' * 500, request='r' * 500))
+
+        self.assertLessEqual(len(body), 1000)
+        self.assertIn(trace, body)
+        self.assertNotIn('r' * 100, body)
+        self.assertTrue(body.endswith('\n\nculprit\n'))
+
+    def test_trace_keeps_innermost_frames(self):
+        trace = ''.join('frame {}\n'.format(index) for index in range(1000))
+        body = BodyRenderer(max_length=2000, caps={}, keep_trace=500).render(
+            sections(trace=trace, locals_data='', request=''))
+
+        self.assertLessEqual(len(body), 2000)
+        self.assertIn('frame 999\n```', body)
+        self.assertNotIn('frame 0\n', body)
+        self.assertTrue(body.endswith('\n\nculprit\n'))
+
+    def test_long_message_does_not_push_out_frames(self):
+        store = mock.Mock()
+        reporter = Reporter(store=store)
+
+        def inner(message):
+            raise ValueError(message)
+
+        def outer():
+            inner('m' * 200000)
+
+        try:
+            outer()
+        except ValueError:
+            reporter.report(extra_content='extra')
+
+        body = store.create_or_update_issue.call_args[1]['body']
+        self.assertLessEqual(len(body), BodyRenderer().max_length)
+        self.assertIn('in outer\n', body)
+        self.assertIn('in inner\n', body)
+        self.assertIn('ValueError: mmm', body)
+        self.assertIn('characters truncated', body)
+        self.assertIn("message = 'mmm", body)
+        self.assertIn('extra', body)
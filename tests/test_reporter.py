@@ -10,7 +10,10 @@ Tests for `exreporter.reporter` module.
 import unittest
 from mock import patch, MagicMock
 
+from exreporter.formats import Formats
 from exreporter.reporter import Reporter
+from exreporter.stores.base import RateLimitExceeded
+from exreporter.throttle import CooldownGate
 
 
 class TestReporter(unittest.TestCase):
@@ -21,6 +24,7 @@ class TestReporter(unittest.TestCase):
         store = MagicMock()
         stack_trace = StackTrace()
         stack_trace.exception = ValueError
+        stack_trace.trace_parts = ('Traceback\n', 'ValueError\n')
 
         reporter = Reporter(store=store)
 
@@ -37,3 +41,64 @@ class TestReporter(unittest.TestCase):
            Formats.culprit.format()),
             labels=reporter.labels, time_delta=reporter.time_delta,
             max_comments=reporter.max_comments)
+
+    @patch('exreporter.reporter.Formats')
+    @patch('exreporter.reporter.StackTrace')
+    def test_reporter_report_with_dispatcher(self, StackTrace, Formats):
+        store = MagicMock()
+        dispatcher = MagicMock()
+        StackTrace().exception = ValueError
+        StackTrace().trace_parts = ('Traceback\n', 'ValueError\n')
+
+        reporter = Reporter(store=store, dispatcher=dispatcher)
+
+        self.assertIsNone(reporter.report())
+        self.assertFalse(store.create_or_update_issue.called)
+        dispatcher.submit.assert_called_once_with(
+            reporter._dispatched, **reporter.render())
+
+    @patch('exreporter.reporter.StackTrace')
+    def test_rate_limited_report_is_dropped(self, StackTrace):
+        store = MagicMock()
+        store.create_or_update_issue.side_effect = RateLimitExceeded(
+            'search', 30)
+        StackTrace().exception = ValueError
+        StackTrace().trace_parts = ('Traceback\n', 'ValueError\n')
+        metrics = MagicMock()
+
+        reporter = Reporter(store=store, metrics=metrics)
+
+        self.assertIsNone(reporter.report())
+        metrics.increment.assert_called_with(
+            'suppressed', reason='rate-limited')
+
+    @patch('exreporter.reporter.time')
+    def test_dispatched_report_is_retried_after_rate_limit(self, time):
+        store = MagicMock()
+        store.create_or_update_issue.side_effect = [
+            RateLimitExceeded('search', 5), 'issue']
+
+        reporter = Reporter(store=store)
+
+        self.assertEqual(reporter._dispatched(culprit='culprit'), 'issue')
+        time.sleep.assert_called_once_with(5)
+
+    @patch('exreporter.reporter.StackTrace')
+    def test_reporter_cooldown_suppresses_repeat_occurrences(
+            self, StackTrace):
+        store = MagicMock()
+        trace_info = StackTrace.return_value
+        trace_info.exception = ValueError
+        trace_info.trace_parts = ('Traceback\n', 'ValueError\n')
+        trace_info.filepath = '/app/views.py'
+
+        reporter = Reporter(store=store, cooldown=CooldownGate())
+
+        reporter.report()
+        self.assertIsNone(reporter.report())
+        self.assertIsNone(reporter.report())
+        self.assertEqual(store.create_or_update_issue.call_count, 1)
+
+        reporter.report(time_delta=0)
+        body = store.create_or_update_issue.call_args[1]['body']
+        self.assertIn(Formats.suppressed.format(count=2), body)
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_saferepr
+----------------------------------
+
+Tests for `exreporter.saferepr` module.
+"""
+
+import unittest
+
+from exreporter.saferepr import SafeRepr
+
+
+class Unrepresentable(object):
+
+    def __repr__(self):
+        raise RuntimeError
+
+
+class Expensive(object):
+
+    def __repr__(self):
+        raise AssertionError('repr of arbitrary objects must not be called')
+
+
+class TestSafeRepr(unittest.TestCase):
+
+    def test_strings_are_truncated(self):
+        text = SafeRepr(max_string=12).repr('x' * 10 ** 6)
+
+        self.assertEqual(text, "'xxxxxxxx...")
+
+    def test_containers_are_capped(self):
+        safe_repr = SafeRepr(max_items=2, max_depth=2)
+
+        self.assertEqual(
+            safe_repr.repr(list(range(5))), '[0, 1, ... (3 more)]')
+        self.assertEqual(safe_repr.repr({'a': [[1]]}), "{'a': [[...]]}")
+
+    def test_objects_are_not_repred_by_default(self):
+        self.assertTrue(
+            SafeRepr().repr(Expensive()).startswith('<tests.test_saferepr.'))
+
+    def test_failing_repr_is_guarded(self):
+        text = SafeRepr(repr_objects=True).repr(Unrepresentable())
+
+        self.assertEqual(text, '<unrepresentable Unrepresentable: '
+                               'RuntimeError>')
+
+    def test_locals_share_budget(self):
+        locals_data = dict(
+            ('name{}'.format(index), 'x' * 100) for index in range(1000))
+
+        text = SafeRepr(max_chars=1000).repr_locals(locals_data)
+
+        self.assertLess(len(text), 2000)
+        self.assertTrue(text.endswith('more)'))
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_sampling
+----------------------------------
+
+Tests for `exreporter.sampling` module.
+"""
+
+import unittest
+from mock import patch, MagicMock
+
+from exreporter.formats import Formats
+from exreporter.reporter import Reporter
+from exreporter.sampling import Sampler
+
+
+class TestSampler(unittest.TestCase):
+
+    def test_first_occurrence_is_always_kept(self):
+        sampler = Sampler(default_rate=0)
+
+        self.assertEqual(sampler.sample('a', ValueError), (True, 0))
+        self.assertEqual(sampler.sample('b', ValueError), (True, 0))
+        self.assertEqual(sampler.sample('a', ValueError), (False, 0))
+
+    def test_sampled_out_count_is_carried_forward(self):
+        sampler = Sampler(rates={KeyError: 0})
+        sampler.sample('culprit', KeyError)
+        for _ in range(3):
+            sampler.sample('culprit', KeyError)
+
+        sampler.rates[KeyError] = 1
+        sampler._type_rates.clear()
+
+        self.assertEqual(sampler.sample('culprit', KeyError), (True, 3))
+        self.assertEqual(sampler.sampled_out, 3)
+
+    def test_rates_match_class_hierarchy_and_modules(self):
+        sampler = Sampler(rates={
+            LookupError: 0.5, 'builtins.ValueError': 0.25, 'json': 0.1})
+
+        self.assertEqual(sampler.rate(KeyError), 0.5)
+        self.assertEqual(sampler.rate(ValueError), 0.25)
+        self.assertEqual(
+            sampler.rate(type('Error', (Exception,), {'__module__':
+                                                      'json.decoder'})), 0.1)
+        self.assertEqual(sampler.rate(OSError), 1.0)
+
+    def test_rates_adapt_to_target_throughput(self):
+        sampler = Sampler(target=10, window=1)
+
+        sampler._window_start = 999
+        with patch('exreporter.sampling.monotonic',
+                   side_effect=[999.5] * 99 + [1000]):
+            for index in range(100):
+                sampler.sample('culprit', ValueError)
+
+        self.assertAlmostEqual(sampler.factor, 0.1)
+
+
+class TestReporterWithSampler(unittest.TestCase):
+
+    @patch('exreporter.reporter.StackTrace')
+    def test_sampled_out_occurrences_are_counted_in_next_report(
+            self, StackTrace):
+        store = MagicMock()
+        trace_info = StackTrace.return_value
+        trace_info.exception = ValueError
+        trace_info.trace_parts = ('Traceback\n', 'ValueError\n')
+        trace_info.filepath = '/app/views.py'
+        sampler = Sampler(default_rate=0)
+        reporter = Reporter(store=store, sampler=sampler)
+
+        reporter.report()
+        self.assertIsNone(reporter.report())
+        self.assertIsNone(reporter.report())
+        sampler.default_rate = 1
+        sampler._type_rates.clear()
+        reporter.report()
+
+        self.assertEqual(store.create_or_update_issue.call_count, 2)
+        body = store.create_or_update_issue.call_args[1]['body']
+        self.assertIn(Formats.suppressed.format(count=2), body)
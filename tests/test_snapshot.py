@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_snapshot
+----------------------------------
+
+Tests for `exreporter.snapshot` module.
+"""
+
+import io
+import socket
+import unittest
+import threading
+import tracemalloc
+
+import mock
+
+from exreporter.reporter import Reporter
+from exreporter.snapshot import RequestSnapshot
+
+
+BODY_SIZE = 8 * 1024 * 1024
+
+
+class HttpRequest(object):
+    """Stand-in for Django's ``HttpRequest``, reading ``body`` fails.
+    """
+
+    def __init__(self, body=None, **meta):
+        self.method = 'POST'
+        self.path = '/upload/'
+        self.META = dict(meta, REQUEST_METHOD='POST', PATH_INFO='/upload/')
+        if body is not None:
+            self._body = body
+
+    @property
+    def body(self):
+        raise AssertionError('the body must not be read')
+
+    def __str__(self):
+        raise AssertionError('str of the request must not be called')
+
+
+class TrackingStream(io.BytesIO):
+
+    def __init__(self, data):
+        io.BytesIO.__init__(self, data)
+        self.read_sizes = []
+
+    def read(self, size=-1):
+        self.read_sizes.append(size)
+        return io.BytesIO.read(self, size)
+
+
+def environ(stream, **kwargs):
+    return dict({
+        'REQUEST_METHOD': 'POST',
+        'SCRIPT_NAME': '/app',
+        'PATH_INFO': '/upload/',
+        'QUERY_STRING': 'page=1&' + 'q' * 5000,
+        'CONTENT_TYPE': 'application/octet-stream',
+        'CONTENT_LENGTH': str(BODY_SIZE),
+        'HTTP_USER_AGENT': 'curl/8.0',
+        'HTTP_AUTHORIZATION': 'Bearer secret',
+        'HTTP_COOKIE': 'sessionid=secret',
+        'wsgi.input': stream,
+    }, **kwargs)
+
+
+class TestRequestSnapshot(unittest.TestCase):
+
+    def test_wsgi_body_is_peeked_without_consuming_the_stream(self):
+        stream = TrackingStream(b'x' * BODY_SIZE)
+        stream.seek(0)
+
+        text = RequestSnapshot(max_body=16).capture(environ(stream))
+
+        self.assertEqual(stream.tell(), 0)
+        self.assertEqual(stream.read_sizes, [16])
+        self.assertIn(
+            'Body (first 16 of {} bytes):\n{!r}'.format(BODY_SIZE, b'x' * 16),
+            text)
+
+    def test_large_bodies_are_not_copied(self):
+        request = HttpRequest(
+            body=b'x' * BODY_SIZE, CONTENT_TYPE='application/octet-stream')
+        stream = io.BufferedReader(io.BytesIO(b'y' * BODY_SIZE))
+        snapshot = RequestSnapshot()
+
+        tracemalloc.start()
+        try:
+            snapshot.capture(request)
+            snapshot.capture(environ(stream))
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        self.assertLess(peak, 64 * 1024)
+        self.assertEqual(stream.read(1), b'y')
+
+    def test_socket_input_is_not_read(self):
+        server, client = socket.socketpair()
+        stream = server.makefile('rb')
+        results = []
+        try:
+            client.sendall(b'x' * 64)
+            for length in ('64', '0', None):
+                thread = threading.Thread(target=lambda: results.append(
+                    RequestSnapshot().capture(
+                        environ(stream, CONTENT_LENGTH=length))))
+                thread.daemon = True
+                thread.start()
+                thread.join(2)
+
+                self.assertFalse(thread.is_alive())
+            self.assertEqual(stream.read(64), b'x' * 64)
+        finally:
+            stream.close()
+            server.close()
+            client.close()
+
+        self.assertTrue(all('Body' not in text for text in results))
+
+    def test_body_prefix_is_bounded_by_content_length(self):
+        stream = TrackingStream(b'body' + b'next request' * 100)
+
+        text = RequestSnapshot().capture(environ(stream, CONTENT_LENGTH='4'))
+
+        self.assertEqual(stream.read_sizes, [4])
+        self.assertTrue(text.endswith("Body:\nb'body'"))
+
+    def test_headers_are_allowlisted(self):
+        text = RequestSnapshot().capture(environ(io.BytesIO()))
+
+        self.assertIn('User-Agent: curl/8.0', text)
+        self.assertIn('Content-Type: application/octet-stream', text)
+        self.assertNotIn('secret', text)
+
+    def test_query_string_is_truncated(self):
+        text = RequestSnapshot(max_query=12).capture(environ(io.BytesIO()))
+
+        self.assertTrue(text.startswith('POST /app/upload/?page=1&qqqqq...\n'))
+
+    def test_unread_django_body_is_left_out(self):
+        request = HttpRequest(HTTP_HOST='example.com', CONTENT_LENGTH='12')
+
+        text = RequestSnapshot().capture(request)
+
+        self.assertEqual(text, 'POST /upload/\nHost: example.com\n'
+                               'Content-Length: 12')
+
+    def test_asgi_scope(self):
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'root_path': '',
+            'path': '/items/',
+            'query_string': b'id=1',
+            'headers': [(b'host', b'example.com'), (b'cookie', b'secret')],
+        }
+
+        text = RequestSnapshot().capture(scope)
+
+        self.assertEqual(text, 'GET /items/?id=1\nHost: example.com')
+
+    def test_other_objects_are_not_repred(self):
+        text = RequestSnapshot().capture(object())
+
+        self.assertTrue(text.startswith('<builtins.object object at 0x'))
+
+    def test_reporter_reports_snapshot(self):
+        store = mock.Mock()
+        reporter = Reporter(store=store, include_locals=False)
+        request = HttpRequest(body=b'{"id": 1}', HTTP_USER_AGENT='curl/8.0')
+
+        try:
+            raise ValueError
+        except ValueError:
+            reporter.report(request=request)
+
+        body = store.create_or_update_issue.call_args[1]['body']
+        self.assertIn('POST /upload/\nUser-Agent: curl/8.0', body)
+        self.assertIn("Body:\nb'{\"id\": 1}'", body)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_spool
+----------------------------------
+
+Tests for `exreporter.spool` module.
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from mock import MagicMock
+
+from exreporter.reporter import Reporter
+from exreporter.spool import Spool
+from exreporter.stores.base import RateLimitExceeded
+
+
+class TestSpool(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'spool.sqlite3')
+
+    def spool(self, deliver, **kwargs):
+        spool = Spool(path=self.path, **kwargs)
+        spool.deliver = deliver
+        # drained by the tests, not by a drainer thread
+        spool._pid = os.getpid()
+        self.addCleanup(spool.close)
+        return spool
+
+    def test_drain_delivers_in_order_and_removes_reports(self):
+        delivered = []
+        spool = self.spool(lambda **issue: delivered.append(issue['title']))
+
+        for title in ('a', 'b', 'c'):
+            spool.append(title=title)
+
+        self.assertEqual(spool.drain(), 3)
+        self.assertEqual(delivered, ['a', 'b', 'c'])
+        self.assertEqual(len(spool), 0)
+
+    def test_failed_delivery_is_retried_after_backoff(self):
+        deliver = MagicMock(side_effect=[AssertionError, None])
+        spool = self.spool(deliver, backoff=0.05)
+        spool.append(title='a')
+
+        self.assertEqual(spool.drain(), 1)
+        self.assertEqual(spool.drain(), 0)
+        time.sleep(0.06)
+        self.assertEqual(spool.drain(), 1)
+        self.assertEqual(deliver.call_count, 2)
+        self.assertEqual(len(spool), 0)
+
+    def test_rate_limited_delivery_waits_for_retry_after(self):
+        deliver = MagicMock(
+            side_effect=[RateLimitExceeded('search', 0.1), None])
+        spool = self.spool(deliver, backoff=0.001)
+        spool.append(title='a')
+
+        spool.drain()
+        time.sleep(0.01)
+        self.assertEqual(spool.drain(), 0)
+        time.sleep(0.1)
+        self.assertEqual(spool.drain(), 1)
+
+    def test_report_is_dropped_after_max_attempts(self):
+        spool = self.spool(
+            MagicMock(side_effect=AssertionError), backoff=0, max_attempts=2)
+        spool.append(title='a')
+
+        spool.drain()
+        spool.drain()
+
+        self.assertEqual(len(spool), 0)
+
+    def test_backlog_is_replayed_by_a_new_spool(self):
+        self.spool(None).append(title='a')
+        delivered = []
+
+        self.assertEqual(
+            self.spool(lambda **issue: delivered.append(issue)).drain(), 1)
+        self.assertEqual(delivered, [{'title': 'a'}])
+
+    def test_claimed_batch_is_hidden_from_other_drainers(self):
+        other = MagicMock()
+
+        def deliver(**issue):
+            self.assertEqual(self.spool(other).drain(), 0)
+
+        self.spool(deliver).append(title='a')
+        self.spool(deliver).drain()
+
+        self.assertFalse(other.called)
+
+
+class TestReporterWithSpool(unittest.TestCase):
+
+    def test_report_is_delivered_by_drainer(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        delivered = threading.Event()
+        store = MagicMock()
+        store.create_or_update_issue.side_effect = \
+            lambda **issue: delivered.set()
+
+        spool = Spool(path=os.path.join(directory, 'spool.sqlite3'))
+        reporter = Reporter(store=store, spool=spool)
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            self.assertIsNone(reporter.report())
+
+        self.assertTrue(delivered.wait(1))
+        self.assertEqual(
+            store.create_or_update_issue.call_args[1]['labels'], ['Bugs'])
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_sqlite
+----------------------------------
+
+Tests for `exreporter.stores.sqlite` module.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from mock import MagicMock, patch
+
+from exreporter.stores.sqlite import SqliteStore, SqliteSync
+
+
+class TestSqliteStore(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.store = SqliteStore(path=os.path.join(directory, 'issues'))
+        self.addCleanup(self.store.close)
+
+    def report(self, culprit='culprit', **kwargs):
+        report = dict(
+            title='title', body='body', culprit=culprit, labels=['Bug'],
+            max_comments=50, time_delta=-1)
+        report.update(kwargs)
+        return report
+
+    def test_creates_then_comments(self):
+        first = self.store.create_or_update_issue(**self.report())
+        second = self.store.create_or_update_issue(**self.report())
+
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(second.comments_count, 1)
+        self.assertEqual(self.store.occurrences('culprit'), 2)
+
+    def test_occurrence_within_time_delta_is_only_recorded(self):
+        self.store.create_or_update_issue(**self.report())
+
+        self.assertIsNone(self.store.create_or_update_issue(
+            **self.report(time_delta=10)))
+        self.assertEqual(self.store.issue('culprit').comments_count, 0)
+        self.assertEqual(self.store.occurrences('culprit'), 2)
+
+    def test_new_issue_after_max_comments(self):
+        self.store.create_or_update_issue(**self.report())
+        self.store.create_or_update_issue(**self.report(max_comments=1))
+        issue = self.store.create_or_update_issue(
+            **self.report(max_comments=1))
+
+        self.assertEqual(issue.id, 2)
+        self.assertEqual(self.store.issue('culprit').id, 2)
+
+    def test_failed_report_of_a_batch_is_rolled_back_alone(self):
+        results = self.store.create_or_update_many([
+            self.report('a'), self.report('b', title=None),
+            self.report('c')])
+
+        self.assertIsInstance(results[1], Exception)
+        self.assertEqual(
+            [self.store.occurrences(culprit) for culprit in 'abc'],
+            [1, 0, 1])
+
+    def test_sync_promotes_new_occurrences_once(self):
+        for _ in range(3):
+            self.store.create_or_update_issue(**self.report(time_delta=10))
+        self.store.create_or_update_issue(**self.report('other'))
+        target = MagicMock()
+        target.create_or_update_many.side_effect = lambda reports: [
+            object() for _ in reports]
+        sync = SqliteSync(self.store, target=target)
+
+        self.assertEqual(sync.run(), 2)
+        self.assertEqual(sync.run(), 0)
+        reports = target.create_or_update_many.call_args_list[0][0][0]
+        self.assertEqual(
+            [report['culprit'] for report in reports], ['culprit', 'other'])
+        self.assertIn('3 occurrence(s) recorded', reports[0]['body'])
+        self.assertEqual(reports[0]['time_delta'], -1)
+
+    def test_sync_merges_issues_of_a_culprit(self):
+        for _ in range(3):
+            self.store.create_or_update_issue(
+                **self.report(max_comments=1, body='latest'))
+        target = MagicMock()
+        target.create_or_update_many.side_effect = lambda reports: [
+            object() for _ in reports]
+        sync = SqliteSync(self.store, target=target)
+
+        self.assertEqual(sync.run(), 2)
+        reports = target.create_or_update_many.call_args[0][0]
+        self.assertEqual(len(reports), 1)
+        self.assertIn('3 occurrence(s) recorded', reports[0]['body'])
+        self.assertEqual(self.store.pending(), [])
+
+    def test_interrupted_batch_is_rolled_back(self):
+        with patch.object(
+                SqliteStore, '_record', side_effect=KeyboardInterrupt):
+            self.assertRaises(
+                KeyboardInterrupt, self.store.create_or_update_many,
+                [self.report()])
+
+        self.assertEqual(self.store.occurrences('culprit'), 0)
+        self.assertIsNotNone(
+            self.store.create_or_update_issue(**self.report()))
+
+    def test_failed_promotion_is_retried(self):
+        self.store.create_or_update_issue(**self.report())
+        target = MagicMock()
+        target.create_or_update_many.return_value = [AssertionError()]
+        sync = SqliteSync(self.store, target=target)
+
+        self.assertEqual(sync.run(), 0)
+        target.create_or_update_many.return_value = [object()]
+        self.assertEqual(sync.run(), 1)
+        self.assertEqual(self.store.pending(), [])
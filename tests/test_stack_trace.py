@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_stack_trace
+----------------------------------
+
+Tests for `exreporter.stack_trace` module.
+"""
+
+import sys
+import unittest
+
+from exreporter.stack_trace import StackTrace
+
+
+library = {}
+exec(compile('def explode():\n    raise ValueError("library")\n',
+             '/venv/lib/site-packages/library.py', 'exec'), library)
+
+
+def call_library():
+    library['explode']()
+
+
+def fail(depth):
+    if depth:
+        return fail(depth - 1)
+    local_value = 'value'  # noqa
+    raise ValueError('failed')
+
+
+class TestStackTrace(unittest.TestCase):
+
+    def capture(self, **kwargs):
+        try:
+            fail(3)
+        except ValueError:
+            return StackTrace(**kwargs)
+
+    def test_innermost_frame_is_the_culprit(self):
+        trace_info = self.capture()
+
+        self.assertEqual(trace_info.method_name, 'fail')
+        self.assertEqual(trace_info.exception, ValueError)
+        self.assertEqual(trace_info.locals_data['depth'], 0)
+        self.assertIn("local_value = 'value'", trace_info.locals_text)
+
+    def test_culprit_is_chosen_by_in_app_predicate(self):
+        def capture(**kwargs):
+            try:
+                call_library()
+            except ValueError:
+                return StackTrace(**kwargs)
+
+        self.assertEqual(capture().method_name, 'call_library')
+        self.assertEqual(
+            capture(in_app=lambda filepath: True).method_name, 'explode')
+
+    def test_stack_trace_text_is_memoized(self):
+        trace_info = self.capture()
+
+        self.assertIn('ValueError: failed', trace_info.stack_trace_text)
+        self.assertIs(trace_info.stack_trace_text,
+                      trace_info.stack_trace_text)
+
+    def test_trace_parts_split_frames_from_message(self):
+        trace_info = self.capture()
+        frames, message = trace_info.trace_parts
+
+        self.assertEqual(frames + message, trace_info.stack_trace_text)
+        self.assertTrue(frames.startswith('Traceback'))
+        self.assertEqual(message, 'ValueError: failed\n')
+
+    def test_explicit_exc_info_is_captured_outside_except_block(self):
+        try:
+            fail(1)
+        except ValueError:
+            exc_info = sys.exc_info()
+
+        trace_info = StackTrace(exc_info=exc_info)
+
+        self.assertEqual(trace_info.method_name, 'fail')
+        self.assertEqual(trace_info.exception_value, exc_info[1])
+
+    def test_exception_never_raised_is_rejected(self):
+        error = ValueError('not raised')
+
+        self.assertRaises(
+            AssertionError, StackTrace,
+            exc_info=(ValueError, error, None))
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+"""
+test_storm
+----------------------------------
+
+Tests for `exreporter.storm` module.
+"""
+
+import time
+import hashlib
+import unittest
+from mock import patch, MagicMock
+
+from exreporter.formats import Formats
+from exreporter.reporter import Reporter
+from exreporter.storm import StormDetector, culprit_label
+from exreporter.stores.gitlab import GitlabCredentials, GitlabStore
+
+from .fakes import FakeGitlab
+
+
+class TestStormDetector(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(StormDetector, '_ensure_ticker')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.emit = MagicMock()
+        self.storm = StormDetector(threshold=1, window=10, interval=5, top=2)
+        self.storm.start(self.emit)
+
+    def burst(self, culprits):
+        return [self.storm.add(culprit) for culprit in culprits]
+
+    def test_switches_to_digest_mode_above_threshold(self):
+        self.assertFalse(any(self.burst(['a'] * 5)))
+        self.assertFalse(self.storm.check())
+
+        self.burst(['a'] * 10)
+        self.assertTrue(self.storm.check())
+        self.assertTrue(all(self.burst(['a', 'b'])))
+        self.assertFalse(self.emit.called)
+
+    def test_digest_lists_top_culprits_with_counts(self):
+        self.burst(['a'] * 20)
+        now = time.time()
+        self.storm.check(now)
+        self.burst(['a'] * 3 + ['b'] * 2 + ['c'])
+
+        self.assertTrue(self.storm.check(now + 5))
+
+        digest = self.emit.call_args[1]
+        self.assertEqual(digest['culprit'], Formats.digest_culprit)
+        self.assertIn('6 occurrence(s) of 3 culprit(s)', digest['body'])
+        self.assertIn(
+            '| 3 | {} |'.format(culprit_label('a')), digest['body'])
+        self.assertIn(
+            '| 2 | {} |'.format(culprit_label('b')), digest['body'])
+        self.assertIn('| 1 | others |', digest['body'])
+
+    def test_culprit_lookup_does_not_find_digest(self):
+        culprit = '`Culprit- /app/views.py>12>ValueError`'
+        gitlab = FakeGitlab().start()
+        self.addCleanup(gitlab.stop)
+        store = GitlabStore(
+            credentials=GitlabCredentials(
+                project='group/project', auth_token='t'),
+            api_url=gitlab.url)
+        self.burst([culprit] * 20)
+        now = time.time()
+        self.storm.check(now)
+        self.burst([culprit] * 3)
+        self.storm.check(now + 5)
+
+        store.create_or_update_issue(labels=['Bug'], **self.emit.call_args[1])
+
+        self.assertIsNone(store.lookup(culprit, labels=['Bug']))
+        self.assertIn(
+            '/app/views.py>12>ValueError (', self.emit.call_args[1]['body'])
+        self.assertIsNotNone(
+            store.lookup(Formats.digest_culprit, labels=['Bug']))
+
+    def test_culprit_label_is_readable(self):
+        self.assertEqual(
+            culprit_label('`Fingerprint- 0123abcd`'),
+            '0123abcd ({})'.format(
+                hashlib.sha1(b'`Fingerprint- 0123abcd`').hexdigest()[:12]))
+
+    def test_switches_back_when_rate_drops(self):
+        self.burst(['a'] * 20)
+        now = time.time()
+        self.storm.check(now)
+        self.burst(['a'])
+
+        self.assertFalse(self.storm.check(now + 20))
+        self.assertEqual(self.emit.call_count, 1)
+        self.assertFalse(self.storm.add('a'))
+
+
+class TestReporterWithStorm(unittest.TestCase):
+
+    @patch.object(StormDetector, '_ensure_ticker')
+    @patch('exreporter.reporter.StackTrace')
+    def test_storm_stops_per_occurrence_reports(self, StackTrace, _):
+        store = MagicMock()
+        trace_info = StackTrace.return_value
+        trace_info.exception = ValueError
+        trace_info.trace_parts = ('Traceback\n', 'ValueError\n')
+        trace_info.filepath = '/app/views.py'
+        storm = StormDetector(threshold=0)
+        reporter = Reporter(store=store, storm=storm)
+
+        reporter.report()
+        storm.check()
+        self.assertIsNone(reporter.report())
+        storm.check(time.time() + storm.interval)
+
+        self.assertEqual(store.create_or_update_issue.call_count, 2)
+        digest = store.create_or_update_issue.call_args[1]
+        self.assertEqual(digest['title'], Formats.digest_title)
+        self.assertEqual(digest['time_delta'], -1)